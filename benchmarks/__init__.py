@@ -0,0 +1,3 @@
+"""
+Бенчмарки и нагрузочные сценарии
+"""
@@ -0,0 +1,269 @@
+"""
+Бенчмарк пропускной способности диспетчера на синтетических апдейтах
+
+Собирает настоящий Dispatcher из main.py (все middleware и роутеры) на
+временной базе SQLite и прогоняет через dp.feed_update синтетические
+апдейты. Бот работает через RecordingSession: запросы к Bot API
+записываются, сеть не используется.
+
+Сценарии: browse (каталог и страницы), card (карточка проекта),
+add_to_cart, checkout (корзина + оплата), admin_stats. Для каждого
+сценария и для смеси — p50/p95/p99 задержки апдейта и апдейтов в секунду,
+затем разбивка по обработчикам.
+
+    python -m benchmarks.dispatcher_replay --iterations 300 --concurrency 20
+    python -m benchmarks.dispatcher_replay --scenario card --scenario checkout
+    python -m benchmarks.dispatcher_replay --mix browse=50,card=30,add_to_cart=10,checkout=8,admin_stats=2
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Настройки читаются при импорте config, поэтому окружение готовим заранее
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault('BOT_TOKEN', '0:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+os.environ.setdefault('METRICS_ENABLED', 'True')
+os.environ.setdefault('DATABASE_URL', f"sqlite+aiosqlite:///{os.path.join(_tmp_dir.name, 'replay.db')}")
+# Синтетическая нагрузка приходит от немногих пользователей намного чаще живой —
+# по умолчанию flood control не должен подменять замер обработчиков
+os.environ.setdefault('THROTTLE_RATE', '1000000')
+os.environ.setdefault('THROTTLE_BURST', '1000000')
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import TelegramMethod  # noqa: E402
+from aiogram.types import CallbackQuery, Chat, Message, Update, User as TgUser  # noqa: E402
+
+import main as bot_main  # noqa: E402
+from config import settings  # noqa: E402
+from bot.database import crud  # noqa: E402
+from bot.database.engine import async_session_maker, engine, init_db, is_sqlite  # noqa: E402
+from bot.database.models import ProjectType, UserRole  # noqa: E402
+from bot.keyboards.callbacks import AddToCart, CatalogPage, ProjectCard  # noqa: E402
+from bot.database.writer import write_queue  # noqa: E402
+from bot.services import metrics  # noqa: E402
+from bot.services.catalog_snapshot import catalog_store  # noqa: E402
+from benchmarks.crud_backends import PROJECTS, USERS, seed  # noqa: E402
+
+
+BOT_ID = 42
+ADMIN_ID = 7_000_000
+THROTTLED_TEXT = "Слишком много запросов"
+
+
+class RecordingSession(BaseSession):
+    """Сессия бота без сети: записывает запросы и отдает правдоподобные ответы"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter = Counter()
+        self.throttled = 0
+        self._message_ids = itertools.count(1_000_000)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls[method.__api_method__] += 1
+        text = getattr(method, 'text', None)
+        if text and THROTTLED_TEXT in text:
+            self.throttled += 1
+        if method.__returning__ is Message:
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=getattr(method, 'chat_id', 0) or 0, type='private'),
+            )
+        return True
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class UpdateFactory:
+    """Синтетические апдейты с уникальными id и сообщениями (чтобы не срабатывал coalescing)"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def callback(self, telegram_id: int, data: str) -> Update:
+        update_id = next(self._ids)
+        user = TgUser(id=telegram_id, is_bot=False, first_name=f"User {telegram_id}")
+        message = Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=telegram_id, type='private'),
+            from_user=TgUser(id=BOT_ID, is_bot=True, first_name='Bot'),
+            text='menu',
+        )
+        return Update(
+            update_id=update_id,
+            callback_query=CallbackQuery(
+                id=str(update_id),
+                from_user=user,
+                chat_instance=str(telegram_id),
+                message=message,
+                data=data,
+            ),
+        )
+
+
+# Сценарий: (пользователь, rnd) -> последовательность callback_data одного пользователя
+Scenario = Callable[[random.Random], List[str]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    'browse': lambda rnd: [
+        'catalog',
+        'catalog_all',
+        CatalogPage(page=rnd.randint(1, 3)).pack(),
+        CatalogPage(project_type=ProjectType.DIPLOMA).pack(),
+    ],
+    'card': lambda rnd: [ProjectCard(project_id=rnd.randint(1, PROJECTS)).pack()],
+    'add_to_cart': lambda rnd: [AddToCart(project_id=rnd.randint(1, PROJECTS)).pack()],
+    'checkout': lambda rnd: [AddToCart(project_id=rnd.randint(1, PROJECTS)).pack(), 'checkout'],
+    'admin_stats': lambda rnd: ['admin_stats'],
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """browse=50,card=30 -> {'browse': 50, 'card': 30}"""
+    mix = {}
+    for part in value.split(','):
+        name, weight = part.split('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"неизвестный сценарий: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+async def replay(
+    dp, bot: Bot, factory: UpdateFactory, mix: Dict[str, int], iterations: int, concurrency: int, seed_value: int
+) -> Dict[str, float]:
+    """Прогнать iterations сценариев из смеси mix в concurrency параллельных пользователях"""
+    latencies: List[float] = []
+    errors = 0
+    names, weights = list(mix), list(mix.values())
+    remaining = iterations
+
+    async def worker(worker_id: int):
+        nonlocal errors, remaining
+        rnd = random.Random(seed_value * 1000 + worker_id)
+        # У каждого воркера свои пользователи, как у разных чатов
+        users = itertools.cycle(range(worker_id, USERS, concurrency))
+        while remaining > 0:
+            remaining -= 1
+            name = rnd.choices(names, weights)[0]
+            telegram_id = ADMIN_ID if name == 'admin_stats' else 100_000 + next(users)
+            for data in SCENARIOS[name](rnd):
+                start = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, factory.callback(telegram_id, data))
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        return latencies[max(0, int(len(latencies) * q + 0.5) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        'updates': len(latencies),
+        'per_sec': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'errors': errors,
+    }
+
+
+def print_handlers(sql_stats) -> None:
+    """Разбивка по обработчикам: вызовы, среднее время, запросы к БД"""
+    sql = sql_stats.stats.snapshot()
+    rows = []
+    for (router, handler), series in metrics.handler_duration.series.items():
+        queries = sql.get(handler, {})
+        rows.append((series.sum, router, handler, series.count, queries))
+    print(f"\n{'роутер':<10}{'обработчик':<34}{'вызовов':>8}{'avg, мс':>9}{'всего, с':>10}{'SQL/апд':>9}{'БД avg, мс':>12}")
+    for total, router, handler, count, queries in sorted(rows, reverse=True):
+        print(
+            f"{router:<10}{handler:<34}{count:>8}{total / count * 1000:>9.2f}{total:>10.2f}"
+            f"{queries.get('queries_avg', 0):>9.1f}{queries.get('db_time_avg', 0) * 1000:>12.2f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='сценарии по отдельности')
+    parser.add_argument('--mix', type=parse_mix, help='смесь сценариев с весами')
+    parser.add_argument('--iterations', type=int, default=300, help='сценариев на прогон')
+    parser.add_argument('--concurrency', type=int, default=20, help='параллельных пользователей')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help='не приглушать логи бота')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger('bot').setLevel(logging.ERROR)
+
+    await init_db()
+    await seed(async_session_maker)
+    async with async_session_maker() as session:
+        await crud.create_admin(session, ADMIN_ID, UserRole.ADMIN)
+        await crud.create_user(session, telegram_id=ADMIN_ID, first_name='Admin')
+    if is_sqlite(settings.database_url):
+        write_queue.start()
+
+    recorder = RecordingSession()
+    bot = bot_main.create_bot(session=recorder)
+    dp, _, sql_stats, _ = bot_main.create_dispatcher()
+    factory = UpdateFactory()
+
+    runs: Dict[str, Dict[str, int]] = {}
+    for name in args.scenario or ([] if args.mix else list(SCENARIOS)):
+        runs[name] = {name: 1}
+    runs['mix'] = args.mix or {'browse': 50, 'card': 30, 'add_to_cart': 10, 'checkout': 8, 'admin_stats': 2}
+
+    try:
+        print(f"Сценариев на прогон: {args.iterations}, параллельно: {args.concurrency}\n")
+        print(f"{'прогон':<14}{'апдейтов':>9}{'апд/с':>9}{'p50, мс':>9}{'p95, мс':>9}{'p99, мс':>9}{'ошибок':>8}")
+        for name, mix in runs.items():
+            r = await replay(dp, bot, factory, mix, args.iterations, args.concurrency, args.seed)
+            print(
+                f"{name:<14}{r['updates']:>9}{r['per_sec']:>9.0f}{r['p50']:>9.2f}"
+                f"{r['p95']:>9.2f}{r['p99']:>9.2f}{r['errors']:>8}"
+            )
+
+        print_handlers(sql_stats)
+        print("\nЗапросы к Bot API: " + ", ".join(f"{m}={n}" for m, n in recorder.calls.most_common()))
+        if recorder.throttled:
+            print(f"Отклонено throttling: {recorder.throttled}")
+    finally:
+        # Закрыть соединения до выхода из asyncio.run: иначе NullPool закрывает их
+        # в отмененных задачах и печатает CancelledError
+        await catalog_store.stop()
+        await write_queue.stop()
+        await bot.session.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        _tmp_dir.cleanup()
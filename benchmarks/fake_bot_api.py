@@ -0,0 +1,563 @@
+"""
+Локальная замена Telegram Bot API для нагрузочных тестов без сети
+
+aiohttp-сервер с методами, которые использует бот: sendMessage,
+editMessageText, answerCallbackQuery, sendDocument, sendPhoto, sendVideo,
+sendMediaGroup, getFile (и скачивание файла по /file/bot<token>/<path>) и
+getUpdates (плюс getMe и deleteWebhook, нужные для запуска polling).
+file_id из rejected_file_ids отклоняются с 400, как битые. Задержка ответа
+настраивается, 429 с retry_after подмешивается с заданной вероятностью,
+лимит сообщений на чат и общий лимит бота соблюдаются как в Telegram.
+Все вызовы пишутся в CallRecorder для проверки числа запросов.
+
+    async with FakeBotAPI(latency=0.05, chat_rate=1.0) as api:
+        bot = main.create_bot(session=api.session())
+        ...
+        api.recorder.assert_count('sendMessage', 10)
+
+Отдельный сервер (бот подключается через TELEGRAM_API_URL=http://127.0.0.1:8081):
+
+    python -m benchmarks.fake_bot_api --port 8081 --latency 0.05 --flood-rate 0.01
+    python -m benchmarks.fake_bot_api --check
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Union
+
+from aiohttp import web
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+# Методы отправки: на них действуют лимиты и подмешиваемые 429
+SENDING_METHODS = frozenset({
+    'sendMessage', 'editMessageText', 'sendDocument', 'sendPhoto', 'sendVideo', 'sendMediaGroup',
+})
+
+Params = Dict[str, Any]
+
+
+class FakeBadRequest(Exception):
+    """Метод отвечает 400 Bad Request"""
+
+
+class Call(NamedTuple):
+    """Один запрос к серверу"""
+    method: str
+    chat_id: Optional[Union[int, str]]
+    params: Params
+    status: int
+    at: float
+
+
+class CallRecorder:
+    """Журнал запросов к фейковому Bot API"""
+
+    def __init__(self):
+        self.calls: List[Call] = []
+
+    def record(self, method: str, chat_id: Optional[Union[int, str]], params: Params, status: int) -> None:
+        """Записать запрос"""
+        self.calls.append(Call(method, chat_id, params, status, time.monotonic()))
+
+    def count(
+        self,
+        method: Optional[str] = None,
+        chat_id: Optional[Union[int, str]] = None,
+        status: Optional[int] = 200
+    ) -> int:
+        """Число запросов (status=None — с любым ответом, в том числе 429)"""
+        return sum(
+            1 for call in self.calls
+            if (method is None or call.method == method)
+            and (chat_id is None or call.chat_id == chat_id)
+            and (status is None or call.status == status)
+        )
+
+    def assert_count(
+        self,
+        method: str,
+        expected: int,
+        chat_id: Optional[Union[int, str]] = None,
+        status: Optional[int] = 200
+    ) -> None:
+        """AssertionError, если запросов не expected"""
+        actual = self.count(method, chat_id, status)
+        if actual != expected:
+            where = f" в чат {chat_id}" if chat_id is not None else ""
+            raise AssertionError(f"{method}{where}: ожидалось {expected} запросов со статусом {status}, было {actual}")
+
+    def summary(self) -> Counter:
+        """(метод, статус) -> число запросов"""
+        return Counter((call.method, call.status) for call in self.calls)
+
+    def reset(self) -> None:
+        """Очистить журнал"""
+        self.calls.clear()
+
+
+class _Bucket:
+    """Корзина токенов лимита"""
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimit:
+    """Лимит rate запросов в секунду с запасом burst; возвращает retry_after при превышении"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Any, _Bucket] = {}
+
+    def consume(self, key: Any) -> int:
+        """Списать запрос; 0 — разрешен, иначе через сколько секунд повторить"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0
+        # Telegram отдает retry_after целым числом секунд
+        return max(1, math.ceil((1 - bucket.tokens) / self.rate))
+
+
+def _chat_id(value: Optional[str]) -> Optional[Union[int, str]]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value  # @username канала
+
+
+class FakeBotAPI:
+    """
+    Фейковый Telegram Bot API.
+
+    latency + случайная добавка до latency_jitter — задержка каждого ответа, секунд;
+    flood_rate — доля запросов отправки, на которые приходит 429 с retry_after;
+    chat_rate/chat_burst — лимит сообщений в один чат (в Telegram около 1 в секунду);
+    global_rate — общий лимит сообщений бота (в Telegram около 30 в секунду);
+    keep_files=False — загруженные файлы не хранятся в памяти (для замеров памяти).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        chat_rate: Optional[float] = None,
+        chat_burst: float = 3.0,
+        global_rate: Optional[float] = None,
+        seed: int = 1,
+        keep_files: bool = True
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.chat_limit = RateLimit(chat_rate, chat_burst) if chat_rate else None
+        self.global_limit = RateLimit(global_rate, global_rate) if global_rate else None
+        self.recorder = CallRecorder()
+        self.url: Optional[str] = None
+        self._rnd = random.Random(seed)
+        self.keep_files = keep_files
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates: List[Params] = []
+        # Содержимое файлов по file_id (отправленные документы и add_file)
+        self.files: Dict[str, bytes] = {}
+        self.rejected_file_ids: Set[str] = set()
+        self._updates_added = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self._methods: Dict[str, Callable[[int, Params], Awaitable[Any]]] = {
+            'getMe': self._get_me,
+            'deleteWebhook': self._ok,
+            'getUpdates': self._get_updates,
+            'sendMessage': self._send_message,
+            'editMessageText': self._edit_message_text,
+            'answerCallbackQuery': self._ok,
+            'sendDocument': self._send_document,
+            'sendPhoto': self._send_photo,
+            'sendVideo': self._send_video,
+            'sendMediaGroup': self._send_media_group,
+            'getFile': self._get_file,
+        }
+
+    # ============== ЗАПУСК ==============
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запустить сервер (port=0 — свободный порт); возвращает базовый URL"""
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        app.router.add_get('/file/bot{token}/{path:.+}', self._download)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Остановить сервер"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeBotAPI":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    @property
+    def api_server(self) -> TelegramAPIServer:
+        """TelegramAPIServer, указывающий на этот сервер"""
+        return TelegramAPIServer.from_base(self.url)
+
+    def session(self) -> AiohttpSession:
+        """Сессия бота, отправляющая запросы сюда"""
+        return AiohttpSession(api=self.api_server)
+
+    # ============== АПДЕЙТЫ ==============
+
+    def push_update(self, update: Union[Update, Params]) -> None:
+        """Поставить апдейт в очередь getUpdates (update_id назначается, если не задан)"""
+        if isinstance(update, Update):
+            update = json.loads(update.model_dump_json(exclude_none=True))
+        update.setdefault('update_id', next(self._update_ids))
+        self._updates.append(update)
+        self._updates_added.set()
+
+    async def _get_updates(self, bot_id: int, params: Params) -> List[Params]:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        # offset подтверждает все апдейты до него, как в Telegram
+        self._updates = [u for u in self._updates if u['update_id'] >= offset]
+        if not self._updates and timeout:
+            self._updates_added.clear()
+            try:
+                await asyncio.wait_for(self._updates_added.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    # ============== МЕТОДЫ ==============
+
+    def _message(self, bot_id: int, chat_id: Optional[Union[int, str]], **fields: Any) -> Params:
+        return {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': bot_id, 'is_bot': True, 'first_name': 'Fake Bot'},
+            **fields,
+        }
+
+    async def _ok(self, bot_id: int, params: Params) -> bool:
+        return True
+
+    async def _get_me(self, bot_id: int, params: Params) -> Params:
+        return {'id': bot_id, 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_bot'}
+
+    async def _send_message(self, bot_id: int, params: Params) -> Params:
+        return self._message(bot_id, _chat_id(params.get('chat_id')), text=params.get('text', ''))
+
+    async def _edit_message_text(self, bot_id: int, params: Params) -> Union[Params, bool]:
+        if params.get('inline_message_id'):
+            return True
+        message = self._message(bot_id, _chat_id(params.get('chat_id')), text=params.get('text', ''))
+        message['message_id'] = int(params['message_id'])
+        message['edit_date'] = message['date']
+        return message
+
+    def add_file(self, content: bytes, file_name: str = 'file.bin') -> Params:
+        """Положить файл на сервер (как присланный пользователем); возвращает поле document"""
+        number = next(self._file_ids)
+        file_id = f"fake-document-{number}"
+        self.files[file_id] = content
+        return {
+            'file_id': file_id,
+            'file_unique_id': f"fake-unique-{number}",
+            'file_name': file_name,
+            'file_size': len(content),
+        }
+
+    async def _get_file(self, bot_id: int, params: Params) -> Params:
+        file_id = params.get('file_id')
+        content = self.files.get(file_id, b'')
+        return {
+            'file_id': file_id,
+            'file_unique_id': f"fake-unique-{file_id}",
+            'file_size': len(content),
+            'file_path': f"documents/{file_id}",
+        }
+
+    async def _download(self, request: web.Request) -> web.StreamResponse:
+        file_id = request.match_info['path'].rsplit('/', 1)[-1]
+        content = self.files.get(file_id)
+        self.recorder.record('download', None, {'file_id': file_id}, 200 if content is not None else 404)
+        if content is None:
+            return web.Response(status=404)
+        # Отдаем кусками с ожиданием сокета, чтобы не копировать весь файл в буфер отправки
+        response = web.StreamResponse(headers={'Content-Length': str(len(content))})
+        await response.prepare(request)
+        view = memoryview(content)
+        for offset in range(0, len(content), 65536):
+            await response.write(view[offset:offset + 65536])
+        await response.write_eof()
+        return response
+
+    def _media(self, value: Any) -> Params:
+        """Поле файла в ответе: загруженный файл или повторная отправка по file_id"""
+        if isinstance(value, web.FileField):
+            if not self.keep_files:
+                size = sum(len(chunk) for chunk in iter(lambda: value.file.read(65536), b''))
+                return {**self.add_file(b'', value.filename), 'file_size': size}
+            return self.add_file(value.file.read(), value.filename)
+        if value in self.rejected_file_ids:
+            raise FakeBadRequest("Bad Request: wrong file identifier/HTTP URL specified")
+        return {'file_id': value, 'file_unique_id': f"fake-unique-{value}"}
+
+    def _media_message(self, bot_id: int, params: Params, kind: str, value: Any) -> Params:
+        media = self._media(value)
+        fields: Params = {kind: [{**media, 'width': 1, 'height': 1}] if kind == 'photo' else media}
+        if kind == 'video':
+            media.update(width=1, height=1, duration=1)
+        if params.get('caption'):
+            fields['caption'] = params['caption']
+        return self._message(bot_id, _chat_id(params.get('chat_id')), **fields)
+
+    async def _send_document(self, bot_id: int, params: Params) -> Params:
+        return self._media_message(bot_id, params, 'document', params.get('document'))
+
+    async def _send_photo(self, bot_id: int, params: Params) -> Params:
+        return self._media_message(bot_id, params, 'photo', params.get('photo'))
+
+    async def _send_video(self, bot_id: int, params: Params) -> Params:
+        return self._media_message(bot_id, params, 'video', params.get('video'))
+
+    async def _send_media_group(self, bot_id: int, params: Params) -> List[Params]:
+        items = json.loads(params['media'])
+        if not 2 <= len(items) <= 10:
+            raise FakeBadRequest("Bad Request: wrong number of messages in media group")
+        messages = []
+        for item in items:
+            value = item['media']
+            if isinstance(value, str) and value.startswith('attach://'):
+                value = params.get(value[len('attach://'):], value)
+            messages.append(self._media_message(bot_id, {**params, 'caption': item.get('caption')}, item['type'], value))
+        group_id = str(messages[0]['message_id'])
+        for message in messages:
+            message['media_group_id'] = group_id
+        return messages
+
+    # ============== ОБРАБОТКА ==============
+
+    def _throttle(self, method: str, chat_id: Optional[Union[int, str]]) -> int:
+        """retry_after для запроса или 0"""
+        if method not in SENDING_METHODS:
+            return 0
+        if self.flood_rate and self._rnd.random() < self.flood_rate:
+            return self.retry_after
+        if self.global_limit:
+            retry_after = self.global_limit.consume(None)
+            if retry_after:
+                return retry_after
+        if self.chat_limit and chat_id is not None:
+            return self.chat_limit.consume(chat_id)
+        return 0
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method_name = request.match_info['method']
+        token = request.match_info['token']
+        form = await request.post()
+        params: Params = {}
+        for key, value in form.items():
+            # Файлы приходят отдельными частями, поле ссылается на них через attach://<имя>
+            if isinstance(value, str) and value.startswith('attach://'):
+                value = form.get(value[len('attach://'):], value)
+            params[key] = value
+        chat_id = _chat_id(params.get('chat_id'))
+
+        delay = self.latency + (self._rnd.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        method = self._methods.get(method_name)
+        if method is None:
+            self.recorder.record(method_name, chat_id, params, 404)
+            return web.json_response({'ok': False, 'error_code': 404, 'description': 'Not Found'}, status=404)
+
+        retry_after = self._throttle(method_name, chat_id)
+        if retry_after:
+            self.recorder.record(method_name, chat_id, params, 429)
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {retry_after}",
+                'parameters': {'retry_after': retry_after},
+            }, status=429)
+
+        try:
+            bot_id = int(token.split(':', 1)[0])
+        except ValueError:
+            self.recorder.record(method_name, chat_id, params, 401)
+            return web.json_response({'ok': False, 'error_code': 401, 'description': 'Unauthorized'}, status=401)
+
+        try:
+            result = await method(bot_id, params)
+        except FakeBadRequest as e:
+            self.recorder.record(method_name, chat_id, params, 400)
+            return web.json_response({'ok': False, 'error_code': 400, 'description': str(e)}, status=400)
+        self.recorder.record(method_name, chat_id, params, 200)
+        return web.json_response({'ok': True, 'result': result})
+
+
+async def self_check() -> List[str]:
+    """Проверка сервера через настоящий Bot; возвращает список ошибок"""
+    from aiogram import Bot
+    from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+    from aiogram.types import BufferedInputFile, InputMediaDocument
+
+    errors: List[str] = []
+
+    def expect(condition: bool, message: str) -> None:
+        if not condition:
+            errors.append(message)
+
+    async with FakeBotAPI(latency=0.02, chat_rate=1.0, chat_burst=3) as api:
+        bot = Bot('123:fake', session=api.session())
+        try:
+            me = await bot.get_me()
+            expect(me.id == 123, f"getMe вернул id {me.id}")
+
+            start = time.perf_counter()
+            message = await bot.send_message(1, "привет")
+            expect(time.perf_counter() - start >= 0.02, "задержка ответа не соблюдается")
+
+            rejected = 0
+            for i in range(4):
+                try:
+                    await bot.send_message(1, f"сообщение {i}")
+                except TelegramRetryAfter as e:
+                    rejected += 1
+                    expect(e.retry_after >= 1, f"retry_after = {e.retry_after}")
+            # Запас чата 3 сообщения: первое + 2 из цикла проходят, остальные получают 429
+            expect(rejected == 2, f"лимит чата: отклонено {rejected} из 4")
+            await bot.send_message(2, "другой чат")
+
+            edited = await bot.edit_message_text("изменено", chat_id=3, message_id=message.message_id)
+            expect(edited.message_id == message.message_id, "editMessageText вернул другой message_id")
+            await bot.answer_callback_query("1")
+            sent = await bot.send_document(4, BufferedInputFile(b"x" * 1024, filename="work.zip"))
+            expect(sent.document.file_size == 1024, "sendDocument: неверный размер файла")
+            await bot.send_document(5, sent.document.file_id)
+            file = await bot.get_file(sent.document.file_id)
+            downloaded = await bot.download_file(file.file_path)
+            expect(downloaded.read() == b"x" * 1024, "скачанный файл не совпадает с отправленным")
+            album = await bot.send_media_group(7, [
+                InputMediaDocument(media=sent.document.file_id, caption="альбом"),
+                InputMediaDocument(media=BufferedInputFile(b"y" * 10, filename="b.zip")),
+            ])
+            expect(len(album) == 2 and album[1].document.file_size == 10, "sendMediaGroup вернул не те сообщения")
+            api.rejected_file_ids.add(sent.document.file_id)
+            try:
+                await bot.send_document(7, sent.document.file_id)
+                errors.append("отклоненный file_id принят")
+            except TelegramBadRequest:
+                pass
+
+            api.push_update({'message': {
+                'message_id': 1, 'date': 0, 'chat': {'id': 6, 'type': 'private'}, 'text': '/start',
+            }})
+            updates = await bot.get_updates(timeout=1)
+            expect(len(updates) == 1 and updates[0].message.text == '/start', "getUpdates не вернул апдейт")
+            updates = await bot.get_updates(offset=updates[0].update_id + 1, timeout=0)
+            expect(not updates, "offset не подтвердил апдейт")
+
+            for method, count in (('sendMessage', 4), ('editMessageText', 1), ('answerCallbackQuery', 1),
+                                  ('sendDocument', 2), ('sendMediaGroup', 1), ('getUpdates', 2)):
+                try:
+                    api.recorder.assert_count(method, count)
+                except AssertionError as e:
+                    errors.append(str(e))
+            expect(api.recorder.count('sendMessage', chat_id=1, status=429) == 2, "429 не записаны")
+        finally:
+            await bot.session.close()
+
+    async with FakeBotAPI(flood_rate=1.0, retry_after=7) as api:
+        bot = Bot('123:fake', session=api.session())
+        try:
+            await bot.send_message(1, "флуд")
+            errors.append("подмешанный 429 не пришел")
+        except TelegramRetryAfter as e:
+            expect(e.retry_after == 7, f"подмешанный retry_after = {e.retry_after}")
+        finally:
+            await bot.session.close()
+    return errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа, секунд')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='случайная добавка к задержке, секунд')
+    parser.add_argument('--flood-rate', type=float, default=0.0, help='доля запросов отправки с ответом 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after подмешанных 429, секунд')
+    parser.add_argument('--chat-rate', type=float, help='сообщений в секунду в один чат')
+    parser.add_argument('--chat-burst', type=float, default=3.0)
+    parser.add_argument('--global-rate', type=float, help='сообщений в секунду от бота всего')
+    parser.add_argument('--check', action='store_true', help='самопроверка через aiogram.Bot и выход')
+    args = parser.parse_args()
+
+    if args.check:
+        errors = await self_check()
+        for error in errors:
+            print(f"FAIL {error}")
+        print("ok" if not errors else f"Ошибок: {len(errors)}")
+        sys.exit(1 if errors else 0)
+
+    api = FakeBotAPI(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+        chat_rate=args.chat_rate,
+        chat_burst=args.chat_burst,
+        global_rate=args.global_rate,
+    )
+    url = await api.start(args.host, args.port)
+    print(f"Фейковый Bot API: {url} (Ctrl+C — остановить и показать запросы)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        for (method, status), count in sorted(api.recorder.summary().items()):
+            print(f"{method:<24}{status:>5}{count:>8}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
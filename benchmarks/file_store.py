@@ -0,0 +1,105 @@
+"""
+Проверка и бенчмарк хранилища загрузок (bot/services/file_store.py)
+
+Скачивает файлы из фейкового Bot API в хранилище во временном каталоге:
+дубликаты должны сохраняться один раз, лимиты размера и квоты — срабатывать,
+а пиковое потребление памяти (tracemalloc) — не зависеть от размера файла.
+При нарушении печатает ошибки и завершается с кодом 1.
+
+    python -m benchmarks.file_store --size-mb 8 --files 20
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+os.environ.setdefault('BOT_TOKEN', '123:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+
+from aiogram import Bot  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from bot.services.file_store import FileStore, FileTooLarge, QuotaExceeded  # noqa: E402
+
+MB = 1024 * 1024
+
+
+async def run(size_mb: int, files: int, chunk_size: int) -> List[str]:
+    errors: List[str] = []
+
+    def expect(condition: bool, message: str) -> None:
+        if not condition:
+            errors.append(message)
+
+    size = size_mb * MB
+    # Половина файлов — копии первого: их хранилище не должно записывать заново
+    contents = [os.urandom(size) for _ in range(files // 2 + 1)]
+    uploads = [contents[0] if i % 2 else contents[i // 2 + 1] for i in range(files - 1)] + [contents[0]]
+    unique = {hashlib.sha256(content).hexdigest() for content in uploads}
+
+    with tempfile.TemporaryDirectory() as root:
+        store = FileStore(root, max_file_size=size, quota=size * len(unique), chunk_size=chunk_size)
+        async with FakeBotAPI() as api:
+            bot = Bot('123:benchmark', session=api.session())
+            try:
+                file_ids = [api.add_file(content)['file_id'] for content in uploads]
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                stored = [await store.save_telegram_file(bot, file_id) for file_id in file_ids]
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                created = sum(item.created for item in stored)
+                expect(created == len(unique), f"записано {created} файлов, уникальных {len(unique)}")
+                expect({item.sha256 for item in stored} == unique, "хеши не совпадают с содержимым")
+                used = await store.used()
+                expect(used == size * len(unique), f"занято {used} байт, ожидалось {size * len(unique)}")
+                expect(not os.listdir(os.path.join(root, 'tmp')), "остались временные файлы")
+                # Поток кусками: пик памяти на порядок меньше файла
+                expect(peak < max(size // 4, 4 * MB), f"пик памяти {peak / MB:.1f} МБ при файле {size_mb} МБ")
+
+                print(f"файлов: {len(uploads)} по {size_mb} МБ, уникальных: {len(unique)}")
+                print(f"время: {elapsed:.2f} с, {len(uploads) * size / MB / elapsed:.0f} МБ/с")
+                print(f"пик памяти Python: {peak / MB:.2f} МБ, на диске: {used / MB:.0f} МБ")
+
+                try:
+                    await store.save_telegram_file(bot, api.add_file(os.urandom(size + 1))['file_id'])
+                    errors.append("файл больше лимита сохранен")
+                except FileTooLarge:
+                    pass
+                try:
+                    await store.save_telegram_file(bot, api.add_file(os.urandom(size))['file_id'])
+                    errors.append("квота не сработала")
+                except QuotaExceeded:
+                    pass
+                expect(not os.listdir(os.path.join(root, 'tmp')), "после отказа остались временные файлы")
+
+                expect(await store.delete(stored[0].sha256), "delete не удалил файл")
+                expect(await store.used() == size * (len(unique) - 1), "delete не вернул место в квоту")
+            finally:
+                await bot.session.close()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=8, help="размер одного файла, МБ")
+    parser.add_argument('--files', type=int, default=10, help="число загрузок")
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    errors = asyncio.run(run(args.size_mb, max(args.files, 2), args.chunk_size))
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Бенчмарк списков: полные ORM-строки, отложенные тексты и проекции
+
+Описания проектов и заказов (Text без ограничения) раздуваются до
+--description-kb. Для каждого списка (проекты в админке, мои покупки, мои
+заказы, заказы по статусу) сравниваются три варианта:
+- полные строки — ORM-объекты вместе с длинными текстами (как до deferred());
+- ORM — те же функции crud сейчас, тексты отложены (TEXT_GROUP);
+- проекция — crud.*_rows, только выводимые колонки в записях с __slots__.
+Печатает медиану времени и пик памяти (tracemalloc) на вызов. Проверяет, что
+списки ORM не грузят отложенные тексты, проекции совпадают с ORM по id и
+расходуют меньше памяти, чем полные строки; иначе код выхода 1.
+
+    python -m benchmarks.list_projections --description-kb 64 --rows 200
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Tuple
+
+os.environ.setdefault('BOT_TOKEN', '0:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import selectinload, undefer_group  # noqa: E402
+
+from bot.database import crud  # noqa: E402
+from bot.database.engine import Base, build_engine  # noqa: E402
+from bot.database.models import (  # noqa: E402
+    Category, Order, Project, Purchase, User, OrderStatus, ProjectType, ProjectLevel, TEXT_GROUP
+)
+
+USER_ID = 1
+
+ListCall = Callable[[AsyncSession], Awaitable[List[Any]]]
+
+
+class Scenario(NamedTuple):
+    """Список и три способа его получить"""
+    name: str
+    full: ListCall
+    orm: ListCall
+    rows: ListCall
+    # Отложенная колонка, которой не должно быть у ORM-объектов списка
+    deferred: Tuple[str, str]
+
+
+async def _scalars(session: AsyncSession, query) -> List[Any]:
+    return list((await session.execute(query)).scalars().all())
+
+
+SCENARIOS = [
+    Scenario(
+        "проекты (админка)",
+        lambda s: _scalars(s, select(Project).where(Project.is_active == True)  # noqa: E712
+                           .options(selectinload(Project.category), undefer_group(TEXT_GROUP)).limit(50)),
+        lambda s: crud.get_all_projects(s, limit=50),
+        lambda s: crud.get_project_rows(s, limit=50),
+        ('', 'description'),
+    ),
+    Scenario(
+        "мои покупки",
+        lambda s: _scalars(s, select(Purchase).where(Purchase.user_id == USER_ID)
+                           .options(selectinload(Purchase.project).undefer_group(TEXT_GROUP))
+                           .order_by(Purchase.created_at.desc())),
+        lambda s: crud.get_user_purchases(s, USER_ID),
+        lambda s: crud.get_user_purchase_rows(s, USER_ID),
+        ('project', 'description'),
+    ),
+    Scenario(
+        "мои заказы",
+        lambda s: _scalars(s, select(Order).where(Order.user_id == USER_ID)
+                           .options(undefer_group(TEXT_GROUP)).order_by(Order.created_at.desc())),
+        lambda s: crud.get_user_orders(s, USER_ID),
+        lambda s: crud.get_user_order_rows(s, USER_ID),
+        ('', 'description'),
+    ),
+    Scenario(
+        "заказы по статусу",
+        lambda s: _scalars(s, select(Order).where(Order.status == OrderStatus.NEW)
+                           .options(selectinload(Order.user), undefer_group(TEXT_GROUP))
+                           .order_by(Order.created_at.desc())),
+        lambda s: crud.get_orders_by_status(s, OrderStatus.NEW),
+        lambda s: crud.get_order_rows_by_status(s, OrderStatus.NEW),
+        ('', 'description'),
+    ),
+]
+
+
+async def seed(session_maker: async_sessionmaker, rows: int, description_kb: int) -> None:
+    """Один пользователь: rows проектов, купленных им, и rows его заказов с длинными описаниями"""
+    text = ("Подробное описание " * (description_kb * 1024 // 38 + 1))[:description_kb * 1024]
+    async with session_maker() as session:
+        await session.execute(insert(User), [{'id': USER_ID, 'telegram_id': 100_000, 'first_name': "User"}])
+        await session.execute(insert(Category), [{'id': 1, 'name': "Категория"}])
+        await session.execute(insert(Project), [
+            {
+                'title': f"Проект {i}", 'description': text, 'category_id': 1,
+                'project_type': list(ProjectType)[i % len(ProjectType)],
+                'level': list(ProjectLevel)[i % len(ProjectLevel)],
+                'technologies': "Python", 'programming_languages': "Python", 'price': 1000.0 + i,
+            }
+            for i in range(rows)
+        ])
+        await session.execute(insert(Purchase), [
+            {'user_id': USER_ID, 'project_id': i + 1, 'price': 1000.0 + i} for i in range(rows)
+        ])
+        await session.execute(insert(Order), [
+            {
+                'user_id': USER_ID, 'project_type': ProjectType.PROJECT, 'status': OrderStatus.NEW,
+                'description': text, 'technologies': text, 'admin_comment': text,
+            }
+            for _ in range(rows)
+        ])
+        await session.commit()
+
+
+async def measure(session_maker: async_sessionmaker, call: ListCall, repeat: int) -> Tuple[List[Any], float, int]:
+    """Результат, медиана времени (мс) и пик памяти (байт) вызова в новой сессии"""
+    timings = []
+    for _ in range(repeat):
+        async with session_maker() as session:
+            start = time.perf_counter()
+            await call(session)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    async with session_maker() as session:
+        tracemalloc.start()
+        result = await call(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, statistics.median(timings), peak
+
+
+async def run(rows: int, description_kb: int, repeat: int) -> List[str]:
+    errors: List[str] = []
+    directory = tempfile.mkdtemp(prefix='projections-')
+    engine = build_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}", echo=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await seed(session_maker, rows, description_kb)
+
+        print(f"Строк: {rows}, описание: {description_kb} КБ\n")
+        print(f"{'список':<20} {'вариант':<14} {'строк':>6} {'p50, мс':>9} {'пик, КБ':>10}")
+        for scenario in SCENARIOS:
+            results: Dict[str, Tuple[List[Any], float, int]] = {}
+            for variant in ('full', 'orm', 'rows'):
+                results[variant] = await measure(session_maker, getattr(scenario, variant), repeat)
+                result, p50, peak = results[variant]
+                label = {'full': "полные строки", 'orm': "ORM", 'rows': "проекция"}[variant]
+                print(f"{scenario.name:<20} {label:<14} {len(result):>6} {p50:>9.2f} {peak / 1024:>10.0f}")
+
+            relation, column = scenario.deferred
+            for obj in results['orm'][0]:
+                target = getattr(obj, relation) if relation else obj
+                if column in target.__dict__:
+                    errors.append(f"{scenario.name}: ORM-список загрузил отложенную колонку {column}")
+                    break
+            if [obj.id for obj in results['orm'][0]] != [row.id for row in results['rows'][0]]:
+                errors.append(f"{scenario.name}: проекция вернула другие строки, чем ORM")
+            if results['rows'][2] >= results['full'][2]:
+                errors.append(f"{scenario.name}: проекция расходует не меньше памяти, чем полные строки")
+    finally:
+        await engine.dispose()
+        shutil.rmtree(directory, ignore_errors=True)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200, help="строк в каждом списке")
+    parser.add_argument('--description-kb', type=int, default=64, help="размер длинных текстов, КБ")
+    parser.add_argument('--repeat', type=int, default=20, help="повторов для медианы времени")
+    args = parser.parse_args()
+
+    errors = asyncio.run(run(args.rows, args.description_kb, args.repeat))
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Проверка и бенчмарк упаковки файлов в ZIP на лету (bot/services/packaging.py)
+
+Через фейковый Bot API и хранилище во временном каталоге:
+- архив: один sendDocument, внутри все файлы с исходным содержимым,
+  .jpg без сжатия, текст — deflate, одинаковые имена переименованы;
+- кеш: тот же набор (в другом порядке) уходит по file_id без сборки,
+  параллельные отправки нового набора загружают его один раз, протухший
+  file_id сбрасывается и архив загружается заново;
+- память и event loop: пик tracemalloc при упаковке files x size-mb не
+  растет с размером файлов, а задержка event loop остается маленькой.
+При нарушении печатает ошибки и завершается с кодом 1.
+
+    python -m benchmarks.packaging --size-mb 8 --files 4
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from typing import List
+
+os.environ.setdefault('BOT_TOKEN', '123:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+# Хранилище загрузок (file_store) — во временном каталоге
+os.environ['UPLOADS_DIR'] = tempfile.mkdtemp(prefix='packaging-')
+
+from aiogram import Bot  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from bot.database import crud  # noqa: E402
+from bot.database.engine import Base, build_engine  # noqa: E402
+from bot.services.file_store import file_store  # noqa: E402
+from bot.services.packaging import PackagingError, archive_entries, content_hash, send_archive  # noqa: E402
+
+MB = 1024 * 1024
+
+
+async def _stored(content: bytes, name: str) -> dict:
+    path = os.path.join(os.environ['UPLOADS_DIR'], os.path.basename(name))
+    with open(path, 'wb') as f:
+        f.write(content)
+    stored = await file_store.save_path(path)
+    os.remove(path)
+    return {'media_type': 'document', 'name': name, 'sha256': stored.sha256, 'size': stored.size}
+
+
+async def check_archive(session_maker: async_sessionmaker, session: AsyncSession, errors: List[str]) -> None:
+    contents = {
+        'report.txt': "Отчет по проекту\n".encode() * 20_000,
+        'photo.jpg': os.urandom(300_000),
+        'src/main.py': b"print('hello')\n" * 1000,
+        'main.py': b"# another main\n" * 10,
+    }
+    files = [await _stored(content, name) for name, content in contents.items()]
+
+    async with FakeBotAPI() as api:
+        bot = Bot('123:benchmark', session=api.session())
+        try:
+            await send_archive(bot, session, 7, files, "result.zip", caption="Архив")
+            uploaded = next(iter(api.files.values()), b'')
+            # Тот же набор в другом порядке — по file_id
+            await send_archive(bot, session, 8, list(reversed(files)), "result.zip")
+
+            # Новый набор параллельно из трех обработчиков (у каждого своя сессия) — одна загрузка
+            extra = files + [await _stored(b"extra", 'extra.txt')]
+
+            async def handler() -> None:
+                async with session_maker() as own_session:
+                    await send_archive(bot, own_session, 9, extra, "extra.zip")
+            await asyncio.gather(*(handler() for _ in range(3)))
+
+            # Протухший file_id: архив загружается заново и кеш обновляется
+            key = content_hash(archive_entries(files))
+            stale = await crud.get_archive_file_id(session, key)
+            api.rejected_file_ids.add(stale)
+            await send_archive(bot, session, 10, files, "result.zip")
+            fresh = await crud.get_archive_file_id(session, key)
+
+            try:
+                await send_archive(bot, session, 11, files + [{'name': 'lost.bin', 'sha256': '0' * 64}], "x.zip")
+                errors.append("файл без копии в хранилище не вызвал PackagingError")
+            except PackagingError:
+                pass
+        finally:
+            await bot.session.close()
+
+    uploads = sum(1 for call in api.recorder.calls
+                  if call.method == 'sendDocument' and call.status == 200 and not isinstance(call.params.get('document'), str))
+    print(f"archive: загрузок {uploads}, sendDocument {api.recorder.count('sendDocument')}, архив {len(uploaded)} байт")
+    if uploads != 3:
+        errors.append(f"ожидалось 3 загрузки (первая, новый набор, после протухшего file_id), было {uploads}")
+    if not fresh or fresh == stale:
+        errors.append("file_id архива не обновился после отказа Telegram")
+
+    with zipfile.ZipFile(io.BytesIO(uploaded)) as archive:
+        names = {info.filename: info for info in archive.infolist()}
+        expected = {'main.py', 'main (2).py', 'photo.jpg', 'report.txt'}
+        if set(names) != expected:
+            errors.append(f"в архиве {sorted(names)}, ожидалось {sorted(expected)}")
+        digests = {hashlib.sha256(archive.read(name)).hexdigest() for name in names}
+        if digests != {file['sha256'] for file in files}:
+            errors.append("содержимое архива не совпадает с файлами")
+        if names.get('photo.jpg') and names['photo.jpg'].compress_type != zipfile.ZIP_STORED:
+            errors.append("photo.jpg сжат, хотя должен лежать как есть")
+        if names.get('report.txt') and names['report.txt'].compress_type != zipfile.ZIP_DEFLATED:
+            errors.append("report.txt не сжат")
+
+
+async def check_streaming(session: AsyncSession, size_mb: int, count: int, errors: List[str]) -> None:
+    files = [await _stored(os.urandom(size_mb * MB), f"part_{i}.bin") for i in range(count)]
+    total = size_mb * MB * count
+
+    lag = 0.0
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal lag
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            start = loop.time()
+            await asyncio.sleep(0.01)
+            lag = max(lag, loop.time() - start - 0.01)
+
+    async with FakeBotAPI(keep_files=False) as api:
+        bot = Bot('123:benchmark', session=api.session())
+        try:
+            tracemalloc.start()
+            watcher = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            message = await send_archive(bot, session, 12, files, "big.zip")
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await watcher
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            await bot.session.close()
+
+    print(
+        f"streaming: {count} x {size_mb} МБ за {elapsed:.2f} с ({total / MB / elapsed:.0f} МБ/с), "
+        f"архив {message.document.file_size / MB:.1f} МБ, пик памяти {peak / MB:.1f} МБ, "
+        f"задержка event loop до {lag * 1000:.0f} мс"
+    )
+    if message.document.file_size < total:
+        errors.append(f"архив {message.document.file_size} байт меньше исходных {total} байт")
+    if peak > max(total // 4, 4 * MB):
+        errors.append(f"пик памяти {peak / MB:.1f} МБ — архив, похоже, собирается в памяти")
+    if lag > 0.2:
+        errors.append(f"event loop блокировался на {lag * 1000:.0f} мс")
+
+
+async def run(size_mb: int, count: int) -> List[str]:
+    errors: List[str] = []
+    engine = build_engine(f"sqlite+aiosqlite:///{os.path.join(os.environ['UPLOADS_DIR'], 'bench.db')}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            await check_archive(session_maker, session, errors)
+            await check_streaming(session, size_mb, count, errors)
+    finally:
+        await engine.dispose()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=8, help="размер одного файла, МБ")
+    parser.add_argument('--files', type=int, default=4, help="число файлов в архиве")
+    args = parser.parse_args()
+
+    try:
+        errors = asyncio.run(run(args.size_mb, args.files))
+    finally:
+        shutil.rmtree(os.environ['UPLOADS_DIR'], ignore_errors=True)
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
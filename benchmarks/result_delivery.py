@@ -0,0 +1,128 @@
+"""
+Проверка отправки результатов заказов и лимитера исходящих сообщений
+
+Через фейковый Bot API:
+- limiter: 12 сообщений в один чат параллельно — с OutboundRateLimiter ни
+  одного 429 и время около (12 - запас) / rate, без него — 429;
+- delivery: 20 документов и 3 фото уходят тремя sendMediaGroup, альбом с
+  битым file_id переотправляется по одному файлу, битый файл — в failed,
+  файлы без file_id загружаются с диска и получают file_id;
+- retry: при подмешанных 429 все сообщения доходят за счет повторов.
+При нарушении печатает ошибки и завершается с кодом 1.
+
+    python -m benchmarks.result_delivery
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+os.environ.setdefault('BOT_TOKEN', '123:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+
+from aiogram import Bot  # noqa: E402
+from aiogram.exceptions import TelegramRetryAfter  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from bot.middlewares.outbound import OutboundRateLimiter  # noqa: E402
+from bot.services.delivery import send_files  # noqa: E402
+
+
+def _bot(api: FakeBotAPI, limiter: OutboundRateLimiter = None) -> Bot:
+    bot = Bot('123:benchmark', session=api.session())
+    if limiter:
+        bot.session.middleware(limiter)
+    return bot
+
+
+async def check_limiter(errors: List[str]) -> None:
+    for limited in (True, False):
+        async with FakeBotAPI(chat_rate=5.0, chat_burst=3) as api:
+            # Лимитер чуть ниже лимита сервера: задержки сети сжимают интервалы между запросами
+            bot = _bot(api, OutboundRateLimiter(chat_rate=4.5, chat_burst=3) if limited else None)
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(bot.send_message(1, f"сообщение {i}") for i in range(12)), return_exceptions=True
+            )
+            elapsed = time.perf_counter() - start
+            await bot.session.close()
+        rejected = api.recorder.count('sendMessage', status=429)
+        failed = sum(isinstance(result, TelegramRetryAfter) for result in results)
+        print(f"limiter={'да' if limited else 'нет'}: 429 от сервера {rejected}, ошибок {failed}, {elapsed:.2f} с")
+        if limited:
+            if rejected or failed:
+                errors.append(f"с лимитером сервер вернул {rejected} ответов 429")
+            if not 1.8 <= elapsed <= 3.0:
+                errors.append(f"с лимитером 12 сообщений ушли за {elapsed:.2f} с, ожидалось около 2 с")
+        elif not rejected:
+            errors.append("без лимитера фейковый сервер не вернул 429 — проверка ничего не доказывает")
+
+
+async def check_delivery(errors: List[str]) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        async with FakeBotAPI() as api:
+            bot = _bot(api, OutboundRateLimiter(chat_rate=100.0, chat_burst=30))
+            files = []
+            for i in range(20):
+                if i < 5:
+                    # Файл только на диске: загрузится в альбоме, file_id запишется в словарь
+                    path = os.path.join(root, f"result_{i}.zip")
+                    with open(path, 'wb') as f:
+                        f.write(os.urandom(100))
+                    files.append({'media_type': 'document', 'file_id': None, 'name': f"result_{i}.zip", 'path': path})
+                else:
+                    files.append({'media_type': 'document', 'file_id': api.add_file(b"r" * 10)['file_id'], 'name': f"r{i}"})
+            files += [{'media_type': 'photo', 'file_id': api.add_file(b"p")['file_id'], 'name': f"p{i}"} for i in range(3)]
+            api.rejected_file_ids.add(files[15]['file_id'])
+
+            report = await send_files(bot, 5, files, caption="Результаты")
+            await bot.session.close()
+
+        groups = api.recorder.count('sendMediaGroup')
+        singles = api.recorder.count('sendDocument')
+        print(
+            f"delivery: отправлено {len(report.sent)}, не отправлено {len(report.failed)}, "
+            f"запросов {report.requests} (sendMediaGroup {groups}, sendDocument {singles})"
+        )
+        if len(report.sent) != 22 or [file['name'] for file in report.failed] != ['r15']:
+            errors.append(f"отправлено {len(report.sent)}, не отправлены {[f['name'] for f in report.failed]}")
+        if groups != 2 or api.recorder.count('sendMediaGroup', status=400) != 1 or singles != 9:
+            errors.append(f"ожидалось 2 альбома + 1 отклоненный и 9 одиночных, было {groups} и {singles}")
+        if any(not file['file_id'] for file in files[:5]):
+            errors.append("file_id загруженных с диска файлов не сохранены")
+        first = json.loads(api.recorder.calls[0].params['media'])
+        if first[0].get('caption') != "Результаты" or any('caption' in item for item in first[1:]):
+            errors.append("подпись не попала в первый альбом")
+
+
+async def check_retry(errors: List[str]) -> None:
+    async with FakeBotAPI(flood_rate=0.3, retry_after=1, seed=3) as api:
+        bot = _bot(api, OutboundRateLimiter(chat_rate=100.0, chat_burst=30, max_retries=10))
+        results = await asyncio.gather(*(bot.send_message(2, str(i)) for i in range(10)), return_exceptions=True)
+        await bot.session.close()
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"retry: 429 от сервера {api.recorder.count('sendMessage', status=429)}, не доставлено {failed}")
+    if failed:
+        errors.append(f"после повторов не доставлено {failed} сообщений")
+
+
+async def run() -> List[str]:
+    errors: List[str] = []
+    await check_limiter(errors)
+    await check_delivery(errors)
+    await check_retry(errors)
+    return errors
+
+
+def main():
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Бенчмарк очереди апдейтов: пропускная способность при смешанном трафике
+
+Запуск: python -m benchmarks.scheduler
+"""
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY, EventContext
+from aiogram.types import Chat
+
+from bot.middlewares.scheduler import UpdateSchedulerMiddleware
+
+
+USERS = 500
+HEAVY_USERS = 20           # Пользователи, которые "долбят" кнопки сериями
+HEAVY_BURST = 15
+HANDLER_LATENCY = (0.001, 0.005)
+
+
+def build_traffic(seed: int = 42) -> List[Tuple[int, int]]:
+    """Сгенерировать поток апдейтов (chat_id, порядковый номер в чате)"""
+    rnd = random.Random(seed)
+    traffic = []
+    counters: Dict[int, int] = {}
+    
+    for chat_id in range(1, USERS + 1):
+        burst = HEAVY_BURST if chat_id <= HEAVY_USERS else rnd.randint(1, 3)
+        for _ in range(burst):
+            traffic.append(chat_id)
+    
+    rnd.shuffle(traffic)
+    result = []
+    for chat_id in traffic:
+        seq = counters.get(chat_id, 0)
+        counters[chat_id] = seq + 1
+        result.append((chat_id, seq))
+    return result
+
+
+async def run(mode: str, traffic: List[Tuple[int, int]], seed: int = 7) -> Dict[str, Any]:
+    """Прогнать трафик в одном из режимов: concurrent, serial, lanes"""
+    rnd = random.Random(seed)
+    latencies = [rnd.uniform(*HANDLER_LATENCY) for _ in traffic]
+    
+    last_seen: Dict[int, int] = {}
+    in_flight: Dict[int, int] = {}
+    violations = 0
+    
+    async def handler(event: Any, data: Dict[str, Any]) -> None:
+        nonlocal violations
+        chat_id, seq, latency = event
+        if in_flight.get(chat_id) or last_seen.get(chat_id, -1) != seq - 1:
+            violations += 1
+        in_flight[chat_id] = in_flight.get(chat_id, 0) + 1
+        await asyncio.sleep(latency)
+        in_flight[chat_id] -= 1
+        last_seen[chat_id] = max(last_seen.get(chat_id, -1), seq)
+    
+    scheduler = UpdateSchedulerMiddleware(max_pending=HEAVY_BURST * 2)
+    global_lock = asyncio.Lock()
+    
+    async def process(event: Tuple[int, int, float]) -> None:
+        data = {EVENT_CONTEXT_KEY: EventContext(chat=Chat(id=event[0], type="private"))}
+        if mode == "lanes":
+            await scheduler(handler, event, data)
+        elif mode == "serial":
+            async with global_lock:
+                await handler(event, data)
+        else:
+            await handler(event, data)
+    
+    start = time.perf_counter()
+    # Как в polling с handle_as_tasks=True: по задаче на каждый апдейт
+    await asyncio.gather(*(
+        process((chat_id, seq, latency))
+        for (chat_id, seq), latency in zip(traffic, latencies)
+    ))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "mode": mode,
+        "updates": len(traffic),
+        "elapsed": elapsed,
+        "rps": len(traffic) / elapsed,
+        "violations": violations,
+        "lanes_left": len(scheduler.lanes),
+    }
+
+
+async def main():
+    traffic = build_traffic()
+    print(f"Апдейтов: {len(traffic)}, пользователей: {USERS}, из них активных: {HEAVY_USERS}\n")
+    print(f"{'режим':<12}{'время, с':>10}{'апдейт/с':>12}{'нарушений порядка':>20}")
+    for mode in ("concurrent", "serial", "lanes"):
+        result = await run(mode, traffic)
+        print(
+            f"{result['mode']:<12}{result['elapsed']:>10.2f}{result['rps']:>12.0f}"
+            f"{result['violations']:>20}"
+        )
+        assert result["lanes_left"] == 0
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
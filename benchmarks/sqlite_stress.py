@@ -0,0 +1,122 @@
+"""
+Стресс-тест конкурентной записи в SQLite
+
+Сравнивает исходную конфигурацию (журнал rollback, без очереди записи)
+с профилем бота: WAL + прагмы + единственный писатель с пакетной фиксацией.
+Считает ошибки "database is locked" и сверяет итоговые счетчики.
+
+    python -m benchmarks.sqlite_stress --workers 50 --updates 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+
+os.environ.setdefault('BOT_TOKEN', '0:benchmark')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.database import crud  # noqa: E402
+from bot.database.engine import Base, build_engine  # noqa: E402
+from bot.database.models import Project, Purchase  # noqa: E402
+from bot.database.writer import write_queue  # noqa: E402
+from benchmarks.crud_backends import PROJECTS, USERS, seed  # noqa: E402
+
+
+async def update_mix(session: AsyncSession, rnd: random.Random, counters: Dict[str, int]) -> None:
+    """Один апдейт: просмотр карточки, корзина, иногда покупка"""
+    user = await crud.get_user_by_telegram_id(session, 100_000 + rnd.randrange(USERS))
+    project_id = rnd.randint(1, PROJECTS)
+    await crud.get_project_by_id(session, project_id)
+    await crud.increment_project_views(session, project_id)
+    counters['views'] += 1
+    await crud.add_to_cart(session, user.id, project_id)
+    if rnd.random() < 0.3:
+        await crud.create_purchase(session, user_id=user.id, project_id=project_id, price=1.0)
+        counters['purchases'] += 1
+        await crud.clear_cart(session, user.id)
+
+
+async def stress(engine: AsyncEngine, workers: int, updates: int, use_writer: bool) -> Dict[str, float]:
+    """Прогнать workers параллельных пользователей по updates апдейтов"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(session_maker)
+
+    if use_writer:
+        write_queue.session_maker = session_maker
+        write_queue.start()
+
+    counters = {'views': 0, 'purchases': 0, 'locked': 0, 'errors': 0}
+
+    async def worker(worker_id: int):
+        rnd = random.Random(worker_id)
+        for _ in range(updates):
+            try:
+                async with session_maker() as session:
+                    await update_mix(session, rnd, counters)
+            except OperationalError as e:
+                counters['locked' if 'locked' in str(e) else 'errors'] += 1
+            except Exception:
+                counters['errors'] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    if use_writer:
+        await write_queue.stop()
+
+    async with session_maker() as session:
+        views = await session.scalar(select(func.sum(Project.views_count)))
+        purchases_count = await session.scalar(select(func.sum(Project.purchases_count)))
+        purchases = await session.scalar(select(func.count(Purchase.id)))
+    await engine.dispose()
+
+    return {
+        'updates_per_sec': workers * updates / elapsed,
+        'locked': counters['locked'],
+        'errors': counters['errors'],
+        'views_ok': views == counters['views'],
+        'purchases_ok': purchases == purchases_count == counters['purchases'],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--updates', type=int, default=40)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'baseline.db')}"
+        results['baseline'] = await stress(
+            create_async_engine(baseline_url), args.workers, args.updates, use_writer=False
+        )
+        profile_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'profile.db')}"
+        results['wal+writer'] = await stress(
+            build_engine(profile_url, echo=False), args.workers, args.updates, use_writer=True
+        )
+
+    print(f"Пользователей: {args.workers}, апдейтов на пользователя: {args.updates}\n")
+    print(f"{'профиль':<12}{'апд/с':>8}{'locked':>8}{'ошибок':>8}{'счетчики':>10}")
+    for name, r in results.items():
+        counters_ok = 'ok' if r['views_ok'] and r['purchases_ok'] else 'FAIL'
+        print(f"{name:<12}{r['updates_per_sec']:>8.0f}{r['locked']:>8}{r['errors']:>8}{counters_ok:>10}")
+
+    profile = results['wal+writer']
+    if profile['locked'] or profile['errors'] or not (profile['views_ok'] and profile['purchases_ok']):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
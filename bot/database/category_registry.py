@@ -0,0 +1,78 @@
+"""
+Реестр категорий в памяти процесса
+
+Категории меняются несколько раз в год, а нужны мастеру добавления проекта,
+списку категорий, статистике и карточке проекта (название категории).
+Реестр загружает их одним запросом (только колонки, без ORM-объектов) и
+отдает из памяти, пока не сменится версия: crud.create_category и
+crud.delete_category поднимают ее, и следующий читатель загружает реестр
+заново. TTL — страховка для нескольких процессов бота, где изменение в
+одном процессе другой не видит.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from .models import Category
+
+
+class CategoryInfo:
+    """Категория в реестре"""
+    __slots__ = ('id', 'name', 'description', 'icon')
+
+    def __init__(self, id: int, name: str, description: Optional[str], icon: Optional[str]):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.icon = icon
+
+
+class CategoryRegistry:
+    """Категории по id с загрузкой по смене версии"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version = -1
+        self._expires = 0.0
+        self._categories: Tuple[CategoryInfo, ...] = ()
+        self._by_id: Dict[int, CategoryInfo] = {}
+        self.loads = 0
+
+    def bump(self) -> None:
+        """Категории изменились: следующий читатель загрузит их заново"""
+        self.version += 1
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_version == self.version and self._expires > time.monotonic()
+
+    async def all(self, session: AsyncSession) -> Tuple[CategoryInfo, ...]:
+        """Все категории в порядке id"""
+        if self.fresh:
+            return self._categories
+
+        version = self.version
+        result = await session.execute(
+            select(Category.id, Category.name, Category.description, Category.icon).order_by(Category.id)
+        )
+        categories = tuple(CategoryInfo(*row) for row in result)
+        self.loads += 1
+        # Версию подняли, пока шел запрос: результат мог устареть — не запоминаем
+        if version == self.version:
+            self._categories = categories
+            self._by_id = {category.id: category for category in categories}
+            self._loaded_version = version
+            self._expires = time.monotonic() + self.ttl
+        return categories
+
+    async def get(self, session: AsyncSession, category_id: int) -> Optional[CategoryInfo]:
+        """Категория по id или None"""
+        categories = self._by_id if self.fresh else {category.id: category for category in await self.all(session)}
+        return categories.get(category_id)
+
+
+category_registry = CategoryRegistry(settings.category_cache_ttl)
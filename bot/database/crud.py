@@ -1,16 +1,76 @@
 """
 CRUD операции для работы с базой данных
 """
-from typing import Optional, List
-from sqlalchemy import select, func, and_, or_
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, List, Sequence
+from sqlalchemy import select, insert, update, delete, func, and_, or_, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer_group
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from .models import (
     User, Admin, Category, Project, Order, Purchase, 
-    Cart, SupportTicket, Broadcast, Review,
-    OrderStatus, ProjectType, TicketStatus, UserRole
+    Cart, SupportTicket, Broadcast, Review, Attachment, Archive,
+    OrderStatus, ProjectType, TicketStatus, UserRole, AttachmentKind, TEXT_GROUP
 )
+from .engine import Base
+from .category_registry import CategoryInfo, category_registry
+from .rows import OrderRow, ProjectRow, PurchaseRow
+from .writer import write_queue, WriteJob
+
+
+# ============== ЗАПИСЬ ==============
+
+async def _write(session: AsyncSession, job: WriteJob) -> Any:
+    """Выполнить запись: через очередь писателя (SQLite) или в сессии обработчика"""
+    if write_queue.running:
+        result = await write_queue.submit(job)
+        if isinstance(result, Base):
+            # Объект из сессии писателя переносим в сессию обработчика
+            result = await session.merge(result, load=False)
+        return result
+    result = await job(session)
+    await session.commit()
+    return result
+
+
+async def _insert(session: AsyncSession, model: type, **values) -> Any:
+    """Создать запись и вернуть объект с загруженными полями"""
+    async def job(s: AsyncSession):
+        obj = model(**values)
+        s.add(obj)
+        await s.flush()
+        await _refresh(s, obj)
+        return obj
+    return await _write(session, job)
+
+
+async def _update(session: AsyncSession, obj: Any, **values) -> Any:
+    """Обновить поля объекта (копия в сессии обработчика обновляется через merge)"""
+    model, pk = type(obj), obj.id
+
+    async def job(s: AsyncSession):
+        target = await s.get(model, pk)
+        for key, value in values.items():
+            setattr(target, key, value)
+        await s.flush()
+        await _refresh(s, target)
+        return target
+
+    return await _write(session, job)
+
+
+async def _refresh(s: AsyncSession, obj: Any) -> None:
+    """Перечитать объект вместе с отложенными колонками (refresh без имен их не грузит)"""
+    await s.refresh(obj, [attr.key for attr in inspect(type(obj)).column_attrs])
+
+
+def _bump_loaded(session: AsyncSession, model: type, pk: int, field: str, delta: int = 1) -> None:
+    """Поправить счетчик у уже загруженного в сессию объекта (без пометки "изменен")"""
+    obj = session.identity_map.get(identity_key(model, pk))
+    if obj is not None:
+        set_committed_value(obj, field, getattr(obj, field) + delta)
 
 
 # ============== USER ==============
@@ -25,20 +85,12 @@ async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> Op
 
 async def create_user(session: AsyncSession, telegram_id: int, **kwargs) -> User:
     """Создать нового пользователя"""
-    user = User(telegram_id=telegram_id, **kwargs)
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await _insert(session, User, telegram_id=telegram_id, **kwargs)
 
 
 async def update_user(session: AsyncSession, user: User, **kwargs) -> User:
     """Обновить данные пользователя"""
-    for key, value in kwargs.items():
-        setattr(user, key, value)
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await _update(session, user, **kwargs)
 
 
 async def get_all_users(session: AsyncSession, is_blocked: Optional[bool] = None) -> List[User]:
@@ -76,19 +128,31 @@ async def get_admin(session: AsyncSession, telegram_id: int) -> Optional[Admin]:
 
 async def create_admin(session: AsyncSession, telegram_id: int, role: UserRole) -> Admin:
     """Создать администратора"""
-    admin = Admin(telegram_id=telegram_id, role=role)
-    session.add(admin)
-    await session.commit()
-    await session.refresh(admin)
-    return admin
+    return await _insert(session, Admin, telegram_id=telegram_id, role=role)
+
+
+# ============== ИЗМЕНЕНИЯ КАТАЛОГА ==============
+
+# Подписчики (кеши каталога) получают id измененного проекта или None — изменилось все
+CatalogListener = Callable[[Optional[int]], None]
+_catalog_listeners: List[CatalogListener] = []
+
+
+def on_catalog_change(listener: CatalogListener) -> None:
+    """Подписаться на изменения проектов и категорий"""
+    _catalog_listeners.append(listener)
+
+
+def _catalog_changed(project_id: Optional[int] = None) -> None:
+    for listener in _catalog_listeners:
+        listener(project_id)
 
 
 # ============== CATEGORY ==============
 
-async def get_all_categories(session: AsyncSession) -> List[Category]:
-    """Получить все категории"""
-    result = await session.execute(select(Category))
-    return list(result.scalars().all())
+async def get_all_categories(session: AsyncSession) -> List[CategoryInfo]:
+    """Получить все категории (из реестра в памяти)"""
+    return list(await category_registry.all(session))
 
 
 async def get_category_by_id(session: AsyncSession, category_id: int) -> Optional[Category]:
@@ -101,21 +165,24 @@ async def get_category_by_id(session: AsyncSession, category_id: int) -> Optiona
 
 async def create_category(session: AsyncSession, name: str, **kwargs) -> Category:
     """Создать категорию"""
-    category = Category(name=name, **kwargs)
-    session.add(category)
-    await session.commit()
-    await session.refresh(category)
+    category = await _insert(session, Category, name=name, **kwargs)
+    category_registry.bump()
     return category
 
 
 async def delete_category(session: AsyncSession, category_id: int) -> bool:
     """Удалить категорию"""
-    category = await get_category_by_id(session, category_id)
-    if category:
-        await session.delete(category)
-        await session.commit()
-        return True
-    return False
+    async def job(s: AsyncSession) -> bool:
+        category = await get_category_by_id(s, category_id)
+        if category:
+            await s.delete(category)
+            return True
+        return False
+    deleted = await _write(session, job)
+    if deleted:
+        category_registry.bump()
+        _catalog_changed()
+    return deleted
 
 
 # ============== PROJECT ==============
@@ -136,13 +203,35 @@ async def get_all_projects(
     if project_type:
         query = query.where(Project.project_type == project_type)
     
-    query = query.options(selectinload(Project.category))
     query = query.limit(limit).offset(offset)
     
     result = await session.execute(query)
     return list(result.scalars().all())
 
 
+async def get_project_rows(
+    session: AsyncSession,
+    is_active: bool = True,
+    category_id: Optional[int] = None,
+    project_type: Optional[ProjectType] = None,
+    limit: int = 10,
+    offset: int = 0
+) -> List[ProjectRow]:
+    """Проекты для списка: только выводимые колонки (фильтры как в get_all_projects)"""
+    query = select(
+        Project.id, Project.title, Project.price, Project.discount_price,
+        Project.views_count, Project.purchases_count,
+    ).where(Project.is_active == is_active)
+    
+    if category_id:
+        query = query.where(Project.category_id == category_id)
+    if project_type:
+        query = query.where(Project.project_type == project_type)
+    
+    result = await session.execute(query.limit(limit).offset(offset))
+    return [ProjectRow(*row) for row in result]
+
+
 async def get_projects_count(
     session: AsyncSession,
     is_active: bool = True,
@@ -166,45 +255,50 @@ async def get_project_by_id(session: AsyncSession, project_id: int) -> Optional[
     result = await session.execute(
         select(Project)
         .where(Project.id == project_id)
-        .options(selectinload(Project.category))
+        .options(undefer_group(TEXT_GROUP))
     )
     return result.scalar_one_or_none()
 
 
 async def create_project(session: AsyncSession, **kwargs) -> Project:
     """Создать проект"""
-    project = Project(**kwargs)
-    session.add(project)
-    await session.commit()
-    await session.refresh(project)
+    project = await _insert(session, Project, **kwargs)
+    _catalog_changed(project.id)
     return project
 
 
 async def update_project(session: AsyncSession, project: Project, **kwargs) -> Project:
     """Обновить проект"""
-    for key, value in kwargs.items():
-        setattr(project, key, value)
-    await session.commit()
-    await session.refresh(project)
+    project = await _update(session, project, **kwargs)
+    _catalog_changed(project.id)
     return project
 
 
 async def delete_project(session: AsyncSession, project_id: int) -> bool:
     """Удалить проект"""
-    project = await get_project_by_id(session, project_id)
-    if project:
-        await session.delete(project)
-        await session.commit()
-        return True
-    return False
+    async def job(s: AsyncSession) -> bool:
+        project = await get_project_by_id(s, project_id)
+        if project:
+            await s.delete(project)
+            return True
+        return False
+    deleted = await _write(session, job)
+    if deleted:
+        _catalog_changed(project_id)
+    return deleted
 
 
 async def increment_project_views(session: AsyncSession, project_id: int):
     """Увеличить счетчик просмотров проекта"""
-    project = await get_project_by_id(session, project_id)
-    if project:
-        project.views_count += 1
-        await session.commit()
+    async def job(s: AsyncSession):
+        await s.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(views_count=Project.views_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+    await _write(session, job)
+    _bump_loaded(session, Project, project_id, 'views_count')
 
 
 # ============== CART ==============
@@ -221,62 +315,66 @@ async def get_user_cart(session: AsyncSession, user_id: int) -> List[Cart]:
 
 async def add_to_cart(session: AsyncSession, user_id: int, project_id: int) -> Cart:
     """Добавить проект в корзину"""
-    # Проверяем, нет ли уже этого проекта в корзине
-    result = await session.execute(
-        select(Cart).where(
-            and_(Cart.user_id == user_id, Cart.project_id == project_id)
+    async def job(s: AsyncSession) -> Cart:
+        # Проверяем, нет ли уже этого проекта в корзине
+        result = await s.execute(
+            select(Cart).where(
+                and_(Cart.user_id == user_id, Cart.project_id == project_id)
+            )
         )
-    )
-    existing = result.scalar_one_or_none()
-    
-    if existing:
-        return existing
-    
-    cart_item = Cart(user_id=user_id, project_id=project_id)
-    session.add(cart_item)
-    await session.commit()
-    await session.refresh(cart_item)
-    return cart_item
+        existing = result.scalar_one_or_none()
+        
+        if existing:
+            return existing
+        
+        cart_item = Cart(user_id=user_id, project_id=project_id)
+        s.add(cart_item)
+        await s.flush()
+        await s.refresh(cart_item)
+        return cart_item
+    return await _write(session, job)
 
 
 async def remove_from_cart(session: AsyncSession, user_id: int, project_id: int) -> bool:
     """Удалить проект из корзины"""
-    result = await session.execute(
-        select(Cart).where(
-            and_(Cart.user_id == user_id, Cart.project_id == project_id)
+    async def job(s: AsyncSession) -> bool:
+        result = await s.execute(
+            delete(Cart)
+            .where(and_(Cart.user_id == user_id, Cart.project_id == project_id))
+            .execution_options(synchronize_session=False)
         )
-    )
-    cart_item = result.scalar_one_or_none()
-    
-    if cart_item:
-        await session.delete(cart_item)
-        await session.commit()
-        return True
-    return False
+        return result.rowcount > 0
+    return await _write(session, job)
 
 
 async def clear_cart(session: AsyncSession, user_id: int):
     """Очистить корзину"""
-    result = await session.execute(
-        select(Cart).where(Cart.user_id == user_id)
-    )
-    cart_items = result.scalars().all()
-    
-    for item in cart_items:
-        await session.delete(item)
-    
-    await session.commit()
+    async def job(s: AsyncSession):
+        await s.execute(
+            delete(Cart)
+            .where(Cart.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+    await _write(session, job)
 
 
 # ============== ORDER ==============
 
-async def create_order(session: AsyncSession, user_id: int, **kwargs) -> Order:
-    """Создать заказ"""
-    order = Order(user_id=user_id, **kwargs)
-    session.add(order)
-    await session.commit()
-    await session.refresh(order)
-    return order
+async def create_order(
+    session: AsyncSession, user_id: int, attachments: Sequence[Dict[str, Any]] = (), **kwargs
+) -> Order:
+    """Создать заказ (вместе с файлами клиента — в одной транзакции)"""
+    if not attachments:
+        return await _insert(session, Order, user_id=user_id, **kwargs)
+
+    async def job(s: AsyncSession) -> Order:
+        order = Order(user_id=user_id, **kwargs)
+        s.add(order)
+        await s.flush()
+        await s.execute(insert(Attachment), _attachment_rows(order.id, AttachmentKind.CLIENT, attachments))
+        await _refresh(s, order)
+        return order
+    return await _write(session, job)
 
 
 async def get_order_by_id(session: AsyncSession, order_id: int) -> Optional[Order]:
@@ -284,7 +382,7 @@ async def get_order_by_id(session: AsyncSession, order_id: int) -> Optional[Orde
     result = await session.execute(
         select(Order)
         .where(Order.id == order_id)
-        .options(selectinload(Order.user))
+        .options(selectinload(Order.user), undefer_group(TEXT_GROUP))
     )
     return result.scalar_one_or_none()
 
@@ -299,6 +397,21 @@ async def get_user_orders(session: AsyncSession, user_id: int) -> List[Order]:
     return list(result.scalars().all())
 
 
+_ORDER_ROW_COLUMNS = (
+    Order.id, Order.project_type, Order.status, Order.created_at, Order.updated_at, Order.completed_at,
+)
+
+
+async def get_user_order_rows(session: AsyncSession, user_id: int) -> List[OrderRow]:
+    """Заказы пользователя для списка, новые первыми (без описаний)"""
+    result = await session.execute(
+        select(*_ORDER_ROW_COLUMNS)
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc())
+    )
+    return [OrderRow(*row) for row in result]
+
+
 async def get_orders_by_status(session: AsyncSession, status: OrderStatus) -> List[Order]:
     """Получить заказы по статусу"""
     result = await session.execute(
@@ -310,6 +423,27 @@ async def get_orders_by_status(session: AsyncSession, status: OrderStatus) -> Li
     return list(result.scalars().all())
 
 
+async def get_order_rows_by_status(
+    session: AsyncSession, status: OrderStatus, limit: Optional[int] = None
+) -> List[OrderRow]:
+    """Заказы по статусу для списка админа: с именем клиента, без описаний"""
+    query = (
+        select(*_ORDER_ROW_COLUMNS, User.first_name, User.username)
+        .join(User, User.id == Order.user_id)
+        .where(Order.status == status)
+        .order_by(Order.created_at.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    result = await session.execute(query)
+    return [OrderRow(*row) for row in result]
+
+
+async def update_order(session: AsyncSession, order: Order, **kwargs) -> Order:
+    """Обновить заказ"""
+    return await _update(session, order, **kwargs)
+
+
 async def update_order_status(
     session: AsyncSession, 
     order_id: int, 
@@ -317,14 +451,160 @@ async def update_order_status(
     **kwargs
 ) -> Optional[Order]:
     """Обновить статус заказа"""
-    order = await get_order_by_id(session, order_id)
-    if order:
-        order.status = status
-        for key, value in kwargs.items():
-            setattr(order, key, value)
-        await session.commit()
-        await session.refresh(order)
-    return order
+    async def job(s: AsyncSession) -> Optional[Order]:
+        order = await get_order_by_id(s, order_id)
+        if order:
+            order.status = status
+            for key, value in kwargs.items():
+                setattr(order, key, value)
+            await s.flush()
+            await _refresh(s, order)
+        return order
+    return await _write(session, job)
+
+
+async def transition_order_status(
+    session: AsyncSession,
+    order_id: int,
+    source: OrderStatus,
+    target: OrderStatus,
+    **kwargs
+) -> bool:
+    """
+    Перевести заказ из source в target одним UPDATE ... WHERE status = source.
+    False — статус уже изменили (второй админ, повторное нажатие) или заказа нет.
+    """
+    values = {'status': target, **kwargs}
+
+    async def job(s: AsyncSession) -> bool:
+        result = await s.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == source)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    changed = await _write(session, job)
+    if changed:
+        # Заказ, уже загруженный в сессию обработчика, показывает новый статус
+        order = session.identity_map.get(identity_key(Order, order_id))
+        if order is not None:
+            for key, value in values.items():
+                set_committed_value(order, key, value)
+    return changed
+
+
+# ============== ATTACHMENT ==============
+
+# Поля файла (services/order_files.py) -> колонки Attachment
+_ATTACHMENT_FIELDS = ('media_type', 'file_id', 'name', 'size', 'mime', 'sha256', 'path')
+
+
+def _attachment_rows(order_id: int, kind: AttachmentKind, files: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return [
+        {'order_id': order_id, 'kind': kind, 'created_at': now, **{key: file.get(key) for key in _ATTACHMENT_FIELDS}}
+        for file in files
+    ]
+
+
+async def add_attachments(
+    session: AsyncSession, order_id: int, kind: AttachmentKind, files: Sequence[Dict[str, Any]]
+) -> int:
+    """Добавить файлы к заказу одним INSERT (без чтения уже прикрепленных)"""
+    if not files:
+        return 0
+
+    async def job(s: AsyncSession) -> int:
+        await s.execute(insert(Attachment), _attachment_rows(order_id, kind, files))
+        return len(files)
+    return await _write(session, job)
+
+
+async def get_order_attachments(
+    session: AsyncSession, order_id: int, kind: Optional[AttachmentKind] = None
+) -> List[Attachment]:
+    """Файлы заказа в порядке добавления"""
+    return (await get_attachments_for_orders(session, [order_id], kind)).get(order_id, [])
+
+
+async def get_attachments_for_orders(
+    session: AsyncSession, order_ids: Sequence[int], kind: Optional[AttachmentKind] = None
+) -> Dict[int, List[Attachment]]:
+    """Файлы сразу нескольких заказов одним запросом: {order_id: [файлы]}"""
+    if not order_ids:
+        return {}
+    query = select(Attachment).where(Attachment.order_id.in_(order_ids))
+    if kind is not None:
+        query = query.where(Attachment.kind == kind)
+    result = await session.execute(query.order_by(Attachment.order_id, Attachment.id))
+    grouped: Dict[int, List[Attachment]] = {}
+    for attachment in result.scalars():
+        grouped.setdefault(attachment.order_id, []).append(attachment)
+    return grouped
+
+
+async def count_attachments_for_orders(
+    session: AsyncSession, order_ids: Sequence[int]
+) -> Dict[int, Dict[AttachmentKind, int]]:
+    """Число файлов по назначению для нескольких заказов: {order_id: {kind: count}}"""
+    if not order_ids:
+        return {}
+    result = await session.execute(
+        select(Attachment.order_id, Attachment.kind, func.count(Attachment.id))
+        .where(Attachment.order_id.in_(order_ids))
+        .group_by(Attachment.order_id, Attachment.kind)
+    )
+    counts: Dict[int, Dict[AttachmentKind, int]] = {}
+    for order_id, kind, count in result:
+        counts.setdefault(order_id, {})[kind] = count
+    return counts
+
+
+async def set_attachment_file_ids(session: AsyncSession, file_ids: Dict[int, str]) -> None:
+    """Сохранить file_id загруженных файлов одним executemany: {attachment_id: file_id}"""
+    if not file_ids:
+        return
+
+    async def job(s: AsyncSession) -> None:
+        await s.execute(
+            update(Attachment),
+            [{'id': attachment_id, 'file_id': file_id} for attachment_id, file_id in file_ids.items()]
+        )
+    await _write(session, job)
+
+
+async def get_user_storage_usage(session: AsyncSession, user_id: int) -> int:
+    """Объем файлов всех заказов пользователя, байт"""
+    result = await session.execute(
+        select(func.coalesce(func.sum(Attachment.size), 0))
+        .join(Order, Order.id == Attachment.order_id)
+        .where(Order.user_id == user_id)
+    )
+    return result.scalar_one()
+
+
+# ============== ARCHIVE ==============
+
+async def get_archive_file_id(session: AsyncSession, content_hash: str) -> Optional[str]:
+    """file_id уже загруженного архива с таким набором файлов"""
+    result = await session.execute(select(Archive.file_id).where(Archive.content_hash == content_hash))
+    return result.scalar_one_or_none()
+
+
+async def save_archive(session: AsyncSession, content_hash: str, file_id: str, name: str, size: Optional[int]) -> None:
+    """Запомнить file_id архива (повторная загрузка того же набора перезаписывает)"""
+    async def job(s: AsyncSession) -> None:
+        await s.merge(Archive(content_hash=content_hash, file_id=file_id, name=name, size=size))
+    await _write(session, job)
+
+
+async def delete_archive(session: AsyncSession, content_hash: str) -> None:
+    """Забыть архив, file_id которого Telegram больше не принимает"""
+    async def job(s: AsyncSession) -> None:
+        await s.execute(delete(Archive).where(Archive.content_hash == content_hash))
+    await _write(session, job)
 
 
 # ============== PURCHASE ==============
@@ -337,21 +617,31 @@ async def create_purchase(
     **kwargs
 ) -> Purchase:
     """Создать покупку"""
-    purchase = Purchase(
-        user_id=user_id,
-        project_id=project_id,
-        price=price,
-        **kwargs
-    )
-    session.add(purchase)
-    
-    # Увеличиваем счетчик покупок проекта
-    project = await get_project_by_id(session, project_id)
-    if project:
-        project.purchases_count += 1
+    async def job(s: AsyncSession) -> Purchase:
+        purchase = Purchase(
+            user_id=user_id,
+            project_id=project_id,
+            price=price,
+            **kwargs
+        )
+        s.add(purchase)
+        
+        # Увеличиваем счетчик покупок проекта
+        await s.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(purchases_count=Project.purchases_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        
+        await s.flush()
+        await s.refresh(purchase)
+        return purchase
     
-    await session.commit()
-    await session.refresh(purchase)
+    purchase = await _write(session, job)
+    _bump_loaded(session, Project, project_id, 'purchases_count')
+    # Счетчик покупок виден в карточке и в списке каталога
+    _catalog_changed(project_id)
     return purchase
 
 
@@ -366,6 +656,17 @@ async def get_user_purchases(session: AsyncSession, user_id: int) -> List[Purcha
     return list(result.scalars().all())
 
 
+async def get_user_purchase_rows(session: AsyncSession, user_id: int) -> List[PurchaseRow]:
+    """Покупки пользователя для списка: название проекта без его описания"""
+    result = await session.execute(
+        select(Purchase.id, Purchase.project_id, Project.title, Purchase.price, Purchase.created_at)
+        .join(Project, Project.id == Purchase.project_id)
+        .where(Purchase.user_id == user_id)
+        .order_by(Purchase.created_at.desc())
+    )
+    return [PurchaseRow(*row) for row in result]
+
+
 async def has_user_purchased_project(
     session: AsyncSession,
     user_id: int,
@@ -373,11 +674,11 @@ async def has_user_purchased_project(
 ) -> bool:
     """Проверить, купил ли пользователь проект"""
     result = await session.execute(
-        select(Purchase).where(
+        select(Purchase.id).where(
             and_(Purchase.user_id == user_id, Purchase.project_id == project_id)
-        )
+        ).limit(1)
     )
-    return result.scalar_one_or_none() is not None
+    return result.scalar() is not None
 
 
 # ============== SUPPORT TICKET ==============
@@ -389,11 +690,7 @@ async def create_support_ticket(
     message: str
 ) -> SupportTicket:
     """Создать тикет поддержки"""
-    ticket = SupportTicket(user_id=user_id, subject=subject, message=message)
-    session.add(ticket)
-    await session.commit()
-    await session.refresh(ticket)
-    return ticket
+    return await _insert(session, SupportTicket, user_id=user_id, subject=subject, message=message)
 
 
 async def get_user_tickets(session: AsyncSession, user_id: int) -> List[SupportTicket]:
@@ -425,13 +722,16 @@ async def create_broadcast(
     target_audience: str = "all"
 ) -> Broadcast:
     """Создать рассылку"""
-    broadcast = Broadcast(
+    return await _insert(
+        session,
+        Broadcast,
         admin_id=admin_id,
         message=message,
         target_audience=target_audience
     )
-    session.add(broadcast)
-    await session.commit()
-    await session.refresh(broadcast)
-    return broadcast
+
+
+async def update_broadcast(session: AsyncSession, broadcast: Broadcast, **kwargs) -> Broadcast:
+    """Обновить рассылку (статистику отправки)"""
+    return await _update(session, broadcast, **kwargs)
 
@@ -1,9 +1,22 @@
 """
 Настройка подключения к базе данных
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import settings
+from .instrumentation import instrument_engine
+
+
+# Миграции Alembic лежат в корне проекта
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# Ревизия, соответствующая схеме до появления миграций (create_all)
+BASELINE_REVISION = '0001'
 
 
 class Base(DeclarativeBase):
@@ -11,12 +24,65 @@ class Base(DeclarativeBase):
     pass
 
 
+def normalize_database_url(database_url: str) -> str:
+    """Привести URL PostgreSQL (postgres://, postgresql://) к асинхронному драйверу asyncpg"""
+    for prefix in ('postgres://', 'postgresql://'):
+        if database_url.startswith(prefix):
+            return 'postgresql+asyncpg://' + database_url[len(prefix):]
+    return database_url
+
+
+def is_postgres(database_url: str) -> bool:
+    """Используется ли PostgreSQL"""
+    return make_url(normalize_database_url(database_url)).get_backend_name() == 'postgresql'
+
+
+def is_sqlite(database_url: str) -> bool:
+    """Используется ли SQLite"""
+    return make_url(database_url).get_backend_name() == 'sqlite'
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Профиль SQLite для конкурентной нагрузки: WAL, мягкий fsync, ожидание блокировки, кеш и mmap"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.close()
+
+
+def build_engine(database_url: str, **kwargs: Any) -> AsyncEngine:
+    """Создать асинхронный движок с настройками пула под конкретную СУБД"""
+    database_url = normalize_database_url(database_url)
+    options: Dict[str, Any] = {'echo': settings.db_echo, 'future': True}
+
+    if is_postgres(database_url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            connect_args={
+                # Кеш подготовленных выражений asyncpg на каждое соединение
+                'prepared_statement_cache_size': settings.db_statement_cache_size,
+            },
+        )
+
+    options.update(kwargs)
+    db_engine = create_async_engine(database_url, **options)
+
+    if is_sqlite(database_url):
+        event.listen(db_engine.sync_engine, 'connect', _apply_sqlite_pragmas)
+    instrument_engine(db_engine)
+
+    return db_engine
+
+
 # Создаем асинхронный движок
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True
-)
+engine = build_engine(settings.database_url)
 
 # Создаем фабрику сессий
 async_session_maker = async_sessionmaker(
@@ -26,14 +92,44 @@ async_session_maker = async_sessionmaker(
 )
 
 
-async def init_db():
-    """Инициализация базы данных (создание таблиц)"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def _run_migrations(connection) -> None:
+    """Применить миграции Alembic на уже открытом соединении"""
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_cfg = Config(str(PROJECT_ROOT / 'alembic.ini'))
+    alembic_cfg.set_main_option('script_location', str(PROJECT_ROOT / 'migrations'))
+    alembic_cfg.attributes['connection'] = connection
+
+    tables = inspect(connection).get_table_names()
+    if 'users' in tables and 'alembic_version' not in tables:
+        # База создана через create_all до миграций — помечаем ее базовой ревизией
+        command.stamp(alembic_cfg, BASELINE_REVISION)
+    command.upgrade(alembic_cfg, 'head')
+
+
+async def init_db(db_engine: AsyncEngine = engine):
+    """Инициализация базы данных (миграции Alembic до последней ревизии)"""
+    async with db_engine.begin() as conn:
+        await conn.run_sync(_run_migrations)
+
+
+async def warm_up_pool(db_engine: AsyncEngine = engine):
+    """Прогрев пула: заранее открыть pool_size соединений, чтобы первые апдейты не ждали подключения"""
+    size = db_engine.pool.size() if hasattr(db_engine.pool, 'size') else 1
+
+    async def open_connection():
+        conn = await db_engine.connect()
+        await conn.execute(text('SELECT 1'))
+        return conn
+
+    # Держим все соединения открытыми одновременно, иначе пул будет отдавать одно и то же
+    connections = await asyncio.gather(*(open_connection() for _ in range(size)))
+    for conn in connections:
+        await conn.close()
 
 
 async def get_session() -> AsyncSession:
     """Получение сессии базы данных"""
     async with async_session_maker() as session:
         yield session
-
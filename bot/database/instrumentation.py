@@ -0,0 +1,87 @@
+"""
+Инструментирование SQL: число запросов, время в БД и повторы запросов на апдейт
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Запросы, выполненные в рамках одного апдейта"""
+    __slots__ = ('count', 'total', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        # текст запроса -> сколько раз выполнен (параметры не учитываются)
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        """Учесть выполненный запрос"""
+        self.count += 1
+        self.total += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Запросы, выполненные threshold и более раз — признак N+1"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.items()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считать запросы текущей задачи (апдейта) в новый QueryStats"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def shorten_statement(statement: str, limit: int = 200) -> str:
+    """Запрос в одну строку, обрезанный для логов"""
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, '_query_started_at', None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.sql_slow_query_ms:
+        logger.warning("Медленный запрос (%.1f мс): %s", elapsed * 1000, shorten_statement(statement))
+
+
+def instrument_engine(db_engine: AsyncEngine) -> None:
+    """Подключить замер запросов к движку"""
+    sync_engine = db_engine.sync_engine
+    if event.contains(sync_engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
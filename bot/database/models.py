@@ -3,12 +3,17 @@
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, Float, DateTime, Text, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import String, Integer, BigInteger, Float, DateTime, Text, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from enum import Enum
 from .engine import Base
 
 
+# Длинные тексты (описания, комментарии) откладываются: списки их не грузят,
+# карточки догружают одним запросом через undefer_group(TEXT_GROUP) в crud
+TEXT_GROUP = 'text'
+
+
 class UserRole(str, Enum):
     """Роли пользователей"""
     USER = "user"
@@ -50,6 +55,12 @@ class TicketStatus(str, Enum):
     CLOSED = "closed"
 
 
+class AttachmentKind(str, Enum):
+    """Назначение файла заказа"""
+    CLIENT = "client"  # вложения клиента (ТЗ, методички)
+    RESULT = "result"  # результаты работы
+
+
 # ============== МОДЕЛИ ===============
 
 class User(Base):
@@ -57,7 +68,7 @@ class User(Base):
     __tablename__ = 'users'
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    telegram_id: Mapped[int] = mapped_column(Integer, unique=True, nullable=False, index=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
     username: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     first_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     last_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -89,7 +100,7 @@ class Admin(Base):
     __tablename__ = 'admins'
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    telegram_id: Mapped[int] = mapped_column(Integer, unique=True, nullable=False, index=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
     role: Mapped[UserRole] = mapped_column(SQLEnum(UserRole), default=UserRole.ADMIN)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -117,10 +128,15 @@ class Category(Base):
 class Project(Base):
     """Готовые проекты в каталоге"""
     __tablename__ = 'projects'
+    __table_args__ = (
+        # Каталог: фильтр по активности, типу и категории (get_all_projects, get_project_rows, get_projects_count)
+        Index('ix_projects_active_type_category', 'is_active', 'project_type', 'category_id'),
+        Index('ix_projects_active_category', 'is_active', 'category_id'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
-    description: Mapped[str] = mapped_column(Text, nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_group=TEXT_GROUP)
     
     # Классификация
     category_id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id'), nullable=False)
@@ -135,8 +151,11 @@ class Project(Base):
     price: Mapped[float] = mapped_column(Float, nullable=False)
     discount_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     
-    # Файлы
+    # Файлы: file_id — файл уже в Telegram (отправка без загрузки),
+    # file_path — локальный файл до первой загрузки
     file_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    file_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     image_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     demo_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     
@@ -163,32 +182,33 @@ class Project(Base):
 class Order(Base):
     """Индивидуальные заказы"""
     __tablename__ = 'orders'
+    __table_args__ = (
+        # "Мои заказы" и списки по статусу сразу в порядке created_at DESC
+        Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_orders_status_created_at', 'status', 'created_at'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
     
     # Детали заказа
     project_type: Mapped[ProjectType] = mapped_column(SQLEnum(ProjectType), nullable=False)
-    description: Mapped[str] = mapped_column(Text, nullable=False)
-    technologies: Mapped[str] = mapped_column(Text, nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_group=TEXT_GROUP)
+    technologies: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_group=TEXT_GROUP)
     deadline: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     budget: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
     # Контактные данные
     contact_info: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
-    # Файлы
-    files_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON массив путей
-    result_files_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON массив путей
-    
     # Статус и цена
     status: Mapped[OrderStatus] = mapped_column(SQLEnum(OrderStatus), default=OrderStatus.NEW)
     price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     is_paid: Mapped[bool] = mapped_column(Boolean, default=False)
     
     # Комментарии администратора
-    admin_comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    rejection_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    admin_comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group=TEXT_GROUP)
+    rejection_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group=TEXT_GROUP)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -196,14 +216,71 @@ class Order(Base):
     
     # Связи
     user: Mapped["User"] = relationship(back_populates="orders")
+    attachments: Mapped[list["Attachment"]] = relationship(
+        back_populates="order", cascade="all, delete-orphan", passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<Order #{self.id} - {self.status}>"
 
 
+class Attachment(Base):
+    """Файлы индивидуальных заказов"""
+    __tablename__ = 'attachments'
+    __table_args__ = (
+        # Файлы заказа (и сразу нескольких заказов) нужного назначения
+        Index('ix_attachments_order_id_kind', 'order_id', 'kind'),
+        # Ссылки на файл хранилища (дубликаты, удаление)
+        Index('ix_attachments_sha256', 'sha256'),
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    kind: Mapped[AttachmentKind] = mapped_column(SQLEnum(AttachmentKind), nullable=False)
+    
+    # Файл в Telegram: document, photo или video (от этого зависит метод отправки)
+    media_type: Mapped[str] = mapped_column(String(16), default='document')
+    file_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    mime: Mapped[Optional[str]] = mapped_column(String(127), nullable=True)
+    
+    # Копия в хранилище загрузок (services/file_store.py)
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    # Связи
+    order: Mapped["Order"] = relationship(back_populates="attachments")
+    
+    def __repr__(self):
+        return f"<Attachment #{self.id} - Order:{self.order_id} {self.kind}>"
+
+
+class Archive(Base):
+    """Загруженные в Telegram ZIP-архивы (services/packaging.py)"""
+    __tablename__ = 'archives'
+    
+    # SHA-256 набора файлов: имена в архиве и хеши содержимого
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Archive {self.content_hash[:12]} - {self.name}>"
+
+
 class Purchase(Base):
     """Покупки готовых проектов"""
     __tablename__ = 'purchases'
+    __table_args__ = (
+        # "Мои покупки" и has_user_purchased_project
+        Index('ix_purchases_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_purchases_user_id_project_id', 'user_id', 'project_id'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
@@ -226,6 +303,10 @@ class Purchase(Base):
 class Cart(Base):
     """Корзина покупок"""
     __tablename__ = 'cart'
+    __table_args__ = (
+        # get_user_cart, add_to_cart, remove_from_cart, clear_cart
+        Index('ix_cart_user_id_project_id', 'user_id', 'project_id'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
@@ -244,6 +325,9 @@ class Cart(Base):
 class SupportTicket(Base):
     """Тикеты поддержки"""
     __tablename__ = 'support_tickets'
+    __table_args__ = (
+        Index('ix_support_tickets_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
@@ -270,7 +354,7 @@ class Broadcast(Base):
     __tablename__ = 'broadcasts'
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    admin_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    admin_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     
     message: Mapped[str] = mapped_column(Text, nullable=False)
     target_audience: Mapped[str] = mapped_column(String(100), default="all")  # all, active, buyers, non_buyers
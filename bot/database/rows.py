@@ -0,0 +1,55 @@
+"""
+Легкие записи для списков
+
+Списки (проекты в админке, покупки, заказы) печатают название, цену, статус
+и пару счетчиков. crud.*_rows выбирают только эти колонки и отдают записи
+с __slots__ вместо ORM-объектов: без длинных текстов, identity map и
+отслеживания изменений.
+"""
+from datetime import datetime
+from typing import Optional
+
+from .models import OrderStatus, ProjectType
+
+
+class ProjectRow:
+    """Проект в списке"""
+    __slots__ = ('id', 'title', 'price', 'discount_price', 'views_count', 'purchases_count')
+
+    def __init__(self, id: int, title: str, price: float, discount_price: Optional[float],
+                 views_count: int, purchases_count: int):
+        self.id = id
+        self.title = title
+        self.price = price
+        self.discount_price = discount_price
+        self.views_count = views_count
+        self.purchases_count = purchases_count
+
+
+class PurchaseRow:
+    """Покупка в списке: цена покупки и название проекта"""
+    __slots__ = ('id', 'project_id', 'title', 'price', 'created_at')
+
+    def __init__(self, id: int, project_id: int, title: str, price: float, created_at: datetime):
+        self.id = id
+        self.project_id = project_id
+        self.title = title
+        self.price = price
+        self.created_at = created_at
+
+
+class OrderRow:
+    """Заказ в списке (first_name и username — только в списках для админа)"""
+    __slots__ = ('id', 'project_type', 'status', 'created_at', 'updated_at', 'completed_at', 'first_name', 'username')
+
+    def __init__(self, id: int, project_type: ProjectType, status: OrderStatus, created_at: datetime,
+                 updated_at: datetime, completed_at: Optional[datetime],
+                 first_name: Optional[str] = None, username: Optional[str] = None):
+        self.id = id
+        self.project_type = project_type
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.completed_at = completed_at
+        self.first_name = first_name
+        self.username = username
@@ -0,0 +1,106 @@
+"""
+Очередь записи для SQLite: единственный писатель с пакетной фиксацией
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from .engine import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueue:
+    """
+    Очередь записей в БД с одним писателем.
+
+    SQLite допускает только одну пишущую транзакцию: вместо того чтобы
+    соединения ждали друг друга в busy-handler, все записи выполняет одна
+    задача. Накопившиеся записи фиксируются одной транзакцией; если одна из
+    них падает, пакет повторяется по одной записи. Чтение идет параллельно
+    через обычные сессии обработчиков.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, max_batch: int = 64):
+        self.session_maker = session_maker
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Запущен ли писатель"""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запустить задачу писателя в текущем event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дописать очередь и остановить писателя"""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, job: WriteJob) -> Any:
+        """
+        Поставить запись в очередь и дождаться фиксации.
+
+        job получает сессию писателя и не должен вызывать commit().
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((job, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._execute(batch)
+            except Exception as e:  # Писатель не должен падать
+                logger.exception("Ошибка очереди записи: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, batch: List[Tuple[WriteJob, asyncio.Future]]) -> None:
+        results = []
+        try:
+            async with self.session_maker() as session:
+                for job, _ in batch:
+                    results.append(await job(session))
+                await session.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                future = batch[0][1]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Ошибка одной записи не должна откатывать остальные
+            for item in batch:
+                await self._execute([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# Писатель запускается в main.py только для SQLite
+write_queue = WriteQueue(async_session_maker, settings.sqlite_write_batch)
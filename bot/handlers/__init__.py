@@ -1,7 +1,7 @@
 """
 Обработчики команд и callback'ов
 """
-from . import user, admin, catalog, cart, orders, profile, support
+from . import user, admin, catalog, cart, orders, profile, support, legacy
 
-__all__ = ['user', 'admin', 'catalog', 'cart', 'orders', 'profile', 'support']
+__all__ = ['user', 'admin', 'catalog', 'cart', 'orders', 'profile', 'support', 'legacy']
 
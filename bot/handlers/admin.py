@@ -1,22 +1,39 @@
 """
 Обработчики админ-панели
 """
-from aiogram import Router, F
+import logging
+from typing import List, Optional
+
+from aiohttp import ClientError
+from aiogram import F
+from aiogram.exceptions import TelegramAPIError
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
 from bot.database import crud
-from bot.database.models import OrderStatus, ProjectType, ProjectLevel, UserRole
+from bot.database.models import AttachmentKind, OrderStatus, ProjectType, ProjectLevel, UserRole
 from bot.keyboards import admin as kb_admin
 from bot.keyboards import user as kb_user
+from bot.keyboards.callbacks import (
+    AdminProject, AdminProjectEdit, ToggleProjectActive, DeleteProject,
+    NewProjectCategory, NewProjectType, NewProjectLevel,
+    AdminCategory, DeleteCategory, AdminOrderAction, BroadcastAudience
+)
 from bot.states.order import (
     AdminProjectStates, AdminOrderStates, AdminBroadcastStates, AdminCategoryStates
 )
+from bot.services import delivery, order_files
+from bot.services.catalog_snapshot import catalog_store
+from bot.services.file_store import FileStoreError, file_store
 from bot.utils.helpers import format_price, format_datetime, get_order_status_text
+from bot.utils.routing import CallbackRouter
+from config import settings
+
+logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 # Middleware для проверки прав админа
@@ -66,11 +83,10 @@ async def callback_admin_stats(callback: CallbackQuery, session: AsyncSession):
     blocked_users = len([u for u in all_users if u.is_blocked])
     
     # Проекты
-    projects = await crud.get_all_projects(session, is_active=True, limit=10000)
-    total_projects = len(projects)
+    total_projects = (await catalog_store.get()).count()
     
     # Заказы
-    new_orders = await crud.get_orders_by_status(session, OrderStatus.NEW)
+    new_orders = await crud.get_order_rows_by_status(session, OrderStatus.NEW)
     
     # Категории
     categories = await crud.get_all_categories(session)
@@ -105,8 +121,7 @@ async def callback_admin_catalog(callback: CallbackQuery, session: AsyncSession)
         return
     
     # Получаем статистику
-    projects = await crud.get_all_projects(session, is_active=True, limit=1000)
-    total_projects = len(projects)
+    total_projects = (await catalog_store.get()).count()
     
     await callback.message.edit_text(
         "╔═══════════════════════╗\n"
@@ -137,7 +152,7 @@ async def callback_admin_list_projects(callback: CallbackQuery, session: AsyncSe
     if not await check_admin(callback, session):
         return
     
-    projects = await crud.get_all_projects(session, is_active=True, limit=50)
+    projects = await crud.get_project_rows(session, is_active=True, limit=50)
     
     if not projects:
         await callback.message.edit_text(
@@ -164,7 +179,7 @@ async def callback_admin_list_projects(callback: CallbackQuery, session: AsyncSe
         
         builder.row(InlineKeyboardButton(
             text=f"✏️ {i}. {project.title[:30]}...",
-            callback_data=f"admin_edit_proj_{project.id}"
+            callback_data=AdminProject(project_id=project.id).pack()
         ))
     
     if len(projects) > 20:
@@ -180,13 +195,17 @@ async def callback_admin_list_projects(callback: CallbackQuery, session: AsyncSe
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_edit_proj_"))
-async def callback_admin_edit_project_menu(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(AdminProject.filter())
+async def callback_admin_edit_project_menu(callback: CallbackQuery, session: AsyncSession, callback_data: AdminProject):
     """Меню редактирования проекта"""
     if not await check_admin(callback, session):
         return
     
-    project_id = int(callback.data.split("_")[-1])
+    await show_edit_project_menu(callback, session, callback_data.project_id)
+
+
+async def show_edit_project_menu(callback: CallbackQuery, session: AsyncSession, project_id: int):
+    """Меню редактирования проекта (и после изменения поля)"""
     project = await crud.get_project_by_id(session, project_id)
     
     if not project:
@@ -196,16 +215,17 @@ async def callback_admin_edit_project_menu(callback: CallbackQuery, session: Asy
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     
-    builder.row(InlineKeyboardButton(text="✏️ Название", callback_data=f"edit_title_{project_id}"))
-    builder.row(InlineKeyboardButton(text="📄 Описание", callback_data=f"edit_desc_{project_id}"))
-    builder.row(InlineKeyboardButton(text="💰 Цена", callback_data=f"edit_price_{project_id}"))
-    builder.row(InlineKeyboardButton(text="💻 Языки", callback_data=f"edit_langs_{project_id}"))
-    builder.row(InlineKeyboardButton(text="🔧 Технологии", callback_data=f"edit_tech_{project_id}"))
+    builder.row(InlineKeyboardButton(text="✏️ Название", callback_data=AdminProjectEdit(project_id=project_id, field="title").pack()))
+    builder.row(InlineKeyboardButton(text="📄 Описание", callback_data=AdminProjectEdit(project_id=project_id, field="description").pack()))
+    builder.row(InlineKeyboardButton(text="💰 Цена", callback_data=AdminProjectEdit(project_id=project_id, field="price").pack()))
+    builder.row(InlineKeyboardButton(text="💻 Языки", callback_data=AdminProjectEdit(project_id=project_id, field="programming_languages").pack()))
+    builder.row(InlineKeyboardButton(text="🔧 Технологии", callback_data=AdminProjectEdit(project_id=project_id, field="technologies").pack()))
+    builder.row(InlineKeyboardButton(text="📎 Файл проекта", callback_data=AdminProjectEdit(project_id=project_id, field="file_id").pack()))
     builder.row(InlineKeyboardButton(
         text=f"{'🔴 Деактивировать' if project.is_active else '🟢 Активировать'}",
-        callback_data=f"toggle_active_{project_id}"
+        callback_data=ToggleProjectActive(project_id=project_id).pack()
     ))
-    builder.row(InlineKeyboardButton(text="🗑 Удалить проект", callback_data=f"delete_proj_{project_id}"))
+    builder.row(InlineKeyboardButton(text="🗑 Удалить проект", callback_data=DeleteProject(project_id=project_id).pack()))
     builder.row(InlineKeyboardButton(text="◀️ К списку", callback_data="admin_list_projects"))
     
     project_info = (
@@ -214,6 +234,7 @@ async def callback_admin_edit_project_menu(callback: CallbackQuery, session: Asy
         f"💰 <b>Цена:</b> {format_price(project.price)}\n"
         f"💻 <b>Языки:</b> {project.programming_languages}\n"
         f"🔧 <b>Технологии:</b> {project.technologies}\n"
+        f"📎 <b>Файл:</b> {project.file_name or project.file_path or 'не прикреплен'}\n"
         f"📊 <b>Статус:</b> {'🟢 Активен' if project.is_active else '🔴 Неактивен'}\n"
         f"👁 <b>Просмотры:</b> {project.views_count}\n"
         f"🛒 <b>Покупки:</b> {project.purchases_count}\n\n"
@@ -228,10 +249,10 @@ async def callback_admin_edit_project_menu(callback: CallbackQuery, session: Asy
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_title_"))
-async def callback_edit_title(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectEdit.filter(F.field == "title"))
+async def callback_edit_title(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
     """Редактировать название"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     await state.update_data(edit_project_id=project_id, edit_field='title')
     
     await callback.message.edit_text(
@@ -243,10 +264,10 @@ async def callback_edit_title(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_desc_"))
-async def callback_edit_desc(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectEdit.filter(F.field == "description"))
+async def callback_edit_desc(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
     """Редактировать описание"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     await state.update_data(edit_project_id=project_id, edit_field='description')
     
     await callback.message.edit_text(
@@ -258,10 +279,10 @@ async def callback_edit_desc(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_price_"))
-async def callback_edit_price(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectEdit.filter(F.field == "price"))
+async def callback_edit_price(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
     """Редактировать цену"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     await state.update_data(edit_project_id=project_id, edit_field='price')
     
     await callback.message.edit_text(
@@ -273,10 +294,10 @@ async def callback_edit_price(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_langs_"))
-async def callback_edit_langs(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectEdit.filter(F.field == "programming_languages"))
+async def callback_edit_langs(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
     """Редактировать языки"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     await state.update_data(edit_project_id=project_id, edit_field='programming_languages')
     
     await callback.message.edit_text(
@@ -288,10 +309,10 @@ async def callback_edit_langs(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_tech_"))
-async def callback_edit_tech(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectEdit.filter(F.field == "technologies"))
+async def callback_edit_tech(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
     """Редактировать технологии"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     await state.update_data(edit_project_id=project_id, edit_field='technologies')
     
     await callback.message.edit_text(
@@ -303,6 +324,60 @@ async def callback_edit_tech(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+@router.callback_query(AdminProjectEdit.filter(F.field == "file_id"))
+async def callback_edit_file(callback: CallbackQuery, state: FSMContext, callback_data: AdminProjectEdit):
+    """Прикрепить файл проекта"""
+    project_id = callback_data.project_id
+    await state.update_data(edit_project_id=project_id)
+    
+    await callback.message.edit_text(
+        "📎 <b>Файл проекта</b>\n\n"
+        "Отправьте архив с проектом документом.\n"
+        "Файл останется в Telegram, покупатели получат его без повторной загрузки.",
+        reply_markup=kb_user.get_back_button(AdminProject(project_id=project_id).pack()),
+        parse_mode="HTML"
+    )
+    await state.set_state(AdminProjectStates.waiting_for_files)
+    await callback.answer()
+
+
+@router.message(AdminProjectStates.waiting_for_files, F.document)
+async def process_project_file(message: Message, state: FSMContext, session: AsyncSession):
+    """Сохранить file_id присланного документа"""
+    data = await state.get_data()
+    project = await crud.get_project_by_id(session, data['edit_project_id'])
+    await state.clear()
+    
+    if not project:
+        await message.answer("❌ Проект не найден")
+        return
+    
+    document = message.document
+    values = {'file_id': document.file_id, 'file_name': document.file_name}
+    # Копия в хранилище — запасной путь, если Telegram перестанет принимать file_id
+    try:
+        stored = await file_store.save_telegram_file(message.bot, document.file_id, document.file_size)
+        values['file_path'] = stored.path
+    except (FileStoreError, TelegramAPIError, ClientError) as e:
+        logger.info("Файл проекта %s не сохранен локально: %s", project.id, e)
+        # Старый file_path указывает на прежний файл — запасной путь не должен его отправить
+        values['file_path'] = None
+    await crud.update_project(session, project, **values)
+    
+    await message.answer(
+        f"✅ <b>Файл прикреплен!</b>\n\n"
+        f"📦 {document.file_name or 'без имени'}",
+        reply_markup=kb_user.get_back_button(AdminProject(project_id=project.id).pack()),
+        parse_mode="HTML"
+    )
+
+
+@router.message(AdminProjectStates.waiting_for_files)
+async def process_project_file_invalid(message: Message):
+    """В состоянии ожидания файла пришел не документ"""
+    await message.answer("❌ Отправьте файл документом (не фото и не текстом)")
+
+
 @router.message(AdminProjectStates.edit_waiting_value)
 async def process_edit_value(message: Message, state: FSMContext, session: AsyncSession):
     """Обработка нового значения"""
@@ -350,24 +425,22 @@ async def process_edit_value(message: Message, state: FSMContext, session: Async
     # Возвращаемся к меню редактирования
     await state.clear()
     
-    from aiogram.types import CallbackQuery
     fake_callback = type('obj', (object,), {
-        'data': f'admin_edit_proj_{project_id}',
         'message': message,
         'answer': lambda x=None, show_alert=False: None,
         'from_user': message.from_user
     })()
     
-    await callback_admin_edit_project_menu(fake_callback, session)
+    await show_edit_project_menu(fake_callback, session, project_id)
 
 
-@router.callback_query(F.data.startswith("toggle_active_"))
-async def callback_toggle_active(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(ToggleProjectActive.filter())
+async def callback_toggle_active(callback: CallbackQuery, session: AsyncSession, callback_data: ToggleProjectActive):
     """Переключить активность проекта"""
     if not await check_admin(callback, session):
         return
     
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     project = await crud.get_project_by_id(session, project_id)
     
     if not project:
@@ -381,16 +454,16 @@ async def callback_toggle_active(callback: CallbackQuery, session: AsyncSession)
     await callback.answer(f"✅ Проект {status_text}", show_alert=True)
     
     # Обновляем меню
-    await callback_admin_edit_project_menu(callback, session)
+    await show_edit_project_menu(callback, session, project_id)
 
 
-@router.callback_query(F.data.startswith("delete_proj_"))
-async def callback_delete_project_confirm(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(DeleteProject.filter(~F.confirmed))
+async def callback_delete_project_confirm(callback: CallbackQuery, session: AsyncSession, callback_data: DeleteProject):
     """Подтверждение удаления проекта"""
     if not await check_admin(callback, session):
         return
     
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     project = await crud.get_project_by_id(session, project_id)
     
     if not project:
@@ -400,8 +473,8 @@ async def callback_delete_project_confirm(callback: CallbackQuery, session: Asyn
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     builder.row(
-        InlineKeyboardButton(text="✅ Да, удалить", callback_data=f"confirm_delete_{project_id}"),
-        InlineKeyboardButton(text="❌ Отмена", callback_data=f"admin_edit_proj_{project_id}")
+        InlineKeyboardButton(text="✅ Да, удалить", callback_data=DeleteProject(project_id=project_id, confirmed=True).pack()),
+        InlineKeyboardButton(text="❌ Отмена", callback_data=AdminProject(project_id=project_id).pack())
     )
     
     await callback.message.edit_text(
@@ -416,13 +489,13 @@ async def callback_delete_project_confirm(callback: CallbackQuery, session: Asyn
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_"))
-async def callback_confirm_delete(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(DeleteProject.filter(F.confirmed))
+async def callback_confirm_delete(callback: CallbackQuery, session: AsyncSession, callback_data: DeleteProject):
     """Удалить проект"""
     if not await check_admin(callback, session):
         return
     
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     
     success = await crud.delete_project(session, project_id)
     
@@ -501,7 +574,7 @@ async def process_project_description(message: Message, state: FSMContext, sessi
         cat_text += f"{icon} {cat.name} - /cat_{cat.id}\n"
         builder.row(InlineKeyboardButton(
             text=f"{icon} {cat.name}",
-            callback_data=f"project_cat_{cat.id}"
+            callback_data=NewProjectCategory(category_id=cat.id).pack()
         ))
     
     builder.row(InlineKeyboardButton(text="❌ Отмена", callback_data="admin_catalog"))
@@ -510,19 +583,18 @@ async def process_project_description(message: Message, state: FSMContext, sessi
     await state.set_state(AdminProjectStates.waiting_for_category)
 
 
-@router.callback_query(AdminProjectStates.waiting_for_category, F.data.startswith("project_cat_"))
-async def process_project_category(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectStates.waiting_for_category, NewProjectCategory.filter())
+async def process_project_category(callback: CallbackQuery, state: FSMContext, callback_data: NewProjectCategory):
     """Выбрана категория"""
-    category_id = int(callback.data.split("_")[-1])
-    await state.update_data(category_id=category_id)
+    await state.update_data(category_id=callback_data.category_id)
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     
-    builder.row(InlineKeyboardButton(text="🎓 Диплом", callback_data="project_type_diploma"))
-    builder.row(InlineKeyboardButton(text="📖 Курсовая", callback_data="project_type_coursework"))
-    builder.row(InlineKeyboardButton(text="📊 Презентация", callback_data="project_type_presentation"))
-    builder.row(InlineKeyboardButton(text="💻 Проект", callback_data="project_type_project"))
+    builder.row(InlineKeyboardButton(text="🎓 Диплом", callback_data=NewProjectType(project_type=ProjectType.DIPLOMA).pack()))
+    builder.row(InlineKeyboardButton(text="📖 Курсовая", callback_data=NewProjectType(project_type=ProjectType.COURSEWORK).pack()))
+    builder.row(InlineKeyboardButton(text="📊 Презентация", callback_data=NewProjectType(project_type=ProjectType.PRESENTATION).pack()))
+    builder.row(InlineKeyboardButton(text="💻 Проект", callback_data=NewProjectType(project_type=ProjectType.PROJECT).pack()))
     builder.row(InlineKeyboardButton(text="❌ Отмена", callback_data="admin_catalog"))
     
     await callback.message.edit_text(
@@ -536,18 +608,17 @@ async def process_project_category(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(AdminProjectStates.waiting_for_type, F.data.startswith("project_type_"))
-async def process_project_type(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectStates.waiting_for_type, NewProjectType.filter())
+async def process_project_type(callback: CallbackQuery, state: FSMContext, callback_data: NewProjectType):
     """Выбран тип"""
-    project_type = callback.data.split("_")[-1]
-    await state.update_data(project_type=project_type)
+    await state.update_data(project_type=callback_data.project_type.value)
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     
-    builder.row(InlineKeyboardButton(text="⭐ Базовый", callback_data="project_level_basic"))
-    builder.row(InlineKeyboardButton(text="⭐⭐ Средний", callback_data="project_level_intermediate"))
-    builder.row(InlineKeyboardButton(text="⭐⭐⭐ Продвинутый", callback_data="project_level_advanced"))
+    builder.row(InlineKeyboardButton(text="⭐ Базовый", callback_data=NewProjectLevel(level=ProjectLevel.BASIC).pack()))
+    builder.row(InlineKeyboardButton(text="⭐⭐ Средний", callback_data=NewProjectLevel(level=ProjectLevel.INTERMEDIATE).pack()))
+    builder.row(InlineKeyboardButton(text="⭐⭐⭐ Продвинутый", callback_data=NewProjectLevel(level=ProjectLevel.ADVANCED).pack()))
     builder.row(InlineKeyboardButton(text="❌ Отмена", callback_data="admin_catalog"))
     
     await callback.message.edit_text(
@@ -561,11 +632,10 @@ async def process_project_type(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(AdminProjectStates.waiting_for_level, F.data.startswith("project_level_"))
-async def process_project_level(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(AdminProjectStates.waiting_for_level, NewProjectLevel.filter())
+async def process_project_level(callback: CallbackQuery, state: FSMContext, callback_data: NewProjectLevel):
     """Выбран уровень"""
-    level = callback.data.split("_")[-1]
-    await state.update_data(level=level)
+    await state.update_data(level=callback_data.level.value)
     
     await callback.message.edit_text(
         "➕ <b>Добавление проекта</b>\n\n"
@@ -686,7 +756,8 @@ async def confirm_create_project(callback: CallbackQuery, state: FSMContext, ses
         f"📝 {project.title}\n"
         f"💰 {format_price(project.price)}\n"
         f"🆔 ID: {project.id}\n\n"
-        "Проект добавлен в каталог и доступен пользователям.",
+        "Проект добавлен в каталог и доступен пользователям.\n"
+        "Файл для покупателей можно прикрепить в меню редактирования.",
         reply_markup=kb_user.get_back_button("admin_catalog"),
         parse_mode="HTML"
     )
@@ -718,7 +789,7 @@ async def callback_admin_orders_new(callback: CallbackQuery, session: AsyncSessi
     if not await check_admin(callback, session):
         return
     
-    orders = await crud.get_orders_by_status(session, OrderStatus.NEW)
+    orders = await crud.get_order_rows_by_status(session, OrderStatus.NEW)
     
     if not orders:
         await callback.message.edit_text(
@@ -732,10 +803,9 @@ async def callback_admin_orders_new(callback: CallbackQuery, session: AsyncSessi
     orders_text = "🆕 <b>Новые заказы</b>\n\n"
     
     for i, order in enumerate(orders, start=1):
-        user = order.user
         orders_text += (
             f"{i}. <b>Заказ #{order.id}</b>\n"
-            f"   👤 {user.first_name} (@{user.username or 'нет'})\n"
+            f"   👤 {order.first_name} (@{order.username or 'нет'})\n"
             f"   📝 {order.project_type.value}\n"
             f"   📅 {format_datetime(order.created_at)}\n"
             f"   /order_details_{order.id}\n\n"
@@ -755,7 +825,7 @@ async def callback_admin_orders_in_progress(callback: CallbackQuery, session: As
     if not await check_admin(callback, session):
         return
     
-    orders = await crud.get_orders_by_status(session, OrderStatus.IN_PROGRESS)
+    orders = await crud.get_order_rows_by_status(session, OrderStatus.IN_PROGRESS)
     
     if not orders:
         await callback.message.edit_text(
@@ -769,10 +839,9 @@ async def callback_admin_orders_in_progress(callback: CallbackQuery, session: As
     orders_text = "⚙️ <b>Заказы в работе</b>\n\n"
     
     for i, order in enumerate(orders, start=1):
-        user = order.user
         orders_text += (
             f"{i}. <b>Заказ #{order.id}</b>\n"
-            f"   👤 {user.first_name}\n"
+            f"   👤 {order.first_name}\n"
             f"   📝 {order.project_type.value}\n"
             f"   /order_details_{order.id}\n\n"
         )
@@ -791,7 +860,7 @@ async def callback_admin_orders_completed(callback: CallbackQuery, session: Asyn
     if not await check_admin(callback, session):
         return
     
-    orders = await crud.get_orders_by_status(session, OrderStatus.COMPLETED)
+    orders = await crud.get_order_rows_by_status(session, OrderStatus.COMPLETED, limit=20)
     
     if not orders:
         await callback.message.edit_text(
@@ -804,11 +873,10 @@ async def callback_admin_orders_completed(callback: CallbackQuery, session: Asyn
     
     orders_text = "✅ <b>Завершенные заказы</b>\n\n"
     
-    for i, order in enumerate(orders[:20], start=1):  # Показываем последние 20
-        user = order.user
+    for i, order in enumerate(orders, start=1):  # Показываем последние 20
         orders_text += (
             f"{i}. <b>Заказ #{order.id}</b>\n"
-            f"   👤 {user.first_name}\n"
+            f"   👤 {order.first_name}\n"
             f"   📅 {format_datetime(order.completed_at or order.updated_at)}\n\n"
         )
     
@@ -820,6 +888,307 @@ async def callback_admin_orders_completed(callback: CallbackQuery, session: Asyn
     await callback.answer()
 
 
+async def render_admin_order(session: AsyncSession, order) -> str:
+    """Карточка заказа для админа"""
+    user = order.user
+    counts = (await crud.count_attachments_for_orders(session, [order.id])).get(order.id, {})
+    text = (
+        f"📋 <b>Заказ #{order.id}</b>\n\n"
+        f"👤 {user.first_name} (@{user.username or 'нет'})\n"
+        f"📝 {order.project_type.value}\n"
+        f"📊 <b>Статус:</b> {get_order_status_text(order.status.value)}\n"
+        f"📅 {format_datetime(order.created_at)}\n\n"
+        f"<b>Описание:</b>\n{order.description}\n\n"
+        f"<b>Технологии:</b> {order.technologies}\n"
+    )
+    if order.deadline:
+        text += f"<b>Срок:</b> {order.deadline}\n"
+    if order.budget:
+        text += f"<b>Бюджет:</b> {order.budget}\n"
+    if order.price:
+        text += f"<b>Цена:</b> {format_price(order.price)}\n"
+    text += (
+        f"\n📎 Файлы клиента: {counts.get(AttachmentKind.CLIENT, 0)}\n"
+        f"📦 Файлы результата: {counts.get(AttachmentKind.RESULT, 0)}"
+    )
+    return text
+
+
+@router.message(F.text.startswith("/order_details_"))
+async def cmd_admin_order_details(message: Message, session: AsyncSession):
+    """Карточка заказа по команде из списков"""
+    if not await crud.is_admin(session, message.from_user.id):
+        return
+    
+    order_id = message.text.removeprefix("/order_details_").split("@")[0]
+    order = await crud.get_order_by_id(session, int(order_id)) if order_id.isdigit() else None
+    if not order:
+        await message.answer("❌ Заказ не найден")
+        return
+    
+    await message.answer(
+        await render_admin_order(session, order),
+        reply_markup=kb_admin.get_admin_order_actions_keyboard(order.id, order.status.value),
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(AdminOrderAction.filter(F.action == "view"))
+async def callback_admin_order_view(
+    callback: CallbackQuery, state: FSMContext, session: AsyncSession, callback_data: AdminOrderAction
+):
+    """Карточка заказа (и возврат из загрузки файлов)"""
+    if not await check_admin(callback, session):
+        return
+    
+    await state.clear()
+    order = await crud.get_order_by_id(session, callback_data.order_id)
+    if not order:
+        await callback.answer("❌ Заказ не найден", show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        await render_admin_order(session, order),
+        reply_markup=kb_admin.get_admin_order_actions_keyboard(order.id, order.status.value),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+# Переходы статуса по кнопкам карточки: действие -> (из какого статуса, в какой)
+ORDER_TRANSITIONS = {
+    "accept": (OrderStatus.NEW, OrderStatus.ACCEPTED),
+    "start": (OrderStatus.ACCEPTED, OrderStatus.IN_PROGRESS),
+    "ready": (OrderStatus.IN_PROGRESS, OrderStatus.READY_FOR_CHECK),
+}
+
+
+@router.callback_query(AdminOrderAction.filter(F.action.in_(ORDER_TRANSITIONS)))
+async def callback_admin_order_status(callback: CallbackQuery, session: AsyncSession, callback_data: AdminOrderAction):
+    """Смена статуса заказа"""
+    if not await check_admin(callback, session):
+        return
+    
+    source, target = ORDER_TRANSITIONS[callback_data.action]
+    order = await crud.get_order_by_id(session, callback_data.order_id)
+    if not order or order.status != source:
+        await callback.answer("❌ Статус заказа уже изменился", show_alert=True)
+        return
+    
+    if not await crud.transition_order_status(session, order.id, source, target):
+        await callback.answer("❌ Статус заказа уже изменился", show_alert=True)
+        return
+    await callback.message.edit_text(
+        await render_admin_order(session, order),
+        reply_markup=kb_admin.get_admin_order_actions_keyboard(order.id, order.status.value),
+        parse_mode="HTML"
+    )
+    await callback.answer(f"✅ {get_order_status_text(target.value)}")
+
+
+@router.callback_query(AdminOrderAction.filter(F.action == "complete"))
+async def callback_admin_order_complete(callback: CallbackQuery, session: AsyncSession, callback_data: AdminOrderAction):
+    """Завершить заказ и отправить клиенту результаты"""
+    if not await check_admin(callback, session):
+        return
+    
+    order = await crud.get_order_by_id(session, callback_data.order_id)
+    if not order or order.status != OrderStatus.READY_FOR_CHECK:
+        await callback.answer("❌ Статус заказа уже изменился", show_alert=True)
+        return
+    
+    await callback.answer("📤 Отправляю результаты...")
+    report = await delivery.complete_order(callback.bot, session, order.id)
+    if report is None:
+        # Заказ завершили параллельно: результаты уже ушли клиенту
+        await callback.answer("❌ Статус заказа уже изменился", show_alert=True)
+        return
+    
+    text = (
+        f"✅ <b>Заказ #{order.id} завершен</b>\n\n"
+        f"📦 Отправлено файлов: {len(report.sent)}"
+    )
+    if report.failed:
+        text += "\n❌ Не отправлены:\n" + "\n".join(f"• {file['name']}" for file in report.failed)
+    if not report.notified:
+        text += "\n❌ Клиент не получил уведомление: бот заблокирован или чат недоступен"
+    
+    await callback.message.edit_text(
+        text,
+        reply_markup=kb_user.get_back_button(AdminOrderAction(action="view", order_id=order.id).pack()),
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(AdminOrderAction.filter(F.action == "files"))
+async def callback_admin_order_files(
+    callback: CallbackQuery, state: FSMContext, session: AsyncSession, callback_data: AdminOrderAction
+):
+    """Прикрепить файлы результата"""
+    if not await check_admin(callback, session):
+        return
+    
+    await state.update_data(admin_order_id=callback_data.order_id)
+    await callback.message.edit_text(
+        "📎 <b>Файлы результата</b>\n\n"
+        "Отправьте файлы документами, фото или видео, можно сразу несколько.\n"
+        "Клиент получит их при завершении заказа.",
+        reply_markup=kb_user.get_back_button(AdminOrderAction(action="view", order_id=callback_data.order_id).pack()),
+        parse_mode="HTML"
+    )
+    await state.set_state(AdminOrderStates.waiting_for_files)
+    await callback.answer()
+
+
+@router.message(AdminOrderStates.waiting_for_files, F.document | F.photo | F.video)
+async def process_admin_order_files(
+    message: Message, state: FSMContext, session: AsyncSession, album: Optional[List[Message]] = None
+):
+    """Файлы результата: альбом — одна запись в БД и один ответ"""
+    data = await state.get_data()
+    order = await crud.get_order_by_id(session, data['admin_order_id'])
+    if not order:
+        await state.clear()
+        await message.answer("❌ Заказ не найден")
+        return
+    
+    current = len(await crud.get_order_attachments(session, order.id, AttachmentKind.RESULT))
+    files, rejected = await order_files.accept_files(
+        message.bot, album or [message], current, settings.order_max_files
+    )
+    await crud.add_attachments(session, order.id, AttachmentKind.RESULT, files)
+    
+    text = f"📦 Файлов результата: <b>{current + len(files)}</b>"
+    if rejected:
+        text += "\n\n❌ Не приняты:\n" + "\n".join(f"• {error}" for error in rejected)
+    await message.answer(
+        text,
+        reply_markup=kb_user.get_back_button(AdminOrderAction(action="view", order_id=order.id).pack()),
+        parse_mode="HTML"
+    )
+
+
+# Действия карточки, которые ждут текст от админа: действие -> (состояние, приглашение)
+ORDER_INPUTS = {
+    "price": (AdminOrderStates.waiting_for_price, "💰 <b>Цена заказа</b>\n\nВведите цену в рублях:"),
+    "comment": (
+        AdminOrderStates.waiting_for_comment,
+        "💬 <b>Комментарий к заказу</b>\n\nВведите текст — клиент увидит его в деталях заказа:"
+    ),
+    "reject": (
+        AdminOrderStates.waiting_for_rejection_reason,
+        "❌ <b>Отклонение заказа</b>\n\nВведите причину — ее получит клиент:"
+    ),
+}
+
+
+@router.callback_query(AdminOrderAction.filter(F.action.in_(ORDER_INPUTS)))
+async def callback_admin_order_input(
+    callback: CallbackQuery, state: FSMContext, session: AsyncSession, callback_data: AdminOrderAction
+):
+    """Цена, комментарий или отклонение: запросить текст"""
+    if not await check_admin(callback, session):
+        return
+    
+    order = await crud.get_order_by_id(session, callback_data.order_id)
+    if not order or (callback_data.action == "reject" and order.status != OrderStatus.NEW):
+        await callback.answer("❌ Статус заказа уже изменился", show_alert=True)
+        return
+    
+    next_state, prompt = ORDER_INPUTS[callback_data.action]
+    await state.update_data(admin_order_id=order.id)
+    await callback.message.edit_text(
+        prompt,
+        reply_markup=kb_user.get_back_button(AdminOrderAction(action="view", order_id=order.id).pack()),
+        parse_mode="HTML"
+    )
+    await state.set_state(next_state)
+    await callback.answer()
+
+
+async def notify_order_client(message: Message, order, text: str) -> str:
+    """Сообщить клиенту об изменении заказа; строка для ответа админу, если не вышло"""
+    try:
+        await message.bot.send_message(order.user.telegram_id, text, parse_mode="HTML")
+    except TelegramAPIError as e:
+        logger.warning("Клиент заказа %s не уведомлен: %s", order.id, e)
+        return "\n❌ Клиент не получил уведомление: бот заблокирован или чат недоступен"
+    return ""
+
+
+async def answer_order_input(message: Message, order, text: str):
+    """Ответ админу с возвратом к карточке заказа"""
+    await message.answer(
+        text,
+        reply_markup=kb_user.get_back_button(AdminOrderAction(action="view", order_id=order.id).pack()),
+        parse_mode="HTML"
+    )
+
+
+@router.message(AdminOrderStates.waiting_for_price, F.text)
+async def process_admin_order_price(message: Message, state: FSMContext, session: AsyncSession):
+    """Цена заказа"""
+    data = await state.get_data()
+    try:
+        price = float(message.text.replace(" ", "").replace(",", "."))
+    except ValueError:
+        await message.answer("❌ Введите число, например: 5000")
+        return
+    if price < 0:
+        await message.answer("❌ Цена не может быть отрицательной. Введите корректную цену:")
+        return
+    
+    await state.clear()
+    order = await crud.get_order_by_id(session, data['admin_order_id'])
+    if not order:
+        await message.answer("❌ Заказ не найден")
+        return
+    
+    await crud.update_order(session, order, price=price)
+    warning = await notify_order_client(
+        message, order, f"💰 Цена заказа #{order.id}: <b>{format_price(price)}</b>"
+    )
+    await answer_order_input(message, order, f"✅ Цена заказа #{order.id}: {format_price(price)}" + warning)
+
+
+@router.message(AdminOrderStates.waiting_for_comment, F.text)
+async def process_admin_order_comment(message: Message, state: FSMContext, session: AsyncSession):
+    """Комментарий к заказу"""
+    data = await state.get_data()
+    await state.clear()
+    order = await crud.get_order_by_id(session, data['admin_order_id'])
+    if not order:
+        await message.answer("❌ Заказ не найден")
+        return
+    
+    await crud.update_order(session, order, admin_comment=message.text)
+    warning = await notify_order_client(
+        message, order, f"💬 <b>Комментарий к заказу #{order.id}:</b>\n\n{message.text}"
+    )
+    await answer_order_input(message, order, f"✅ Комментарий к заказу #{order.id} сохранен" + warning)
+
+
+@router.message(AdminOrderStates.waiting_for_rejection_reason, F.text)
+async def process_admin_order_rejection(message: Message, state: FSMContext, session: AsyncSession):
+    """Причина отклонения: заказ отклоняется, только если он все еще новый"""
+    data = await state.get_data()
+    await state.clear()
+    order = await crud.get_order_by_id(session, data['admin_order_id'])
+    if not order:
+        await message.answer("❌ Заказ не найден")
+        return
+    
+    if not await crud.transition_order_status(
+        session, order.id, OrderStatus.NEW, OrderStatus.REJECTED, rejection_reason=message.text
+    ):
+        await answer_order_input(message, order, "❌ Статус заказа уже изменился")
+        return
+    warning = await notify_order_client(
+        message, order, f"❌ <b>Заказ #{order.id} отклонен</b>\n\nПричина: {message.text}"
+    )
+    await answer_order_input(message, order, f"✅ Заказ #{order.id} отклонен" + warning)
+
+
 # ============== РАССЫЛКА ==============
 
 @router.callback_query(F.data == "admin_broadcast")
@@ -863,10 +1232,12 @@ async def process_broadcast_message(message: Message, state: FSMContext):
     await state.set_state(AdminBroadcastStates.waiting_for_audience)
 
 
-@router.callback_query(AdminBroadcastStates.waiting_for_audience, F.data.startswith("broadcast_audience_"))
-async def callback_broadcast_audience(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+@router.callback_query(AdminBroadcastStates.waiting_for_audience, BroadcastAudience.filter())
+async def callback_broadcast_audience(
+    callback: CallbackQuery, state: FSMContext, session: AsyncSession, callback_data: BroadcastAudience
+):
     """Выбрана аудитория"""
-    audience = callback.data.split("_")[-1]
+    audience = callback_data.audience
     data = await state.get_data()
     
     # Получаем список пользователей в зависимости от аудитории
@@ -878,7 +1249,7 @@ async def callback_broadcast_audience(callback: CallbackQuery, state: FSMContext
         all_users = await crud.get_all_users(session, is_blocked=False)
         users = []
         for user in all_users:
-            purchases = await crud.get_user_purchases(session, user.id)
+            purchases = await crud.get_user_purchase_rows(session, user.id)
             if purchases:
                 users.append(user)
         audience_text = "пользователям с покупками"
@@ -887,7 +1258,7 @@ async def callback_broadcast_audience(callback: CallbackQuery, state: FSMContext
         all_users = await crud.get_all_users(session, is_blocked=False)
         users = []
         for user in all_users:
-            purchases = await crud.get_user_purchases(session, user.id)
+            purchases = await crud.get_user_purchase_rows(session, user.id)
             if not purchases:
                 users.append(user)
         audience_text = "пользователям без покупок"
@@ -922,11 +1293,14 @@ async def callback_broadcast_audience(callback: CallbackQuery, state: FSMContext
             failed += 1
     
     # Обновляем статистику рассылки
-    broadcast.total_sent = len(users)
-    broadcast.successful = successful
-    broadcast.failed = failed
-    broadcast.sent_at = datetime.utcnow()
-    await session.commit()
+    await crud.update_broadcast(
+        session,
+        broadcast,
+        total_sent=len(users),
+        successful=successful,
+        failed=failed,
+        sent_at=datetime.utcnow()
+    )
     
     await callback.message.edit_text(
         f"✅ <b>Рассылка завершена!</b>\n\n"
@@ -997,7 +1371,7 @@ async def callback_admin_list_categories(callback: CallbackQuery, session: Async
         
         builder.row(InlineKeyboardButton(
             text=f"{icon} {category.name}",
-            callback_data=f"admin_edit_cat_{category.id}"
+            callback_data=AdminCategory(category_id=category.id).pack()
         ))
     
     builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="admin_categories"))
@@ -1119,13 +1493,13 @@ async def confirm_create_category(callback: CallbackQuery, state: FSMContext, se
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_edit_cat_"))
-async def callback_edit_category(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(AdminCategory.filter())
+async def callback_edit_category(callback: CallbackQuery, session: AsyncSession, callback_data: AdminCategory):
     """Редактировать/удалить категорию"""
     if not await check_admin(callback, session):
         return
     
-    category_id = int(callback.data.split("_")[-1])
+    category_id = callback_data.category_id
     category = await crud.get_category_by_id(session, category_id)
     
     if not category:
@@ -1133,15 +1507,14 @@ async def callback_edit_category(callback: CallbackQuery, session: AsyncSession)
         return
     
     # Проверяем сколько проектов в категории
-    projects = await crud.get_all_projects(session, is_active=True, category_id=category_id, limit=100)
-    projects_count = len(projects)
+    projects_count = (await catalog_store.get()).count(category_id=category_id)
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     
     builder.row(InlineKeyboardButton(
         text="🗑 Удалить категорию",
-        callback_data=f"delete_cat_{category_id}"
+        callback_data=DeleteCategory(category_id=category_id).pack()
     ))
     builder.row(InlineKeyboardButton(text="◀️ К списку", callback_data="admin_list_categories"))
     
@@ -1167,19 +1540,19 @@ async def callback_edit_category(callback: CallbackQuery, session: AsyncSession)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("delete_cat_"))
-async def callback_delete_category(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(DeleteCategory.filter(~F.confirmed))
+async def callback_delete_category(callback: CallbackQuery, session: AsyncSession, callback_data: DeleteCategory):
     """Удалить категорию"""
     if not await check_admin(callback, session):
         return
     
-    category_id = int(callback.data.split("_")[-1])
+    category_id = callback_data.category_id
     
     from aiogram.utils.keyboard import InlineKeyboardBuilder
     builder = InlineKeyboardBuilder()
     builder.row(
-        InlineKeyboardButton(text="✅ Да, удалить", callback_data=f"confirm_del_cat_{category_id}"),
-        InlineKeyboardButton(text="❌ Отмена", callback_data=f"admin_edit_cat_{category_id}")
+        InlineKeyboardButton(text="✅ Да, удалить", callback_data=DeleteCategory(category_id=category_id, confirmed=True).pack()),
+        InlineKeyboardButton(text="❌ Отмена", callback_data=AdminCategory(category_id=category_id).pack())
     )
     
     await callback.message.edit_text(
@@ -1192,16 +1565,16 @@ async def callback_delete_category(callback: CallbackQuery, session: AsyncSessio
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_del_cat_"))
-async def confirm_delete_category(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(DeleteCategory.filter(F.confirmed))
+async def confirm_delete_category(callback: CallbackQuery, session: AsyncSession, callback_data: DeleteCategory):
     """Подтверждение удаления категории"""
     if not await check_admin(callback, session):
         return
     
-    category_id = int(callback.data.split("_")[-1])
+    category_id = callback_data.category_id
     
     # Проверяем, есть ли проекты в этой категории
-    projects = await crud.get_all_projects(session, is_active=True, category_id=category_id, limit=1)
+    projects = await crud.get_project_rows(session, is_active=True, category_id=category_id, limit=1)
     
     if projects:
         await callback.message.edit_text(
@@ -1,15 +1,17 @@
 """
 Обработчики корзины покупок
 """
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
 from bot.keyboards import user as kb
+from bot.keyboards.callbacks import BuyNow, Download
 from bot.utils.helpers import format_price
+from bot.utils.routing import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.callback_query(F.data == "cart")
@@ -140,10 +142,10 @@ async def callback_checkout(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("buy_now_"))
-async def callback_buy_now(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(BuyNow.filter())
+async def callback_buy_now(callback: CallbackQuery, session: AsyncSession, callback_data: BuyNow):
     """Купить проект сразу"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     
     user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
     
@@ -186,7 +188,7 @@ async def callback_buy_now(callback: CallbackQuery, session: AsyncSession):
     
     from bot.keyboards.user import InlineKeyboardBuilder, InlineKeyboardButton
     builder = InlineKeyboardBuilder()
-    builder.row(InlineKeyboardButton(text="📥 Скачать", callback_data=f"download_{project_id}"))
+    builder.row(InlineKeyboardButton(text="📥 Скачать", callback_data=Download(project_id=project_id).pack()))
     builder.row(InlineKeyboardButton(text="📦 Мои заказы", callback_data="my_purchases"))
     builder.row(InlineKeyboardButton(text="◀️ Главное меню", callback_data="main_menu"))
     
@@ -1,20 +1,30 @@
 """
 Обработчики каталога проектов
 """
-from aiogram import Router, F
-from aiogram.types import CallbackQuery, FSInputFile, BufferedInputFile
+from typing import Optional, Tuple
+
+from aiogram import F
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, BufferedInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
-import os
 
 from bot.database import crud
+from bot.database.category_registry import category_registry
 from bot.database.models import ProjectType
 from bot.keyboards import user as kb
+from bot.keyboards.callbacks import CatalogPage, ProjectCard, AddToCart, RemoveFromCart, Download
+from bot.services.delivery import ProjectFileMissing, has_project_file, send_project_file
+from bot.services.catalog_snapshot import CatalogSnapshot, catalog_store
+from bot.services.render_cache import render_cache
+from bot.states.order import CatalogStates
 from bot.utils.helpers import format_price, get_project_type_emoji, get_level_emoji
+from bot.utils.routing import CallbackRouter
 from config import settings
 
-router = Router()
+router = CallbackRouter()
 
 ITEMS_PER_PAGE = 5
+SEARCH_LIMIT = 10
 
 
 @router.callback_query(F.data == "catalog")
@@ -39,57 +49,32 @@ async def callback_catalog(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "catalog_all")
-async def callback_catalog_all(callback: CallbackQuery, session: AsyncSession):
+async def callback_catalog_all(callback: CallbackQuery):
     """Показать все проекты"""
-    await show_projects_page(callback, session, page=0)
+    await show_projects_page(callback, page=0)
 
 
-@router.callback_query(F.data.startswith("catalog_type_"))
-async def callback_catalog_by_type(callback: CallbackQuery, session: AsyncSession):
-    """Показать проекты по типу"""
-    project_type = callback.data.split("_")[-1]
-    await show_projects_page(callback, session, page=0, project_type=ProjectType(project_type))
+@router.callback_query(CatalogPage.filter())
+async def callback_catalog_page(callback: CallbackQuery, callback_data: CatalogPage):
+    """Страница каталога (по типу или весь каталог)"""
+    await show_projects_page(callback, page=callback_data.page, project_type=callback_data.project_type)
 
 
-@router.callback_query(F.data.startswith("catalog_page_"))
-async def callback_catalog_page(callback: CallbackQuery, session: AsyncSession):
-    """Пагинация каталога"""
-    page = int(callback.data.split("_")[-1])
-    await show_projects_page(callback, session, page=page)
+@router.callback_query(ProjectCard.filter())
+async def callback_project_details(callback: CallbackQuery, session: AsyncSession, callback_data: ProjectCard):
+    """Показать детали проекта"""
+    await show_project_card(callback, session, callback_data.project_id, callback_data.page)
 
 
-@router.callback_query(F.data.startswith("project_"))
-async def callback_project_details(callback: CallbackQuery, session: AsyncSession):
-    """Показать детали проекта"""
-    project_id = int(callback.data.split("_")[1])
-    
-    project = await crud.get_project_by_id(session, project_id)
-    
-    if not project:
-        await callback.answer("❌ Проект не найден", show_alert=True)
-        return
-    
-    # Увеличиваем счетчик просмотров
-    await crud.increment_project_views(session, project_id)
-    
-    # Проверяем, куплен ли проект
-    user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
-    is_purchased = await crud.has_user_purchased_project(session, user.id, project_id) if user else False
-    
-    # Проверяем, есть ли в корзине
-    in_cart = False
-    if user:
-        cart = await crud.get_user_cart(session, user.id)
-        in_cart = any(item.project_id == project_id for item in cart)
-    
-    # Формируем описание проекта
+def render_project_card(project, category_name: str) -> str:
+    """Общая для всех часть карточки (без счетчиков и отметки о покупке)"""
     price_text = format_price(project.discount_price if project.discount_price else project.price)
     if project.discount_price:
         old_price = format_price(project.price)
         price_text = f"<s>{old_price}</s> ➡️ {price_text} 🔥"
     
     # Красивая карточка проекта
-    project_text = (
+    return (
         f"╔═══════════════════════╗\n"
         f"  {get_project_type_emoji(project.project_type.value)} <b>{project.title}</b>\n"
         f"╚═══════════════════════╝\n\n"
@@ -97,16 +82,50 @@ async def callback_project_details(callback: CallbackQuery, session: AsyncSessio
         f"<i>{project.description}</i>\n\n"
         f"═══════════════════════\n"
         f"📁 <b>Детали проекта:</b>\n\n"
-        f"🏷 Категория: <b>{project.category.name}</b>\n"
+        f"🏷 Категория: <b>{category_name}</b>\n"
         f"💻 Языки: <code>{project.programming_languages}</code>\n"
         f"🔧 Технологии: <code>{project.technologies}</code>\n"
         f"📊 Сложность: {get_level_emoji(project.level.value)} <b>{project.level.value.title()}</b>\n\n"
         f"═══════════════════════\n"
         f"💰 <b>ЦЕНА:</b> {price_text}\n"
         f"═══════════════════════\n\n"
+    )
+
+
+async def show_project_card(callback: CallbackQuery, session: AsyncSession, project_id: int, page: int = 0):
+    """Карточка проекта (и после изменения корзины)"""
+    card = render_cache.get_card(project_id)
+    if card is None:
+        generation = render_cache.generation
+        project = await crud.get_project_by_id(session, project_id)
+        if not project:
+            await callback.answer("❌ Проект не найден", show_alert=True)
+            return
+        category = await category_registry.get(session, project.category_id)
+        card = render_cache.put_card(
+            project_id, render_project_card(project, category.name if category else "—"),
+            project.views_count, project.purchases_count, generation
+        )
+    
+    # Увеличиваем счетчик просмотров
+    await crud.increment_project_views(session, project_id)
+    card.views += 1
+    
+    # Проверяем, куплен ли проект
+    user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
+    is_purchased = await crud.has_user_purchased_project(session, user.id, project_id) if user else False
+    
+    # Проверяем, есть ли в корзине
+    in_cart = False
+    if user:
+        cart = await crud.get_user_cart(session, user.id)
+        in_cart = any(item.project_id == project_id for item in cart)
+    
+    project_text = (
+        f"{card.text}"
         f"📈 <b>Статистика:</b>\n"
-        f"👁 Просмотров: {project.views_count}\n"
-        f"🛒 Покупок: {project.purchases_count}"
+        f"👁 Просмотров: {card.views}\n"
+        f"🛒 Покупок: {card.purchases}"
     )
     
     if is_purchased:
@@ -118,16 +137,16 @@ async def callback_project_details(callback: CallbackQuery, session: AsyncSessio
     
     await callback.message.edit_text(
         project_text,
-        reply_markup=kb.get_project_card_keyboard(project_id, in_cart, is_purchased),
+        reply_markup=kb.get_project_card_keyboard(project_id, in_cart, is_purchased, page),
         parse_mode="HTML"
     )
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("add_cart_"))
-async def callback_add_to_cart(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(AddToCart.filter())
+async def callback_add_to_cart(callback: CallbackQuery, session: AsyncSession, callback_data: AddToCart):
     """Добавить проект в корзину"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     
     user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
     
@@ -148,13 +167,13 @@ async def callback_add_to_cart(callback: CallbackQuery, session: AsyncSession):
     # Обновляем кнопки
     project = await crud.get_project_by_id(session, project_id)
     if project:
-        await callback_project_details(callback, session)
+        await show_project_card(callback, session, project_id, callback_data.page)
 
 
-@router.callback_query(F.data.startswith("remove_cart_"))
-async def callback_remove_from_cart(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(RemoveFromCart.filter())
+async def callback_remove_from_cart(callback: CallbackQuery, session: AsyncSession, callback_data: RemoveFromCart):
     """Удалить проект из корзины"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     
     user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
     
@@ -168,33 +187,23 @@ async def callback_remove_from_cart(callback: CallbackQuery, session: AsyncSessi
     
     # Если находимся на странице проекта, обновляем кнопки
     if callback.message.text and "Описание:" in callback.message.text:
-        await callback_project_details(callback, session)
+        await show_project_card(callback, session, project_id, callback_data.page)
 
 
 async def show_projects_page(
     callback: CallbackQuery,
-    session: AsyncSession,
     page: int = 0,
     project_type: ProjectType = None
 ):
-    """Показать страницу с проектами"""
-    # Получаем проекты
-    projects = await crud.get_all_projects(
-        session,
-        is_active=True,
-        project_type=project_type,
-        limit=ITEMS_PER_PAGE,
-        offset=page * ITEMS_PER_PAGE
-    )
-    
-    # Получаем общее количество
-    total_count = await crud.get_projects_count(
-        session,
-        is_active=True,
-        project_type=project_type
-    )
-    
-    if not projects:
+    """Показать страницу с проектами (из снимка каталога, без запросов к БД)"""
+    entry = render_cache.get_page(project_type, page)
+    if entry is None:
+        generation = render_cache.generation
+        snapshot = await catalog_store.get()
+        text, total_pages = render_projects_page(snapshot, page, project_type)
+        entry = render_cache.put_page(project_type, page, text, total_pages, generation)
+    
+    if entry.text is None:
         await callback.message.edit_text(
             "📭 В этой категории пока нет проектов",
             reply_markup=kb.get_back_button("catalog")
@@ -202,6 +211,24 @@ async def show_projects_page(
         await callback.answer()
         return
     
+    await callback.message.edit_text(
+        entry.text,
+        reply_markup=kb.get_pagination_keyboard(page, entry.total_pages, project_type),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+def render_projects_page(
+    snapshot: CatalogSnapshot, page: int, project_type: ProjectType = None
+) -> Tuple[Optional[str], int]:
+    """Текст страницы каталога из снимка и число страниц (None — проектов нет)"""
+    projects = snapshot.page(project_type, limit=ITEMS_PER_PAGE, offset=page * ITEMS_PER_PAGE)
+    total_count = snapshot.count(project_type)
+    
+    if not projects:
+        return None, 0
+    
     total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
     
     # Формируем текст со списком проектов
@@ -215,14 +242,14 @@ async def show_projects_page(
     )
     
     for i, project in enumerate(projects, start=1):
-        price = format_price(project.discount_price if project.discount_price else project.price)
+        price = format_price(project.current_price)
         
         # Добавляем визуальные индикаторы
         popularity = "🔥" if project.purchases_count > 5 else "⭐" if project.purchases_count > 0 else "🆕"
         
         projects_text += (
             f"{popularity} <b>{i}. {project.title}</b>\n"
-            f"   {get_project_type_emoji(project.project_type.value)} {project.category.name} | "
+            f"   {get_project_type_emoji(project.project_type.value)} {project.category_name} | "
             f"{get_level_emoji(project.level.value)}\n"
             f"   💰 <b>{price}</b> | 🛒 {project.purchases_count}\n"
             f"   👉 /project_{project.id}\n\n"
@@ -232,25 +259,52 @@ async def show_projects_page(
         f"═══════════════════════\n"
         f"💡 <i>Нажмите на проект для подробностей</i>"
     )
-    
+    return projects_text, total_pages
+
+
+@router.callback_query(F.data == "catalog_search")
+async def callback_catalog_search(callback: CallbackQuery, state: FSMContext):
+    """Поиск по каталогу: запросить название"""
     await callback.message.edit_text(
-        projects_text,
-        reply_markup=kb.get_pagination_keyboard(page, total_pages),
+        "🔍 <b>Поиск по каталогу</b>\n\n"
+        "Отправьте название проекта или слова из него:",
+        reply_markup=kb.get_back_button("catalog"),
         parse_mode="HTML"
     )
+    await state.set_state(CatalogStates.waiting_for_query)
     await callback.answer()
 
 
+@router.message(CatalogStates.waiting_for_query, F.text)
+async def process_catalog_search(message: Message, state: FSMContext):
+    """Поиск по названиям в снимке каталога"""
+    await state.clear()
+    snapshot = await catalog_store.get()
+    projects = snapshot.search(message.text, limit=SEARCH_LIMIT)
+    
+    if not projects:
+        await message.answer(
+            "📭 Ничего не найдено. Попробуйте другие слова",
+            reply_markup=kb.get_search_results_keyboard([])
+        )
+        return
+    
+    text = f"🔍 <b>Найдено: {len(projects)}</b>\n\n"
+    for project in projects:
+        text += f"• <b>{project.title}</b> — {format_price(project.current_price)}\n"
+    await message.answer(text, reply_markup=kb.get_search_results_keyboard(projects), parse_mode="HTML")
+
+
 @router.callback_query(F.data == "current_page")
 async def callback_current_page(callback: CallbackQuery):
     """Текущая страница (ничего не делаем)"""
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("download_"))
-async def callback_download_project(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(Download.filter())
+async def callback_download_project(callback: CallbackQuery, session: AsyncSession, callback_data: Download):
     """Скачать купленный проект"""
-    project_id = int(callback.data.split("_")[-1])
+    project_id = callback_data.project_id
     
     user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
     
@@ -266,28 +320,25 @@ async def callback_download_project(callback: CallbackQuery, session: AsyncSessi
     
     project = await crud.get_project_by_id(session, project_id)
     
-    if not project or not project.file_path:
+    if not project or not has_project_file(project):
         await callback.answer("❌ Файл проекта не найден", show_alert=True)
         return
     
     await callback.answer("📥 Подготавливаю файлы...")
     
-    # Отправляем файл
-    file_path = project.file_path
-    if os.path.exists(file_path):
-        try:
-            document = FSInputFile(file_path)
-            await callback.message.answer_document(
-                document=document,
-                caption=f"📦 {project.title}\n\nСпасибо за покупку! 🎉"
-            )
-        except Exception as e:
-            await callback.message.answer(
-                f"❌ Ошибка при отправке файла: {str(e)}\n"
-                "Обратитесь в поддержку."
-            )
-    else:
+    # Отправляем файл: по file_id, с диска — только первая загрузка
+    try:
+        await send_project_file(
+            callback.bot, callback.message.chat.id, project, session,
+            caption=f"📦 {project.title}\n\nСпасибо за покупку! 🎉"
+        )
+    except ProjectFileMissing:
         await callback.message.answer(
             "❌ Файл не найден на сервере. Обратитесь в поддержку."
         )
+    except Exception as e:
+        await callback.message.answer(
+            f"❌ Ошибка при отправке файла: {str(e)}\n"
+            "Обратитесь в поддержку."
+        )
 
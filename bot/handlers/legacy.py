@@ -0,0 +1,128 @@
+"""
+Callback'и клавиатур, отправленных до компактного формата callback_data
+
+Раньше кнопки несли строки вида project_5, add_cart_5, download_5 и
+order_details_5, разбираемые через split('_'). Такие клавиатуры остались в
+старых сообщениях: пользовательские кнопки разбираются по-старому и
+передаются новым обработчикам, на остальные (и на любой callback, который не
+подошел ни одному обработчику) бот отвечает, что меню устарело, — без ответа
+у пользователя бесконечно крутится индикатор загрузки.
+
+Роутер подключается последним.
+"""
+from typing import Optional
+
+from aiogram import F
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models import ProjectType
+from bot.handlers import cart, catalog, orders, support
+from bot.keyboards.callbacks import (
+    CatalogPage, ProjectCard, AddToCart, RemoveFromCart, BuyNow, Download, OrderDetails, SupportOrder
+)
+from bot.utils.routing import CallbackRouter
+
+router = CallbackRouter()
+
+OUTDATED_TEXT = "⚠️ Меню устарело, откройте его заново"
+
+
+def _legacy_id(callback: CallbackQuery) -> Optional[int]:
+    """Число в конце старой callback_data (project_5 -> 5) или None"""
+    tail = callback.data.rsplit("_", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+async def answer_outdated(callback: CallbackQuery):
+    """Кнопка из устаревшего меню"""
+    await callback.answer(OUTDATED_TEXT, show_alert=True)
+
+
+@router.callback_query(F.data.startswith("catalog_page_"))
+async def legacy_catalog_page(callback: CallbackQuery):
+    """catalog_page_<page>"""
+    page = _legacy_id(callback)
+    if page is None:
+        return await answer_outdated(callback)
+    await catalog.callback_catalog_page(callback, CatalogPage(page=page))
+
+
+@router.callback_query(F.data.startswith("catalog_type_"))
+async def legacy_catalog_type(callback: CallbackQuery):
+    """catalog_type_<тип>"""
+    try:
+        project_type = ProjectType(callback.data.rsplit("_", 1)[-1])
+    except ValueError:
+        return await answer_outdated(callback)
+    await catalog.callback_catalog_page(callback, CatalogPage(page=0, project_type=project_type))
+
+
+@router.callback_query(F.data.startswith("project_"))
+async def legacy_project(callback: CallbackQuery, session: AsyncSession):
+    """project_<id>"""
+    project_id = _legacy_id(callback)
+    if project_id is None:
+        return await answer_outdated(callback)
+    await catalog.callback_project_details(callback, session, ProjectCard(project_id=project_id))
+
+
+@router.callback_query(F.data.startswith("add_cart_"))
+async def legacy_add_to_cart(callback: CallbackQuery, session: AsyncSession):
+    """add_cart_<id>"""
+    project_id = _legacy_id(callback)
+    if project_id is None:
+        return await answer_outdated(callback)
+    await catalog.callback_add_to_cart(callback, session, AddToCart(project_id=project_id))
+
+
+@router.callback_query(F.data.startswith("remove_cart_"))
+async def legacy_remove_from_cart(callback: CallbackQuery, session: AsyncSession):
+    """remove_cart_<id>"""
+    project_id = _legacy_id(callback)
+    if project_id is None:
+        return await answer_outdated(callback)
+    await catalog.callback_remove_from_cart(callback, session, RemoveFromCart(project_id=project_id))
+
+
+@router.callback_query(F.data.startswith("buy_now_"))
+async def legacy_buy_now(callback: CallbackQuery, session: AsyncSession):
+    """buy_now_<id>"""
+    project_id = _legacy_id(callback)
+    if project_id is None:
+        return await answer_outdated(callback)
+    await cart.callback_buy_now(callback, session, BuyNow(project_id=project_id))
+
+
+@router.callback_query(F.data.startswith("download_"))
+async def legacy_download(callback: CallbackQuery, session: AsyncSession):
+    """download_<id>"""
+    project_id = _legacy_id(callback)
+    if project_id is None:
+        return await answer_outdated(callback)
+    await catalog.callback_download_project(callback, session, Download(project_id=project_id))
+
+
+@router.callback_query(F.data.startswith("order_details_"))
+async def legacy_order_details(callback: CallbackQuery, session: AsyncSession):
+    """order_details_<id>"""
+    order_id = _legacy_id(callback)
+    if order_id is None:
+        return await answer_outdated(callback)
+    await orders.callback_order_details(callback, session, OrderDetails(order_id=order_id))
+
+
+@router.callback_query(F.data.startswith("support_order_"))
+async def legacy_support_order(callback: CallbackQuery, state: FSMContext):
+    """support_order_<id>"""
+    order_id = _legacy_id(callback)
+    if order_id is None:
+        return await answer_outdated(callback)
+    await support.callback_support_order(callback, state, SupportOrder(order_id=order_id))
+
+
+@router.callback_query()
+async def callback_unhandled(callback: CallbackQuery):
+    """Кнопки админки старого формата и прочие callback'и без обработчика"""
+    await answer_outdated(callback)
@@ -1,7 +1,9 @@
 """
 Обработчики заказов (индивидуальных и покупок)
 """
-from aiogram import Router, F
+from typing import List, Optional
+
+from aiogram import F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,10 +11,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from bot.database import crud
 from bot.database.models import ProjectType, OrderStatus
 from bot.keyboards import user as kb
+from bot.keyboards.callbacks import OrderDetails, OrderType
+from bot.services import order_files
 from bot.states.order import OrderStates
 from bot.utils.helpers import format_price, format_datetime, get_order_status_emoji, get_order_status_text
+from bot.utils.routing import CallbackRouter
+from config import settings
 
-router = Router()
+router = CallbackRouter()
 
 
 # ============== МОИ ЗАКАЗЫ ==============
@@ -38,7 +44,7 @@ async def callback_my_purchases(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Ошибка", show_alert=True)
         return
     
-    purchases = await crud.get_user_purchases(session, user.id)
+    purchases = await crud.get_user_purchase_rows(session, user.id)
     
     if not purchases:
         await callback.message.edit_text(
@@ -53,12 +59,11 @@ async def callback_my_purchases(callback: CallbackQuery, session: AsyncSession):
     purchases_text = "📦 <b>Мои покупки</b>\n\n"
     
     for i, purchase in enumerate(purchases, start=1):
-        project = purchase.project
         purchases_text += (
-            f"{i}. <b>{project.title}</b>\n"
+            f"{i}. <b>{purchase.title}</b>\n"
             f"   💰 {format_price(purchase.price)}\n"
             f"   📅 {format_datetime(purchase.created_at)}\n"
-            f"   📥 /download_{project.id}\n\n"
+            f"   📥 /download_{purchase.project_id}\n\n"
         )
     
     await callback.message.edit_text(
@@ -78,7 +83,7 @@ async def callback_my_custom_orders(callback: CallbackQuery, session: AsyncSessi
         await callback.answer("❌ Ошибка", show_alert=True)
         return
     
-    orders = await crud.get_user_orders(session, user.id)
+    orders = await crud.get_user_order_rows(session, user.id)
     
     if not orders:
         await callback.message.edit_text(
@@ -107,7 +112,7 @@ async def callback_my_custom_orders(callback: CallbackQuery, session: AsyncSessi
         
         builder.row(InlineKeyboardButton(
             text=f"{status_emoji} Заказ #{order.id}",
-            callback_data=f"order_details_{order.id}"
+            callback_data=OrderDetails(order_id=order.id).pack()
         ))
     
     builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="my_orders"))
@@ -120,10 +125,10 @@ async def callback_my_custom_orders(callback: CallbackQuery, session: AsyncSessi
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("order_details_"))
-async def callback_order_details(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(OrderDetails.filter())
+async def callback_order_details(callback: CallbackQuery, session: AsyncSession, callback_data: OrderDetails):
     """Показать детали заказа"""
-    order_id = int(callback.data.split("_")[-1])
+    order_id = callback_data.order_id
     
     user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
     if not user:
@@ -222,10 +227,10 @@ async def callback_create_order(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(OrderStates.waiting_for_type, F.data.startswith("order_type_"))
-async def callback_order_type(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(OrderStates.waiting_for_type, OrderType.filter())
+async def callback_order_type(callback: CallbackQuery, state: FSMContext, callback_data: OrderType):
     """Выбран тип заказа"""
-    project_type = callback.data.split("_")[-1]
+    project_type = callback_data.project_type.value
     
     await state.update_data(project_type=project_type)
     
@@ -337,13 +342,59 @@ async def skip_budget(callback: CallbackQuery, state: FSMContext):
 async def process_order_contact(message: Message, state: FSMContext):
     """Получены контакты"""
     await state.update_data(contact_info=message.text)
-    await finalize_order(message, state)
+    await ask_order_files(message, state)
 
 
 @router.callback_query(OrderStates.waiting_for_contact, F.data == "skip_contact")
 async def skip_contact(callback: CallbackQuery, state: FSMContext):
     """Пропустить контакты"""
     await state.update_data(contact_info=None)
+    await ask_order_files(callback.message, state)
+    await callback.answer()
+
+
+async def ask_order_files(message: Message, state: FSMContext):
+    """Попросить файлы к заказу"""
+    await message.answer(
+        "📎 <b>Прикрепите файлы к заказу:</b>\n\n"
+        "ТЗ, методичку, примеры — документами или фото, можно сразу несколько",
+        reply_markup=kb.get_order_files_keyboard(),
+        parse_mode="HTML"
+    )
+    await state.set_state(OrderStates.waiting_for_files)
+
+
+@router.message(OrderStates.waiting_for_files, F.document | F.photo | F.video)
+async def process_order_files(message: Message, state: FSMContext, album: Optional[List[Message]] = None):
+    """Файлы заказа: альбом приходит одним событием — одно обновление состояния и один ответ"""
+    data = await state.get_data()
+    files = data.get('files', [])
+    accepted, rejected = await order_files.accept_files(
+        message.bot, album or [message], len(files), settings.order_max_files
+    )
+    files += accepted
+    await state.update_data(files=files)
+    
+    text = f"📎 Прикреплено файлов: <b>{len(files)}</b>\n"
+    if rejected:
+        text += "\n❌ Не приняты:\n" + "\n".join(f"• {error}" for error in rejected) + "\n"
+    text += "\nОтправьте еще файлы или нажмите 'Готово'"
+    
+    await message.answer(text, reply_markup=kb.get_order_files_keyboard(bool(files)), parse_mode="HTML")
+
+
+@router.message(OrderStates.waiting_for_files)
+async def process_order_files_invalid(message: Message):
+    """На шаге файлов пришел текст или стикер"""
+    await message.answer(
+        "❌ Отправьте файл документом или фото, либо нажмите 'Пропустить'",
+        reply_markup=kb.get_order_files_keyboard()
+    )
+
+
+@router.callback_query(OrderStates.waiting_for_files, F.data == "order_files_done")
+async def callback_order_files_done(callback: CallbackQuery, state: FSMContext):
+    """Файлы прикреплены (или пропущены)"""
     await finalize_order(callback.message, state)
     await callback.answer()
 
@@ -376,6 +427,9 @@ async def finalize_order(message: Message, state: FSMContext):
     if data.get('contact_info'):
         summary += f"<b>Контакты:</b> {data['contact_info']}\n\n"
     
+    if data.get('files'):
+        summary += f"<b>Файлы:</b> {len(data['files'])}\n\n"
+    
     summary += "Подтвердите создание заказа:"
     
     await message.answer(
@@ -406,7 +460,8 @@ async def callback_confirm_order(callback: CallbackQuery, state: FSMContext, ses
         technologies=data['technologies'],
         deadline=data.get('deadline'),
         budget=data.get('budget'),
-        contact_info=data.get('contact_info')
+        contact_info=data.get('contact_info'),
+        attachments=data.get('files', [])
     )
     
     await callback.message.edit_text(
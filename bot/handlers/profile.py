@@ -1,7 +1,7 @@
 """
 Обработчики профиля пользователя
 """
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,8 +10,9 @@ from bot.database import crud
 from bot.keyboards import user as kb
 from bot.states.order import EditProfileStates
 from bot.utils.helpers import format_datetime
+from bot.utils.routing import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.callback_query(F.data == "profile")
@@ -24,8 +25,8 @@ async def callback_profile(callback: CallbackQuery, session: AsyncSession):
         return
     
     # Получаем статистику
-    purchases = await crud.get_user_purchases(session, user.id)
-    orders = await crud.get_user_orders(session, user.id)
+    purchases = await crud.get_user_purchase_rows(session, user.id)
+    orders = await crud.get_user_order_rows(session, user.id)
     
     profile_text = (
         "👤 <b>Ваш профиль</b>\n\n"
@@ -70,8 +71,8 @@ async def callback_profile_stats(callback: CallbackQuery, session: AsyncSession)
         await callback.answer("❌ Ошибка", show_alert=True)
         return
     
-    purchases = await crud.get_user_purchases(session, user.id)
-    orders = await crud.get_user_orders(session, user.id)
+    purchases = await crud.get_user_purchase_rows(session, user.id)
+    orders = await crud.get_user_order_rows(session, user.id)
     
     total_spent = sum(p.price for p in purchases)
     
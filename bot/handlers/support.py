@@ -1,17 +1,19 @@
 """
 Обработчики поддержки
 """
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
 from bot.keyboards import user as kb
+from bot.keyboards.callbacks import SupportOrder
 from bot.states.order import SupportStates
 from bot.utils.helpers import format_datetime
+from bot.utils.routing import CallbackRouter
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.callback_query(F.data == "support")
@@ -170,11 +172,9 @@ async def callback_my_tickets(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("support_order_"))
-async def callback_support_order(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(SupportOrder.filter())
+async def callback_support_order(callback: CallbackQuery, state: FSMContext, callback_data: SupportOrder):
     """Поддержка по конкретному заказу"""
-    order_id = callback.data.split("_")[-1]
-    
-    await state.update_data(order_id=order_id)
+    await state.update_data(order_id=callback_data.order_id)
     await callback_create_ticket(callback, state)
 
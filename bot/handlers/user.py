@@ -1,7 +1,7 @@
 """
 Основные обработчики команд пользователя
 """
-from aiogram import Router, F
+from aiogram import F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
@@ -9,9 +9,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
 from bot.keyboards import user as kb
+from bot.utils.routing import CallbackRouter
 from config import settings
 
-router = Router()
+router = CallbackRouter()
 
 
 @router.message(Command("start"))
@@ -51,8 +52,8 @@ async def cmd_start(message: Message, session: AsyncSession):
         )
     else:
         # Получаем немного статистики для персонализации
-        purchases = await crud.get_user_purchases(session, user.id)
-        orders = await crud.get_user_orders(session, user.id)
+        purchases = await crud.get_user_purchase_rows(session, user.id)
+        orders = await crud.get_user_order_rows(session, user.id)
         
         welcome_text = (
             f"╔═══════════════════════╗\n"
@@ -4,6 +4,8 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from bot.keyboards.callbacks import AdminOrderAction, AdminUserAction, BroadcastAudience
+
 
 def get_admin_menu() -> InlineKeyboardMarkup:
     """Главное меню администратора"""
@@ -81,30 +83,30 @@ def get_admin_order_actions_keyboard(order_id: int, current_status: str) -> Inli
     # Кнопки изменения статуса в зависимости от текущего
     if current_status == "new":
         builder.row(
-            InlineKeyboardButton(text="✅ Принять", callback_data=f"admin_order_accept_{order_id}"),
-            InlineKeyboardButton(text="❌ Отклонить", callback_data=f"admin_order_reject_{order_id}")
+            InlineKeyboardButton(text="✅ Принять", callback_data=AdminOrderAction(action="accept", order_id=order_id).pack()),
+            InlineKeyboardButton(text="❌ Отклонить", callback_data=AdminOrderAction(action="reject", order_id=order_id).pack())
         )
     elif current_status == "accepted":
         builder.row(
-            InlineKeyboardButton(text="⚙️ Начать работу", callback_data=f"admin_order_start_{order_id}")
+            InlineKeyboardButton(text="⚙️ Начать работу", callback_data=AdminOrderAction(action="start", order_id=order_id).pack())
         )
     elif current_status == "in_progress":
         builder.row(
-            InlineKeyboardButton(text="📋 Готово к проверке", callback_data=f"admin_order_ready_{order_id}")
+            InlineKeyboardButton(text="📋 Готово к проверке", callback_data=AdminOrderAction(action="ready", order_id=order_id).pack())
         )
     elif current_status == "ready_for_check":
         builder.row(
-            InlineKeyboardButton(text="✅ Завершить", callback_data=f"admin_order_complete_{order_id}")
+            InlineKeyboardButton(text="✅ Завершить", callback_data=AdminOrderAction(action="complete", order_id=order_id).pack())
         )
     
     builder.row(
-        InlineKeyboardButton(text="💰 Установить цену", callback_data=f"admin_order_price_{order_id}")
+        InlineKeyboardButton(text="💰 Установить цену", callback_data=AdminOrderAction(action="price", order_id=order_id).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="📎 Прикрепить файлы", callback_data=f"admin_order_files_{order_id}")
+        InlineKeyboardButton(text="📎 Прикрепить файлы", callback_data=AdminOrderAction(action="files", order_id=order_id).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="💬 Добавить комментарий", callback_data=f"admin_order_comment_{order_id}")
+        InlineKeyboardButton(text="💬 Добавить комментарий", callback_data=AdminOrderAction(action="comment", order_id=order_id).pack())
     )
     builder.row(
         InlineKeyboardButton(text="◀️ Назад", callback_data="admin_orders")
@@ -135,16 +137,16 @@ def get_broadcast_audience_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     builder.row(
-        InlineKeyboardButton(text="👥 Всем пользователям", callback_data="broadcast_audience_all")
+        InlineKeyboardButton(text="👥 Всем пользователям", callback_data=BroadcastAudience(audience="all").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="💎 С покупками", callback_data="broadcast_audience_buyers")
+        InlineKeyboardButton(text="💎 С покупками", callback_data=BroadcastAudience(audience="buyers").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🆕 Без покупок", callback_data="broadcast_audience_non_buyers")
+        InlineKeyboardButton(text="🆕 Без покупок", callback_data=BroadcastAudience(audience="non_buyers").pack())
     )
     builder.row(
-        InlineKeyboardButton(text="🔥 Активным", callback_data="broadcast_audience_active")
+        InlineKeyboardButton(text="🔥 Активным", callback_data=BroadcastAudience(audience="active").pack())
     )
     builder.row(
         InlineKeyboardButton(text="◀️ Назад", callback_data="admin_broadcast")
@@ -202,15 +204,15 @@ def get_admin_user_actions_keyboard(user_id: int, is_blocked: bool) -> InlineKey
     
     if is_blocked:
         builder.row(
-            InlineKeyboardButton(text="✅ Разблокировать", callback_data=f"admin_unblock_{user_id}")
+            InlineKeyboardButton(text="✅ Разблокировать", callback_data=AdminUserAction(action="unblock", user_id=user_id).pack())
         )
     else:
         builder.row(
-            InlineKeyboardButton(text="🚫 Заблокировать", callback_data=f"admin_block_{user_id}")
+            InlineKeyboardButton(text="🚫 Заблокировать", callback_data=AdminUserAction(action="block", user_id=user_id).pack())
         )
     
     builder.row(
-        InlineKeyboardButton(text="📦 История заказов", callback_data=f"admin_user_orders_{user_id}")
+        InlineKeyboardButton(text="📦 История заказов", callback_data=AdminUserAction(action="orders", user_id=user_id).pack())
     )
     builder.row(
         InlineKeyboardButton(text="◀️ Назад", callback_data="admin_users")
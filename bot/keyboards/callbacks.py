@@ -0,0 +1,133 @@
+"""
+Фабрики callback_data для кнопок с параметрами
+
+Кнопки без параметров остаются строковыми константами ("catalog", "cart").
+Префиксы фабрик не пересекаются: за префиксом всегда идет разделитель,
+поэтому "prj:" не совпадет с "prjx:".
+"""
+from typing import Optional
+
+from bot.database.models import ProjectType, ProjectLevel
+from bot.utils.callback_data import CompactCallbackData
+
+
+# ============== КАТАЛОГ ==============
+
+class CatalogPage(CompactCallbackData, prefix='cat'):
+    """Страница каталога: номер и фильтр по типу"""
+    page: int = 0
+    project_type: Optional[ProjectType] = None
+
+
+class ProjectCard(CompactCallbackData, prefix='prj'):
+    """Карточка проекта; page — страница каталога для кнопки 'Назад'"""
+    project_id: int
+    page: int = 0
+
+
+class AddToCart(CompactCallbackData, prefix='cadd'):
+    """Добавить проект в корзину"""
+    project_id: int
+    page: int = 0
+
+
+class RemoveFromCart(CompactCallbackData, prefix='cdel'):
+    """Убрать проект из корзины"""
+    project_id: int
+    page: int = 0
+
+
+class BuyNow(CompactCallbackData, prefix='buy'):
+    """Купить проект сразу"""
+    project_id: int
+
+
+class Download(CompactCallbackData, prefix='dl'):
+    """Скачать купленный проект"""
+    project_id: int
+
+
+# ============== ЗАКАЗЫ И ПОДДЕРЖКА ==============
+
+class OrderDetails(CompactCallbackData, prefix='ord'):
+    """Детали индивидуального заказа"""
+    order_id: int
+
+
+class OrderType(CompactCallbackData, prefix='otype'):
+    """Тип работы в новом заказе"""
+    project_type: ProjectType
+
+
+class SupportOrder(CompactCallbackData, prefix='sord'):
+    """Обращение в поддержку по заказу"""
+    order_id: int
+
+
+# ============== АДМИН: ПРОЕКТЫ ==============
+
+class AdminProject(CompactCallbackData, prefix='aprj'):
+    """Меню редактирования проекта"""
+    project_id: int
+
+
+class AdminProjectEdit(CompactCallbackData, prefix='aedit'):
+    """Изменить поле проекта (field — имя колонки Project)"""
+    project_id: int
+    field: str
+
+
+class ToggleProjectActive(CompactCallbackData, prefix='aact'):
+    """Включить/выключить проект"""
+    project_id: int
+
+
+class DeleteProject(CompactCallbackData, prefix='adel'):
+    """Удаление проекта: сначала вопрос, с confirmed=True — удаление"""
+    project_id: int
+    confirmed: bool = False
+
+
+class NewProjectCategory(CompactCallbackData, prefix='npc'):
+    """Мастер добавления проекта: категория"""
+    category_id: int
+
+
+class NewProjectType(CompactCallbackData, prefix='npt'):
+    """Мастер добавления проекта: тип работы"""
+    project_type: ProjectType
+
+
+class NewProjectLevel(CompactCallbackData, prefix='npl'):
+    """Мастер добавления проекта: сложность"""
+    level: ProjectLevel
+
+
+# ============== АДМИН: КАТЕГОРИИ, ЗАКАЗЫ, ПОЛЬЗОВАТЕЛИ, РАССЫЛКА ==============
+
+class AdminCategory(CompactCallbackData, prefix='acat'):
+    """Карточка категории"""
+    category_id: int
+
+
+class DeleteCategory(CompactCallbackData, prefix='dcat'):
+    """Удаление категории: сначала вопрос, с confirmed=True — удаление"""
+    category_id: int
+    confirmed: bool = False
+
+
+class AdminOrderAction(CompactCallbackData, prefix='aord'):
+    """Действие с заказом (accept, reject, start, ready, complete, price, files, comment)"""
+    action: str
+    order_id: int
+
+
+class AdminUserAction(CompactCallbackData, prefix='ausr'):
+    """Действие с пользователем (block, unblock, orders)"""
+    action: str
+    user_id: int
+
+
+class BroadcastAudience(CompactCallbackData, prefix='bca'):
+    """Аудитория рассылки (all, buyers, non_buyers, active)"""
+    audience: str
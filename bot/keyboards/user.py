@@ -5,6 +5,11 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeybo
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from typing import List, Optional
 
+from bot.database.models import ProjectType
+from bot.keyboards.callbacks import (
+    CatalogPage, ProjectCard, AddToCart, RemoveFromCart, BuyNow, Download, SupportOrder, OrderType
+)
+
 
 def get_main_menu() -> InlineKeyboardMarkup:
     """Главное меню пользователя"""
@@ -43,16 +48,16 @@ def get_catalog_menu() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text="📚 Все проекты", callback_data="catalog_all")
     )
     builder.row(
-        InlineKeyboardButton(text="🎓 Дипломы", callback_data="catalog_type_diploma")
+        InlineKeyboardButton(text="🎓 Дипломы", callback_data=CatalogPage(project_type=ProjectType.DIPLOMA).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="📖 Курсовые", callback_data="catalog_type_coursework")
+        InlineKeyboardButton(text="📖 Курсовые", callback_data=CatalogPage(project_type=ProjectType.COURSEWORK).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="📊 Презентации", callback_data="catalog_type_presentation")
+        InlineKeyboardButton(text="📊 Презентации", callback_data=CatalogPage(project_type=ProjectType.PRESENTATION).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="💻 Проекты", callback_data="catalog_type_project")
+        InlineKeyboardButton(text="💻 Проекты", callback_data=CatalogPage(project_type=ProjectType.PROJECT).pack())
     )
     builder.row(
         InlineKeyboardButton(text="🔍 Поиск", callback_data="catalog_search")
@@ -68,28 +73,48 @@ def get_project_card_keyboard(
     project_id: int,
     in_cart: bool = False,
     is_purchased: bool = False,
-    page: int = 0
+    page: int = 0,
+    project_type: Optional[ProjectType] = None
 ) -> InlineKeyboardMarkup:
     """Клавиатура для карточки проекта"""
     builder = InlineKeyboardBuilder()
     
     if is_purchased:
         builder.row(
-            InlineKeyboardButton(text="📥 Скачать", callback_data=f"download_{project_id}")
+            InlineKeyboardButton(text="📥 Скачать", callback_data=Download(project_id=project_id).pack())
         )
     else:
         if not in_cart:
             builder.row(
-                InlineKeyboardButton(text="🛒 В корзину", callback_data=f"add_cart_{project_id}"),
-                InlineKeyboardButton(text="💳 Купить сейчас", callback_data=f"buy_now_{project_id}")
+                InlineKeyboardButton(text="🛒 В корзину", callback_data=AddToCart(project_id=project_id, page=page).pack()),
+                InlineKeyboardButton(text="💳 Купить сейчас", callback_data=BuyNow(project_id=project_id).pack())
             )
         else:
             builder.row(
-                InlineKeyboardButton(text="❌ Убрать из корзины", callback_data=f"remove_cart_{project_id}")
+                InlineKeyboardButton(
+                    text="❌ Убрать из корзины",
+                    callback_data=RemoveFromCart(project_id=project_id, page=page).pack()
+                )
             )
     
     builder.row(
-        InlineKeyboardButton(text="◀️ Назад к каталогу", callback_data=f"catalog_page_{page}")
+        InlineKeyboardButton(text="◀️ Назад к каталогу", callback_data=CatalogPage(page=page, project_type=project_type).pack())
+    )
+    
+    return builder.as_markup()
+
+
+def get_search_results_keyboard(projects) -> InlineKeyboardMarkup:
+    """Найденные проекты (записи снимка каталога) кнопками"""
+    builder = InlineKeyboardBuilder()
+    
+    for project in projects:
+        builder.row(
+            InlineKeyboardButton(text=f"📦 {project.title}", callback_data=ProjectCard(project_id=project.id).pack())
+        )
+    builder.row(
+        InlineKeyboardButton(text="🔍 Искать еще", callback_data="catalog_search"),
+        InlineKeyboardButton(text="◀️ Каталог", callback_data="catalog")
     )
     
     return builder.as_markup()
@@ -98,7 +123,7 @@ def get_project_card_keyboard(
 def get_pagination_keyboard(
     page: int,
     total_pages: int,
-    prefix: str = "catalog"
+    project_type: Optional[ProjectType] = None
 ) -> InlineKeyboardMarkup:
     """Клавиатура с пагинацией"""
     builder = InlineKeyboardBuilder()
@@ -106,12 +131,12 @@ def get_pagination_keyboard(
     buttons = []
     
     if page > 0:
-        buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{prefix}_page_{page-1}"))
+        buttons.append(InlineKeyboardButton(text="⬅️", callback_data=CatalogPage(page=page - 1, project_type=project_type).pack()))
     
     buttons.append(InlineKeyboardButton(text=f"📄 {page+1}/{total_pages}", callback_data="current_page"))
     
     if page < total_pages - 1:
-        buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{prefix}_page_{page+1}"))
+        buttons.append(InlineKeyboardButton(text="➡️", callback_data=CatalogPage(page=page + 1, project_type=project_type).pack()))
     
     builder.row(*buttons)
     builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="catalog"))
@@ -146,8 +171,8 @@ def get_cart_item_keyboard(project_id: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     builder.row(
-        InlineKeyboardButton(text="👁 Подробнее", callback_data=f"project_{project_id}"),
-        InlineKeyboardButton(text="❌ Удалить", callback_data=f"remove_cart_{project_id}")
+        InlineKeyboardButton(text="👁 Подробнее", callback_data=ProjectCard(project_id=project_id).pack()),
+        InlineKeyboardButton(text="❌ Удалить", callback_data=RemoveFromCart(project_id=project_id).pack())
     )
     
     return builder.as_markup()
@@ -158,16 +183,16 @@ def get_order_types_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     builder.row(
-        InlineKeyboardButton(text="🎓 Диплом", callback_data="order_type_diploma")
+        InlineKeyboardButton(text="🎓 Диплом", callback_data=OrderType(project_type=ProjectType.DIPLOMA).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="📖 Курсовая", callback_data="order_type_coursework")
+        InlineKeyboardButton(text="📖 Курсовая", callback_data=OrderType(project_type=ProjectType.COURSEWORK).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="📊 Презентация", callback_data="order_type_presentation")
+        InlineKeyboardButton(text="📊 Презентация", callback_data=OrderType(project_type=ProjectType.PRESENTATION).pack())
     )
     builder.row(
-        InlineKeyboardButton(text="💻 Проект", callback_data="order_type_project")
+        InlineKeyboardButton(text="💻 Проект", callback_data=OrderType(project_type=ProjectType.PROJECT).pack())
     )
     builder.row(
         InlineKeyboardButton(text="❌ Отмена", callback_data="main_menu")
@@ -184,6 +209,17 @@ def get_skip_button(callback_data: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_order_files_keyboard(has_files: bool = False) -> InlineKeyboardMarkup:
+    """Клавиатура шага с файлами заказа"""
+    builder = InlineKeyboardBuilder()
+    if has_files:
+        builder.row(InlineKeyboardButton(text="✅ Готово", callback_data="order_files_done"))
+    else:
+        builder.row(InlineKeyboardButton(text="⏭ Пропустить", callback_data="order_files_done"))
+    builder.row(InlineKeyboardButton(text="❌ Отмена", callback_data="main_menu"))
+    return builder.as_markup()
+
+
 def get_confirm_keyboard(confirm_callback: str, cancel_callback: str = "main_menu") -> InlineKeyboardMarkup:
     """Клавиатура подтверждения"""
     builder = InlineKeyboardBuilder()
@@ -218,7 +254,7 @@ def get_order_details_keyboard(order_id: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
     builder.row(
-        InlineKeyboardButton(text="💬 Связаться с поддержкой", callback_data=f"support_order_{order_id}")
+        InlineKeyboardButton(text="💬 Связаться с поддержкой", callback_data=SupportOrder(order_id=order_id).pack())
     )
     builder.row(
         InlineKeyboardButton(text="◀️ Назад", callback_data="my_custom_orders")
@@ -0,0 +1,191 @@
+"""
+Middleware для раннего ответа на callback-запросы
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Awaitable, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.types import CallbackQuery, TelegramObject
+
+logger = logging.getLogger(__name__)
+
+
+class _AckState:
+    """Состояние ответа на один callback"""
+    __slots__ = ('callback_id', 'chat_id', 'route', 'started_at', 'answered', 'early', 'stats')
+
+    def __init__(self, callback: CallbackQuery, route: str, stats: "AckStats"):
+        self.callback_id = callback.id
+        self.chat_id = callback.message.chat.id if callback.message else callback.from_user.id
+        self.route = route
+        self.started_at = time.perf_counter()
+        self.answered = False
+        self.early = False
+        self.stats = stats
+
+
+_current_ack: ContextVar[Optional[_AckState]] = ContextVar('callback_ack', default=None)
+
+
+class _RouteStats:
+    """Время до ответа на callback для одного обработчика"""
+    __slots__ = ('count', 'total', 'max', 'early')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.early = 0
+
+
+class AckStats:
+    """Статистика времени ответа на callback'и по обработчикам"""
+
+    def __init__(self):
+        self.routes: Dict[str, _RouteStats] = {}
+        self._listeners: List[Callable[[str, float, bool], None]] = []
+
+    def on_record(self, listener: Callable[[str, float, bool], None]) -> None:
+        """Подписаться на каждый ответ: listener(route, elapsed, early) — экспорт в метрики"""
+        self._listeners.append(listener)
+
+    def record(self, route: str, elapsed: float, early: bool) -> None:
+        """Учесть ответ на callback"""
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = _RouteStats()
+        stats.count += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        if early:
+            stats.early += 1
+        for listener in self._listeners:
+            listener(route, elapsed, early)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Сводка: количество, среднее и максимальное время, число ранних ответов"""
+        return {
+            route: {
+                'count': s.count,
+                'avg': s.total / s.count,
+                'max': s.max,
+                'early': s.early,
+            }
+            for route, s in self.routes.items()
+        }
+
+
+async def answer_callback(
+    callback: CallbackQuery,
+    text: Optional[str] = None,
+    show_alert: bool = False
+) -> None:
+    """
+    Ответить на callback с учетом раннего ответа.
+
+    Если на callback уже ответил EarlyAnswerMiddleware, алерт отправляется
+    обычным сообщением, а всплывающая подсказка без алерта отбрасывается.
+    """
+    state = _current_ack.get()
+    if state is not None and state.callback_id == callback.id and state.answered:
+        if text and show_alert:
+            await callback.bot.send_message(state.chat_id, text)
+        return
+    await callback.answer(text, show_alert=show_alert)
+
+
+class EarlyAnswerMiddleware(BaseMiddleware):
+    """
+    Middleware для раннего ответа на callback-запросы.
+
+    Если обработчик не ответил за budget секунд, отвечает сам — клиент
+    убирает "часики", а медленный запрос не выходит за дедлайн Telegram.
+    Регистрируется на dp.callback_query вместе с CallbackAnswerRequestMiddleware.
+    """
+
+    def __init__(self, budget: float = 0.3):
+        super().__init__()
+        self.budget = budget
+        self.stats = AckStats()
+
+    @staticmethod
+    def _route(data: Dict[str, Any]) -> str:
+        handler = data.get('handler')
+        return handler.callback.__name__ if handler is not None else 'unknown'
+
+    async def _ack(self, callback: CallbackQuery, state: _AckState) -> None:
+        if state.answered:
+            return
+        state.early = True
+        token = _current_ack.set(state)
+        try:
+            await callback.answer()
+        except Exception as e:
+            logger.debug("Не удалось ответить на callback %s: %s", state.callback_id, e)
+        finally:
+            _current_ack.reset(token)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        state = _AckState(event, self._route(data), self.stats)
+        token = _current_ack.set(state)
+        timer = None
+
+        if self.budget <= 0:
+            await self._ack(event, state)
+        else:
+            timer = asyncio.get_running_loop().call_later(
+                self.budget,
+                lambda: asyncio.ensure_future(self._ack(event, state))
+            )
+
+        try:
+            return await handler(event, data)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            _current_ack.reset(token)
+            # Гарантируем ответ, даже если обработчик о нем забыл
+            await self._ack(event, state)
+
+
+class CallbackAnswerRequestMiddleware(BaseRequestMiddleware):
+    """
+    Request-middleware сессии бота: делает повторный answer() безопасным.
+
+    Обработчики продолжают вызывать callback.answer() в конце; если ранний
+    ответ уже ушел, вызов превращается в answer_callback (алерт — сообщением).
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Any:
+        if not isinstance(method, AnswerCallbackQuery):
+            return await make_request(bot, method)
+
+        state = _current_ack.get()
+        if state is None or state.callback_id != method.callback_query_id:
+            return await make_request(bot, method)
+
+        if state.answered:
+            if method.text and method.show_alert:
+                await bot.send_message(state.chat_id, method.text)
+            return True
+
+        # Отмечаем до await, чтобы параллельный ранний ответ не ушел вторым
+        state.answered = True
+        elapsed = time.perf_counter() - state.started_at
+        state.stats.record(state.route, elapsed, state.early)
+        return await make_request(bot, method)
@@ -0,0 +1,71 @@
+"""
+Middleware для подавления повторных нажатий inline-кнопок
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Awaitable, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+CallbackKey = Tuple[int, int, str]
+
+
+class CallbackCoalescingMiddleware(BaseMiddleware):
+    """
+    Middleware для отсечения дублей callback'ов.
+
+    Если тот же пользователь нажал ту же кнопку того же сообщения, пока
+    первый callback еще обрабатывается или завершился меньше window секунд
+    назад, дубль сразу получает answer() без обращения к БД и edit_text.
+    """
+
+    def __init__(self, window: float = 2.0):
+        super().__init__()
+        self.window = window
+        self.in_flight: Set[CallbackKey] = set()
+        self.completed: "OrderedDict[CallbackKey, float]" = OrderedDict()
+        self.coalesced = 0
+
+    def _purge(self, now: float) -> None:
+        """Удалить записи старше окна (они упорядочены по времени завершения)"""
+        while self.completed:
+            key, finished_at = next(iter(self.completed.items()))
+            if now - finished_at < self.window:
+                break
+            del self.completed[key]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None or callback.message is None:
+            return await handler(event, data)
+
+        key = (callback.from_user.id, callback.message.message_id, callback.data or "")
+        now = time.monotonic()
+        self._purge(now)
+
+        if key in self.in_flight or key in self.completed:
+            self.coalesced += 1
+            logger.debug("Повторное нажатие %s пропущено", key)
+            await callback.answer()
+            return None
+
+        self.in_flight.add(key)
+        handled = False
+        try:
+            result = await handler(event, data)
+            handled = True
+            return result
+        finally:
+            self.in_flight.discard(key)
+            # После ошибки повторное нажатие разрешено сразу
+            if handled:
+                self.completed[key] = time.monotonic()
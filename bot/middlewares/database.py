@@ -1,26 +1,109 @@
 """
 Middleware для работы с базой данных
 """
-from typing import Callable, Dict, Any, Awaitable
+import time
+from typing import Callable, Dict, Any, Awaitable, Optional
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class LazySession:
+    """
+    Прокси AsyncSession: сессия создается при первом обращении.
+
+    Обработчики навигации, которые не ходят в БД, не занимают соединение пула.
+    """
+    __slots__ = ('_session_pool', '_session', 'opened_at')
+
+    def __init__(self, session_pool: async_sessionmaker):
+        self._session_pool = session_pool
+        self._session: Optional[AsyncSession] = None
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_opened(self) -> bool:
+        """Была ли сессия создана"""
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_pool()
+            self.opened_at = time.perf_counter()
+        return getattr(self._session, name)
+
+    async def release(self) -> None:
+        """Закрыть сессию и вернуть соединение в пул"""
+        if self._session is not None:
+            await self._session.close()
+
+
+class _RouteUsage:
+    """Использование пула одним обработчиком"""
+    __slots__ = ('updates', 'sessions', 'hold_total', 'hold_max')
+
+    def __init__(self):
+        self.updates = 0
+        self.sessions = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+
+class PoolUsageStats:
+    """Статистика использования пула соединений по обработчикам"""
+
+    def __init__(self):
+        self.routes: Dict[str, _RouteUsage] = {}
+
+    def record(self, route: str, hold_time: Optional[float]) -> None:
+        """Учесть апдейт; hold_time — None, если сессия не открывалась"""
+        usage = self.routes.get(route)
+        if usage is None:
+            usage = self.routes[route] = _RouteUsage()
+        usage.updates += 1
+        if hold_time is not None:
+            usage.sessions += 1
+            usage.hold_total += hold_time
+            usage.hold_max = max(usage.hold_max, hold_time)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Сводка: апдейты, открытые сессии, среднее и максимальное время удержания"""
+        return {
+            route: {
+                'updates': u.updates,
+                'sessions': u.sessions,
+                'hold_avg': u.hold_total / u.sessions if u.sessions else 0.0,
+                'hold_max': u.hold_max,
+            }
+            for route, u in self.routes.items()
+        }
 
 
 class DatabaseMiddleware(BaseMiddleware):
-    """Middleware для предоставления сессии БД в handlers"""
-    
+    """
+    Middleware для предоставления сессии БД в handlers.
+
+    Регистрируется на dp.message и dp.callback_query, чтобы знать обработчик:
+    в data['session'] передается LazySession, которая закрывается сразу после него.
+    """
+
     def __init__(self, session_pool: async_sessionmaker):
         super().__init__()
         self.session_pool = session_pool
-    
+        self.stats = PoolUsageStats()
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        async with self.session_pool() as session:
-            data['session'] = session
+        session = LazySession(self.session_pool)
+        data['session'] = session
+        try:
             return await handler(event, data)
-
+        finally:
+            await session.release()
+            route = data['handler'].callback.__name__ if 'handler' in data else 'unknown'
+            hold_time = time.perf_counter() - session.opened_at if session.is_opened else None
+            self.stats.record(route, hold_time)
@@ -0,0 +1,99 @@
+"""
+Middleware для сборки альбомов (media group) в одно событие
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Any, Awaitable, Iterable, List, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+AlbumKey = Tuple[int, str]
+
+# Больше частей в одном альбоме Telegram не присылает
+MAX_ALBUM_SIZE = 10
+
+
+class _Album:
+    """Части альбома, пришедшие за окно ожидания"""
+    __slots__ = ('messages', 'grew', 'complete')
+
+    def __init__(self, message: Message):
+        self.messages: List[Message] = [message]
+        self.grew = asyncio.Event()
+        self.complete = asyncio.Event()
+
+
+class MediaGroupMiddleware(BaseMiddleware):
+    """
+    Middleware для объединения частей альбома.
+
+    Telegram присылает каждый файл альбома отдельным апдейтом с общим
+    media_group_id. Первая часть ждет остальные, пока они приходят чаще
+    чем раз в latency секунд (или пока не наберется 10 частей), и
+    проходит дальше одна — с data['album'] (все части по порядку).
+    Остальные апдейты альбома на этом заканчиваются. Регистрируется как
+    outer-middleware апдейтов до очереди чата и flood control: альбом
+    занимает одно место в очереди и стоит как один апдейт.
+
+    Собираются только альбомы в состояниях states (FSM-состояние уже
+    известно: FSMContextMiddleware — первый outer-middleware апдейтов).
+    В остальных состояниях обработчики не читают album, и каждая часть
+    проходит отдельным апдейтом, как без middleware.
+    """
+
+    def __init__(self, states: Iterable[str], latency: float = 0.5, max_wait: float = 3.0):
+        super().__init__()
+        self.states = frozenset(states)
+        self.latency = latency
+        self.max_wait = max_wait
+        self.albums: Dict[AlbumKey, _Album] = {}
+        self.merged = 0
+
+    async def _collect(self, album: _Album) -> None:
+        """Ждать, пока приходят новые части"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while not album.complete.is_set():
+            timeout = min(self.latency, deadline - loop.time())
+            if timeout <= 0:
+                return
+            album.grew.clear()
+            try:
+                await asyncio.wait_for(album.grew.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        message = event.message if isinstance(event, Update) else None
+        if message is None or not message.media_group_id or data.get('raw_state') not in self.states:
+            return await handler(event, data)
+
+        key = (message.chat.id, message.media_group_id)
+        album = self.albums.get(key)
+        if album is not None:
+            # Не первая часть — отдаем ее ожидающей первой
+            album.messages.append(message)
+            album.grew.set()
+            if len(album.messages) >= MAX_ALBUM_SIZE:
+                album.complete.set()
+            self.merged += 1
+            return None
+
+        album = self.albums[key] = _Album(message)
+        try:
+            await self._collect(album)
+        finally:
+            # Части, пришедшие после окна, станут новым альбомом с тем же media_group_id
+            self.albums.pop(key, None)
+
+        data['album'] = sorted(album.messages, key=lambda part: part.message_id)
+        logger.debug("Альбом %s: %d частей", key, len(album.messages))
+        return await handler(event, data)
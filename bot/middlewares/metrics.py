@@ -0,0 +1,86 @@
+"""
+Middleware для сбора метрик (см. bot/services/metrics.py)
+"""
+import time
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from bot.services import metrics
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Outer-middleware dp.update: апдейты по типу, полное время обработки,
+    исключения и число апдейтов в обработке.
+
+    Регистрируется первым, чтобы учитывать и отброшенные throttling/coalescing апдейты.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        update_type = event.event_type
+        metrics.updates_total.inc(update_type)
+        metrics.handlers_in_flight.inc()
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            metrics.update_errors_total.inc(update_type)
+            raise
+        finally:
+            metrics.handlers_in_flight.dec()
+            metrics.update_duration.observe(time.perf_counter() - started_at, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner-middleware dp.message и dp.callback_query: время и ошибки по обработчикам.
+
+    Роутер — модуль обработчика (catalog, cart, admin, ...).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = data['handler'].callback if 'handler' in data else None
+        router = callback.__module__.rsplit('.', 1)[-1] if callback else 'unknown'
+        name = callback.__name__ if callback else 'unknown'
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            metrics.handler_errors_total.inc(router, name)
+            raise
+        finally:
+            metrics.handler_duration.observe(time.perf_counter() - started_at, router, name)
+
+
+class TelegramAPIMetricsMiddleware(BaseRequestMiddleware):
+    """Request-middleware сессии бота: время и ошибки запросов к Bot API по методам"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Any:
+        api_method = method.__api_method__
+        started_at = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            metrics.telegram_api_errors_total.inc(api_method)
+            raise
+        finally:
+            metrics.telegram_api_duration.observe(time.perf_counter() - started_at, api_method)
@@ -0,0 +1,133 @@
+"""
+Request-middleware для соблюдения лимитов Telegram на исходящие сообщения
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMediaGroup, TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+# Методы, создающие новые сообщения: на них действуют лимиты Telegram
+LIMITED_METHODS = frozenset({
+    'sendMessage', 'sendDocument', 'sendPhoto', 'sendVideo', 'sendAudio', 'sendVoice',
+    'sendAnimation', 'sendSticker', 'sendMediaGroup', 'copyMessage', 'forwardMessage',
+})
+
+
+class _Schedule:
+    """
+    Расписание отправок с одним лимитом (GCRA).
+
+    tat — момент, к которому "оплачены" все уже разрешенные отправки;
+    отправка стоимостью cost разрешена, когда tat + cost/rate - burst/rate <= now.
+    Отправка дороже запаса (альбом из 10 частей) ждет только полного запаса,
+    а переплату отрабатывают следующие отправки.
+    """
+    __slots__ = ('rate', 'burst', 'tat')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tat = 0.0
+
+    def delay(self, now: float, cost: float) -> float:
+        """Через сколько секунд можно отправить"""
+        return max(0.0, max(self.tat, now) + (min(cost, self.burst) - self.burst) / self.rate - now)
+
+    def reserve(self, at: float, cost: float) -> None:
+        """Занять место в расписании на момент at"""
+        self.tat = max(self.tat, at) + cost / self.rate
+
+    def block(self, until: float) -> None:
+        """Не отправлять до until (после 429), затем — без запаса"""
+        self.tat = max(self.tat, until + (self.burst - 1) / self.rate)
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    """
+    Request-middleware сессии бота: выравнивает исходящие сообщения.
+
+    Общий лимит бота (около 30 сообщений в секунду), лимит личного чата
+    (около 1 в секунду с небольшим запасом) и группы (20 в минуту).
+    Запрос, превышающий лимит, не отклоняется, а ждет своей очереди;
+    альбом sendMediaGroup стоит столько сообщений, сколько в нем частей.
+    Если Telegram все же вернул 429, чат блокируется на retry_after и
+    запрос повторяется (до max_retries раз).
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_chats: int = 10_000
+    ):
+        self.global_schedule = _Schedule(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self.chats: Dict[Union[int, str], _Schedule] = {}
+        self.delayed = 0
+        self.retried = 0
+
+    def _chat(self, chat_id: Union[int, str], now: float) -> _Schedule:
+        schedule = self.chats.get(chat_id)
+        if schedule is None:
+            if len(self.chats) >= self.max_chats:
+                # Чаты с пустым расписанием лимиту уже не мешают
+                self.chats = {key: value for key, value in self.chats.items() if value.tat > now}
+            # Группы и каналы: отрицательный id или @username
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            schedule = self.chats[chat_id] = _Schedule(rate, 1.0 if is_group else self.chat_burst)
+        return schedule
+
+    async def _wait_turn(self, chat_id: Optional[Union[int, str]], cost: float) -> None:
+        now = time.monotonic()
+        schedules = [self.global_schedule]
+        if chat_id is not None:
+            schedules.append(self._chat(chat_id, now))
+        delay = max(schedule.delay(now, cost) for schedule in schedules)
+        # Место резервируется до ожидания: следующие запросы встают в очередь за этим
+        for schedule in schedules:
+            schedule.reserve(now + delay, cost)
+        if delay > 0:
+            self.delayed += 1
+            await asyncio.sleep(delay)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Any:
+        if method.__api_method__ not in LIMITED_METHODS:
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, 'chat_id', None)
+        cost = len(method.media) if isinstance(method, SendMediaGroup) else 1
+        attempt = 0
+        while True:
+            await self._wait_turn(chat_id, cost)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.retried += 1
+                logger.warning("429 на %s в чат %s, повтор через %s с", method.__api_method__, chat_id, e.retry_after)
+                until = time.monotonic() + e.retry_after
+                if chat_id is not None:
+                    self._chat(chat_id, time.monotonic()).block(until)
+                await asyncio.sleep(e.retry_after)
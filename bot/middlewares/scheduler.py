@@ -0,0 +1,74 @@
+"""
+Middleware для упорядоченной обработки апдейтов
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """Очередь апдейтов одного чата"""
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """
+    Middleware для последовательной обработки апдейтов одного чата.
+
+    Апдейты одного пользователя выполняются строго по очереди (FIFO),
+    апдейты разных пользователей — параллельно. Регистрируется как
+    outer-middleware, чтобы FSM и сессия БД открывались уже внутри очереди.
+    """
+
+    def __init__(self, max_pending: int = 32):
+        super().__init__()
+        self.max_pending = max_pending
+        self.lanes: Dict[int, _Lane] = {}
+        self.dropped = 0
+
+    @staticmethod
+    def _resolve_key(data: Dict[str, Any]) -> Optional[int]:
+        """Ключ очереди: ID чата, иначе ID пользователя"""
+        context = data.get(EVENT_CONTEXT_KEY)
+        if context is None:
+            return None
+        return context.chat_id or context.user_id
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        key = self._resolve_key(data)
+        if key is None:
+            return await handler(event, data)
+
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = self.lanes[key] = _Lane()
+        elif lane.pending >= self.max_pending:
+            # Очередь переполнена — пользователь шлет апдейты быстрее, чем мы их обрабатываем
+            self.dropped += 1
+            logger.warning("Очередь чата %s переполнена, апдейт пропущен", key)
+            return None
+
+        lane.pending += 1
+        try:
+            async with lane.lock:
+                return await handler(event, data)
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                # Очередь опустела — удаляем ее, чтобы не копить память
+                self.lanes.pop(key, None)
@@ -0,0 +1,99 @@
+"""
+Middleware для учета SQL-запросов по обработчикам
+"""
+import logging
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.database.instrumentation import track_queries, shorten_statement
+from bot.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _RouteQueries:
+    """Запросы одного обработчика"""
+    __slots__ = ('updates', 'queries', 'db_time', 'db_time_max', 'n_plus_one')
+
+    def __init__(self):
+        self.updates = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.db_time_max = 0.0
+        self.n_plus_one = 0
+
+
+class SQLRouteStats:
+    """Статистика запросов к БД по обработчикам"""
+
+    def __init__(self):
+        self.routes: Dict[str, _RouteQueries] = {}
+
+    def record(self, route: str, queries: int, db_time: float, n_plus_one: bool) -> None:
+        """Учесть апдейт"""
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = _RouteQueries()
+        stats.updates += 1
+        stats.queries += queries
+        stats.db_time += db_time
+        stats.db_time_max = max(stats.db_time_max, db_time)
+        if n_plus_one:
+            stats.n_plus_one += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Сводка: апдейты, запросов на апдейт, время в БД (среднее и максимум), апдейты с N+1"""
+        return {
+            route: {
+                'updates': s.updates,
+                'queries_avg': s.queries / s.updates,
+                'db_time_avg': s.db_time / s.updates,
+                'db_time_max': s.db_time_max,
+                'n_plus_one': s.n_plus_one,
+            }
+            for route, s in self.routes.items()
+        }
+
+
+class SQLStatsMiddleware(BaseMiddleware):
+    """
+    Middleware для учета запросов к БД.
+
+    Регистрируется на dp.message и dp.callback_query: считает запросы и время
+    в БД на каждый апдейт и предупреждает, если один и тот же запрос
+    выполнился n_plus_one_threshold и более раз (N+1). Записи, ушедшие через
+    очередь писателя SQLite, выполняются в его задаче и здесь не учитываются.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 5):
+        super().__init__()
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.stats = SQLRouteStats()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        with track_queries() as queries:
+            try:
+                return await handler(event, data)
+            finally:
+                route = data['handler'].callback.__name__ if 'handler' in data else 'unknown'
+                repeated = queries.repeated(self.n_plus_one_threshold)
+                for statement, count in repeated:
+                    logger.warning("N+1 в %s: запрос выполнен %d раз: %s", route, count, shorten_statement(statement))
+                if queries.count:
+                    logger.debug(
+                        "SQL [%s]: %d запросов, %.1f мс",
+                        route, queries.count, queries.total * 1000
+                    )
+                self.stats.record(route, queries.count, queries.total, bool(repeated))
+                if queries.count:
+                    metrics.db_queries_per_update.observe(queries.count, route)
+                    metrics.db_time.observe(queries.total, route)
+                if repeated:
+                    metrics.db_n_plus_one_total.inc(route)
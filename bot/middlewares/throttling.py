@@ -0,0 +1,177 @@
+"""
+Middleware для ограничения частоты запросов (flood control)
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.middlewares.user_context import EVENT_CONTEXT_KEY
+from aiogram.types import TelegramObject, Update
+
+try:
+    from redis.asyncio import Redis
+except ImportError:  # redis не установлен — доступно только хранилище в памяти
+    Redis = None
+
+from bot.keyboards.callbacks import (
+    CatalogPage, ProjectCard, AddToCart, RemoveFromCart, Download, BuyNow, BroadcastAudience
+)
+from bot.utils.routing import PrefixTrie
+
+logger = logging.getLogger(__name__)
+
+
+# Стоимость callback'ов в токенах (по префиксу callback_data).
+# Навигация по каталогу дешевая, оплата и рассылка — дорогие.
+ROUTE_COSTS: Dict[str, float] = {
+    "catalog": 1,
+    CatalogPage.route_prefix(): 1,
+    ProjectCard.route_prefix(): 1,
+    AddToCart.route_prefix(): 2,
+    RemoveFromCart.route_prefix(): 2,
+    "clear_cart": 2,
+    Download.route_prefix(): 3,
+    "checkout": 5,
+    BuyNow.route_prefix(): 5,
+    "confirm_order": 5,
+    "confirm_create_project": 5,
+    BroadcastAudience.route_prefix(): 10,
+    "admin_stats": 5,
+}
+DEFAULT_COST = 1
+
+_ROUTE_TRIE: PrefixTrie[float] = PrefixTrie()
+for _prefix, _cost in ROUTE_COSTS.items():
+    _ROUTE_TRIE.add(_prefix, _cost)
+
+
+def get_route_cost(callback_data: Optional[str]) -> float:
+    """Стоимость callback'а по самому длинному совпавшему префиксу"""
+    if callback_data:
+        costs = _ROUTE_TRIE.match(callback_data)
+        if costs:
+            return costs[-1]
+    return DEFAULT_COST
+
+
+class _Bucket:
+    """Корзина токенов одного пользователя"""
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class MemoryBucketStore:
+    """Хранилище корзин в памяти процесса (LRU с ограничением размера)"""
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[int, _Bucket]" = OrderedDict()
+
+    async def consume(self, key: int, cost: float, rate: float, capacity: float) -> bool:
+        """Списать токены; False — лимит исчерпан"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(capacity, now)
+            if len(self._buckets) > self.max_size:
+                # Вытесняем самого давно неактивного пользователя
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated_at) * rate)
+            bucket.updated_at = now
+
+        if bucket.tokens < cost:
+            return False
+        bucket.tokens -= cost
+        return True
+
+
+class RedisBucketStore:
+    """Хранилище корзин в Redis (общие лимиты для нескольких реплик бота)"""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return allowed
+    """
+
+    def __init__(self, redis: "Redis", prefix: str = "throttle"):
+        self.redis = redis
+        self.prefix = prefix
+        self._script = redis.register_script(self.SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBucketStore":
+        """Создать хранилище по URL Redis"""
+        if Redis is None:
+            raise RuntimeError("Для REDIS_URL установите пакет redis")
+        return cls(Redis.from_url(url))
+
+    async def consume(self, key: int, cost: float, rate: float, capacity: float) -> bool:
+        """Списать токены; False — лимит исчерпан"""
+        allowed = await self._script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[rate, capacity, cost, time.time()]
+        )
+        return bool(allowed)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Middleware для ограничения частоты запросов пользователя.
+
+    Регистрируется как outer-middleware до DatabaseMiddleware: отклоненный
+    апдейт не открывает сессию БД, а callback получает только answer().
+    """
+
+    def __init__(
+        self,
+        store=None,
+        rate: float = 2.0,
+        capacity: float = 10.0
+    ):
+        super().__init__()
+        self.store = store or MemoryBucketStore()
+        self.rate = rate
+        self.capacity = capacity
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        context = data.get(EVENT_CONTEXT_KEY)
+        if context is None or context.user_id is None:
+            return await handler(event, data)
+
+        callback = event.callback_query if isinstance(event, Update) else None
+        cost = get_route_cost(callback.data) if callback else DEFAULT_COST
+
+        if await self.store.consume(context.user_id, cost, self.rate, self.capacity):
+            return await handler(event, data)
+
+        logger.debug("Пользователь %s превысил лимит запросов", context.user_id)
+        if callback:
+            await callback.answer("⏳ Слишком много запросов, подождите немного")
+        return None
@@ -0,0 +1,182 @@
+"""
+Снимок активного каталога в памяти
+
+Каталог небольшой, а читается на каждой странице, счетчике и поиске.
+Снимок — неизменяемая структура: компактные записи проектов (__slots__),
+отсортированные по id кортежи для каждого фильтра (тип, категория, тип +
+категория) и готовые счетчики. Читатели берут текущий снимок без блокировок:
+после изменения в админке строится новый снимок и подменяется одним
+присваиванием (copy-on-write), старый дочитывают те, кто его уже взял.
+
+Источник правды — БД: crud сообщает об изменениях, снимок пересобирается
+одним запросом. Пока пересборка идет, читатели ждут ее, чтобы админ сразу
+видел свое изменение.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database import crud
+from bot.database.engine import async_session_maker
+from bot.database.models import Category, Project, ProjectLevel, ProjectType
+
+logger = logging.getLogger(__name__)
+
+# Фильтр каталога: (тип проекта, id категории), None — без фильтра
+FilterKey = Tuple[Optional[ProjectType], Optional[int]]
+
+
+class ProjectEntry:
+    """Проект в снимке: только то, что нужно спискам каталога"""
+    __slots__ = (
+        'id', 'title', 'title_lower', 'project_type', 'level', 'category_id',
+        'category_name', 'price', 'discount_price', 'purchases_count',
+    )
+
+    def __init__(self, id: int, title: str, project_type: ProjectType, level: ProjectLevel, category_id: int,
+                 category_name: str, price: float, discount_price: Optional[float], purchases_count: int):
+        self.id = id
+        self.title = title
+        self.title_lower = title.lower()
+        self.project_type = project_type
+        self.level = level
+        self.category_id = category_id
+        self.category_name = category_name
+        self.price = price
+        self.discount_price = discount_price
+        self.purchases_count = purchases_count
+
+    @property
+    def current_price(self) -> float:
+        return self.discount_price if self.discount_price else self.price
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок активных проектов"""
+    __slots__ = ('version', 'projects', 'by_id', '_indexes')
+
+    def __init__(self, version: int, projects: Sequence[ProjectEntry]):
+        self.version = version
+        self.projects: Tuple[ProjectEntry, ...] = tuple(sorted(projects, key=lambda entry: entry.id))
+        self.by_id: Dict[int, ProjectEntry] = {entry.id: entry for entry in self.projects}
+
+        # Отсортированный кортеж для каждого фильтра: страница — срез, счетчик — len
+        groups: Dict[FilterKey, List[ProjectEntry]] = {(None, None): list(self.projects)}
+        for entry in self.projects:
+            for key in ((entry.project_type, None), (None, entry.category_id), (entry.project_type, entry.category_id)):
+                groups.setdefault(key, []).append(entry)
+        self._indexes: Dict[FilterKey, Tuple[ProjectEntry, ...]] = {
+            key: tuple(entries) for key, entries in groups.items()
+        }
+
+    def _index(self, project_type: Optional[ProjectType], category_id: Optional[int]) -> Tuple[ProjectEntry, ...]:
+        return self._indexes.get((project_type or None, category_id or None), ())
+
+    def count(self, project_type: Optional[ProjectType] = None, category_id: Optional[int] = None) -> int:
+        """Число активных проектов по фильтру"""
+        return len(self._index(project_type, category_id))
+
+    def page(self, project_type: Optional[ProjectType] = None, category_id: Optional[int] = None,
+             limit: int = 10, offset: int = 0) -> Tuple[ProjectEntry, ...]:
+        """Страница проектов по фильтру в порядке id"""
+        return self._index(project_type, category_id)[offset:offset + limit]
+
+    def search(self, query: str, project_type: Optional[ProjectType] = None, limit: int = 10) -> List[ProjectEntry]:
+        """Проекты, в названии которых есть все слова запроса"""
+        words = query.lower().split()
+        if not words:
+            return []
+        found = []
+        for entry in self._index(project_type, None):
+            if all(word in entry.title_lower for word in words):
+                found.append(entry)
+                if len(found) >= limit:
+                    break
+        return found
+
+
+async def load_snapshot(session: AsyncSession, version: int = 0) -> CatalogSnapshot:
+    """Собрать снимок из БД одним запросом (только нужные колонки)"""
+    result = await session.execute(
+        select(
+            Project.id, Project.title, Project.project_type, Project.level, Project.category_id,
+            Category.name, Project.price, Project.discount_price, Project.purchases_count,
+        )
+        .join(Category, Category.id == Project.category_id)
+        .where(Project.is_active == True)  # noqa: E712
+    )
+    return CatalogSnapshot(version, [ProjectEntry(*row) for row in result])
+
+
+class CatalogStore:
+    """Текущий снимок каталога и его пересборка по изменениям в crud"""
+
+    def __init__(self, session_pool: async_sessionmaker = async_session_maker):
+        self.session_pool = session_pool
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._stale = False
+        self._refresh: Optional[asyncio.Task] = None
+        self._first_load = asyncio.Lock()
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+        self.rebuilds = 0
+
+    def on_swap(self, listener: Callable[[CatalogSnapshot], None]) -> None:
+        """Подписаться на подмену снимка (кеши, построенные из старого снимка)"""
+        self._listeners.append(listener)
+
+    async def rebuild(self) -> CatalogSnapshot:
+        """Собрать новый снимок и подменить текущий"""
+        self._version += 1
+        async with self.session_pool() as session:
+            snapshot = await load_snapshot(session, self._version)
+        self._snapshot = snapshot
+        self.rebuilds += 1
+        for listener in self._listeners:
+            listener(snapshot)
+        logger.debug("Снимок каталога v%d: %d проектов", snapshot.version, len(snapshot.projects))
+        return snapshot
+
+    async def _refresh_loop(self) -> None:
+        # Изменения во время сборки помечают снимок устаревшим — собираем еще раз
+        while self._stale:
+            self._stale = False
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Снимок каталога не пересобран, остается v%d", self._version)
+                return
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        """Каталог изменился: пересобрать снимок в фоне"""
+        if self._snapshot is None:
+            # Снимка еще нет — первый читатель сам соберет свежий
+            return
+        self._stale = True
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def get(self) -> CatalogSnapshot:
+        """Текущий снимок (первый вызов и вызов во время пересборки — ждут ее)"""
+        refresh = self._refresh
+        if refresh is not None and not refresh.done():
+            await asyncio.shield(refresh)
+        snapshot = self._snapshot
+        if snapshot is None:
+            async with self._first_load:
+                if self._snapshot is None:
+                    await self.rebuild()
+            snapshot = self._snapshot
+        return snapshot
+
+    async def stop(self) -> None:
+        """Дождаться фоновой пересборки (при остановке бота)"""
+        if self._refresh is not None:
+            await asyncio.gather(self._refresh, return_exceptions=True)
+
+
+catalog_store = CatalogStore()
+crud.on_catalog_change(catalog_store.invalidate)
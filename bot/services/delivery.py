@@ -0,0 +1,257 @@
+"""
+Отправка файлов проектов и результатов заказов
+
+Файл загружается в Telegram один раз: file_id из ответа сохраняется в
+проекте, и дальше sendDocument передает только file_id — без чтения диска
+и загрузки байтов. Файл можно прикрепить и прямо из Telegram (админка),
+тогда локальный file_path не нужен.
+
+Результаты заказа уходят альбомами sendMediaGroup по 10 файлов, а если
+файлов много — одним ZIP (services/packaging.py); лимиты Telegram соблюдает
+OutboundRateLimiter сессии бота.
+"""
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional, Sequence, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import (
+    FSInputFile, InputMediaDocument, InputMediaPhoto, InputMediaVideo, Message
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from bot.database import crud
+from bot.database.models import AttachmentKind, Order, OrderStatus, Project
+from bot.services.order_files import OrderFile, attachment_file
+from bot.services.packaging import PackagingError, send_archive
+from bot.utils.uploads import KeyedLocks, is_stale_file_id
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Одна загрузка на проект: параллельные скачивания ждут первую и берут ее file_id
+_upload_locks: KeyedLocks[int] = KeyedLocks()
+
+
+class ProjectFileMissing(Exception):
+    """У проекта нет ни file_id, ни локального файла"""
+
+
+def has_project_file(project: Project) -> bool:
+    """Есть ли у проекта файл для отправки"""
+    return bool(project.file_id or project.file_path)
+
+
+def _has_local_file(project: Project) -> bool:
+    return bool(project.file_path) and os.path.exists(project.file_path)
+
+
+async def _send_by_file_id(bot: Bot, chat_id: int, project: Project, caption: str,
+                           session: AsyncSession) -> Optional[Message]:
+    """Отправить по file_id; None — file_id протух и его можно заменить загрузкой с диска"""
+    try:
+        return await bot.send_document(chat_id, document=project.file_id, caption=caption)
+    except TelegramBadRequest as e:
+        # Ошибки не про файл (чат не найден, бот заблокирован, подпись) — не повод терять file_id
+        if not is_stale_file_id(e):
+            raise
+        logger.warning("file_id проекта %s не принят Telegram: %s", project.id, e)
+        # Файл прикреплен из Telegram без копии на диске: file_id — единственная копия
+        if not _has_local_file(project):
+            raise ProjectFileMissing(project.file_path or '') from e
+        await crud.update_project(session, project, file_id=None)
+        return None
+
+
+async def _upload(bot: Bot, chat_id: int, project: Project, caption: str, session: AsyncSession) -> Message:
+    async with _upload_locks.hold(project.id):
+        # Пока ждали, файл мог загрузить другой обработчик
+        file_id = await session.scalar(select(Project.file_id).where(Project.id == project.id))
+        if file_id:
+            set_committed_value(project, 'file_id', file_id)
+            message = await _send_by_file_id(bot, chat_id, project, caption, session)
+            if message:
+                return message
+
+        if not _has_local_file(project):
+            raise ProjectFileMissing(project.file_path or '')
+
+        file_name = project.file_name or os.path.basename(project.file_path)
+        message = await bot.send_document(
+            chat_id, document=FSInputFile(project.file_path, filename=file_name), caption=caption
+        )
+        if message.document:
+            await crud.update_project(session, project, file_id=message.document.file_id, file_name=file_name)
+            logger.info("Файл проекта %s загружен в Telegram", project.id)
+        return message
+
+
+async def send_project_file(bot: Bot, chat_id: int, project: Project, session: AsyncSession,
+                            caption: str = '') -> Message:
+    """
+    Отправить файл проекта: по file_id, а если его нет — загрузить с диска
+    и запомнить file_id. ProjectFileMissing — файла нет нигде.
+    """
+    if project.file_id:
+        message = await _send_by_file_id(bot, chat_id, project, caption, session)
+        if message:
+            return message
+    return await _upload(bot, chat_id, project, caption, session)
+
+
+# ============== РЕЗУЛЬТАТЫ ЗАКАЗОВ ==============
+
+# Больше файлов в одном sendMediaGroup Telegram не принимает
+MEDIA_GROUP_LIMIT = 10
+
+InputMedia = Union[InputMediaDocument, InputMediaPhoto, InputMediaVideo]
+
+
+class DeliveryReport:
+    """Итог отправки файлов"""
+    __slots__ = ('sent', 'failed', 'requests', 'notified')
+
+    def __init__(self):
+        self.sent: List[OrderFile] = []
+        self.failed: List[OrderFile] = []
+        self.requests = 0
+        # Дошло ли до клиента сообщение о завершении заказа без файлов
+        self.notified = True
+
+
+def _media_source(file: OrderFile) -> Union[str, FSInputFile, None]:
+    if file.get('file_id'):
+        return file['file_id']
+    if file.get('path') and os.path.exists(file['path']):
+        return FSInputFile(file['path'], filename=file['name'])
+    return None
+
+
+def _input_media(file: OrderFile, caption: Optional[str]) -> InputMedia:
+    media = _media_source(file)
+    if file.get('media_type') == 'photo':
+        return InputMediaPhoto(media=media, caption=caption)
+    if file.get('media_type') == 'video':
+        return InputMediaVideo(media=media, caption=caption)
+    return InputMediaDocument(media=media, caption=caption)
+
+
+def _remember_file_id(file: OrderFile, message: Message) -> None:
+    """Запомнить file_id загруженного файла, чтобы больше не загружать"""
+    media = message.document or message.video or (message.photo[-1] if message.photo else None)
+    if media is not None:
+        file['file_id'] = media.file_id
+
+
+def _batches(files: Sequence[OrderFile]) -> List[List[OrderFile]]:
+    """
+    Альбомы до 10 файлов: документы группируются только с документами,
+    фото — с видео (ограничение sendMediaGroup)
+    """
+    documents = [file for file in files if file.get('media_type', 'document') == 'document']
+    visual = [file for file in files if file.get('media_type', 'document') != 'document']
+    batches = []
+    for group in (documents, visual):
+        batches.extend(group[i:i + MEDIA_GROUP_LIMIT] for i in range(0, len(group), MEDIA_GROUP_LIMIT))
+    return batches
+
+
+async def _send_one(bot: Bot, chat_id: int, file: OrderFile, caption: Optional[str]) -> Message:
+    media = _media_source(file)
+    if file.get('media_type') == 'photo':
+        return await bot.send_photo(chat_id, media, caption=caption)
+    if file.get('media_type') == 'video':
+        return await bot.send_video(chat_id, media, caption=caption)
+    return await bot.send_document(chat_id, media, caption=caption)
+
+
+async def send_files(bot: Bot, chat_id: int, files: Sequence[OrderFile], caption: str = '') -> DeliveryReport:
+    """
+    Отправить файлы альбомами по 10 (подпись — у первого файла).
+    Если альбом не ушел, его файлы отправляются по одному; file_id
+    загруженных с диска файлов записываются в словари files.
+    """
+    report = DeliveryReport()
+    sendable = []
+    for file in files:
+        (sendable if _media_source(file) is not None else report.failed).append(file)
+
+    for batch in _batches(sendable):
+        first_caption = caption or None
+        caption = ''
+        if len(batch) > 1:
+            report.requests += 1
+            try:
+                messages = await bot.send_media_group(
+                    chat_id, [_input_media(file, first_caption if i == 0 else None) for i, file in enumerate(batch)]
+                )
+                for file, message in zip(batch, messages):
+                    _remember_file_id(file, message)
+                report.sent.extend(batch)
+                continue
+            except TelegramAPIError as e:
+                logger.warning("Альбом из %d файлов в чат %s не отправлен: %s", len(batch), chat_id, e)
+
+        # Одиночный файл или неудачный альбом — по одному, чтобы один битый файл не держал остальные
+        for i, file in enumerate(batch):
+            report.requests += 1
+            try:
+                message = await _send_one(bot, chat_id, file, first_caption if i == 0 else None)
+            except TelegramAPIError as e:
+                logger.warning("Файл %s в чат %s не отправлен: %s", file.get('name'), chat_id, e)
+                report.failed.append(file)
+                continue
+            _remember_file_id(file, message)
+            report.sent.append(file)
+    return report
+
+
+async def deliver_order_results(bot: Bot, session: AsyncSession, order: Order) -> DeliveryReport:
+    """Отправить клиенту результаты завершенного заказа и сохранить полученные file_id"""
+    attachments = await crud.get_order_attachments(session, order.id, AttachmentKind.RESULT)
+    files = [attachment_file(attachment) for attachment in attachments]
+    if not files:
+        report = DeliveryReport()
+        report.requests = 1
+        # Статус уже COMPLETED: клиент, заблокировавший бота, не должен ронять обработчик админа
+        try:
+            await bot.send_message(order.user.telegram_id, f"✅ Заказ #{order.id} завершен!")
+        except TelegramAPIError as e:
+            logger.warning("Клиент заказа %s не уведомлен о завершении: %s", order.id, e)
+            report.notified = False
+        return report
+    caption = f"📦 Результаты заказа #{order.id}"
+    if settings.order_archive_min_files and len(files) >= settings.order_archive_min_files:
+        report = DeliveryReport()
+        report.requests = 1
+        try:
+            await send_archive(bot, session, order.user.telegram_id, files, f"order_{order.id}.zip", caption)
+            report.sent.extend(files)
+            return report
+        except (PackagingError, TelegramAPIError) as e:
+            logger.warning("Результаты заказа %s не отправлены архивом: %s", order.id, e)
+
+    cached = [file.get('file_id') for file in files]
+    report = await send_files(bot, order.user.telegram_id, files, caption=caption)
+    await crud.set_attachment_file_ids(session, {
+        file['id']: file['file_id'] for file, file_id in zip(files, cached) if file.get('file_id') != file_id
+    })
+    return report
+
+
+async def complete_order(bot: Bot, session: AsyncSession, order_id: int) -> Optional[DeliveryReport]:
+    """
+    Перевести заказ из READY_FOR_CHECK в COMPLETED и отправить результаты.
+    None — заказа нет или его уже завершили: результаты уходят клиенту один раз.
+    """
+    if not await crud.transition_order_status(
+        session, order_id, OrderStatus.READY_FOR_CHECK, OrderStatus.COMPLETED, completed_at=datetime.utcnow()
+    ):
+        return None
+    # Заказ с пользователем — в сессии обработчика
+    order = await crud.get_order_by_id(session, order_id)
+    return await deliver_order_results(bot, session, order)
@@ -0,0 +1,213 @@
+"""
+Хранилище загруженных файлов с адресацией по содержимому
+
+Файл сохраняется под именем SHA-256 своего содержимого:
+<root>/objects/ab/abcdef..., поэтому одинаковые загрузки (один архив,
+присланный в несколько заказов) лежат на диске один раз. Загрузка из
+Telegram идет потоком, кусками по chunk_size: файл целиком в память не
+читается, хеш считается по ходу записи во временный файл, который затем
+атомарно переименовывается. Лимиты: размер одного файла и общий объем
+хранилища (0 — без ограничения).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import AsyncIterator, BinaryIO, Optional
+
+from aiogram import Bot
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FileStoreError(Exception):
+    """Ошибка хранилища файлов"""
+
+
+class FileTooLarge(FileStoreError):
+    """Файл больше допустимого размера"""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"файл {size} байт больше лимита {limit} байт")
+        self.size = size
+        self.limit = limit
+
+
+class QuotaExceeded(FileStoreError):
+    """В хранилище не хватает места"""
+
+    def __init__(self, used: int, size: int, quota: int):
+        super().__init__(f"квота хранилища {quota} байт: занято {used}, нужно еще {size}")
+        self.used = used
+        self.size = size
+        self.quota = quota
+
+
+class StoredFile:
+    """Сохраненный файл"""
+    __slots__ = ('sha256', 'path', 'size', 'created')
+
+    def __init__(self, sha256: str, path: str, size: int, created: bool):
+        self.sha256 = sha256
+        self.path = path
+        self.size = size
+        # False — такой файл уже был в хранилище (дубликат)
+        self.created = created
+
+    def __repr__(self) -> str:
+        return f"StoredFile({self.sha256[:12]}, size={self.size}, created={self.created})"
+
+
+class FileStore:
+    """Хранилище файлов по SHA-256"""
+
+    def __init__(self, root: str, max_file_size: int, quota: int = 0, chunk_size: int = 65536):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.quota = quota
+        self.chunk_size = chunk_size
+        self._objects = os.path.join(root, 'objects')
+        self._tmp = os.path.join(root, 'tmp')
+        self._used: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    # ============== ПУТИ ==============
+
+    def path(self, sha256: str) -> str:
+        """Путь к файлу с данным хешем"""
+        return os.path.join(self._objects, sha256[:2], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        """Есть ли файл в хранилище"""
+        return os.path.exists(self.path(sha256))
+
+    def _scan_used(self) -> int:
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._tmp, exist_ok=True)
+        used = 0
+        for directory, _, files in os.walk(self._objects):
+            for name in files:
+                used += os.path.getsize(os.path.join(directory, name))
+        return used
+
+    async def used(self) -> int:
+        """Занятый объем, байт (при первом вызове хранилище сканируется)"""
+        if self._used is None:
+            async with self._lock:
+                if self._used is None:
+                    self._used = await asyncio.to_thread(self._scan_used)
+        return self._used
+
+    # ============== ЗАПИСЬ ==============
+
+    def check_size(self, size: Optional[int]) -> None:
+        """Проверить заявленный размер до загрузки (FileTooLarge)"""
+        if size is not None and size > self.max_file_size:
+            raise FileTooLarge(size, self.max_file_size)
+
+    def _commit(self, tmp_path: str, sha256: str) -> bool:
+        target = self.path(sha256)
+        if os.path.exists(target):
+            os.remove(tmp_path)
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+        return True
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], size_hint: Optional[int] = None) -> StoredFile:
+        """Сохранить файл из потока кусков байтов"""
+        self.check_size(size_hint)
+        # Квота проверяется после хеширования: дубликат места не занимает
+        await self.used()
+
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self._tmp, uuid.uuid4().hex)
+        handle: BinaryIO = await asyncio.to_thread(open, tmp_path, 'wb')
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_file_size:
+                    raise FileTooLarge(size, self.max_file_size)
+                digest.update(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+            await asyncio.to_thread(handle.close)
+
+            sha256 = digest.hexdigest()
+            async with self._lock:
+                if self.quota and not self.exists(sha256) and self._used + size > self.quota:
+                    raise QuotaExceeded(self._used, size, self.quota)
+                created = await asyncio.to_thread(self._commit, tmp_path, sha256)
+                if created:
+                    self._used += size
+        except BaseException:
+            handle.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if not created:
+            logger.debug("Файл %s уже в хранилище", sha256[:12])
+        return StoredFile(sha256, self.path(sha256), size, created)
+
+    async def _read_local(self, path: str) -> AsyncIterator[bytes]:
+        handle = await asyncio.to_thread(open, path, 'rb')
+        try:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            handle.close()
+
+    async def save_path(self, path: str) -> StoredFile:
+        """Сохранить локальный файл (например, артефакт проекта)"""
+        return await self.save_stream(self._read_local(path), size_hint=os.path.getsize(path))
+
+    async def save_telegram_file(self, bot: Bot, file_id: str, file_size: Optional[int] = None) -> StoredFile:
+        """Скачать файл из Telegram потоком и сохранить"""
+        # Размер из сообщения проверяем до getFile, чтобы не качать лишнего
+        self.check_size(file_size)
+        file = await bot.get_file(file_id)
+        self.check_size(file.file_size)
+
+        api = bot.session.api
+        if api.is_local:
+            chunks = self._read_local(str(api.wrap_local_file.to_local(file.file_path)))
+        else:
+            chunks = bot.session.stream_content(
+                url=api.file_url(bot.token, file.file_path),
+                chunk_size=self.chunk_size,
+                raise_for_status=True,
+            )
+        try:
+            return await self.save_stream(chunks, size_hint=file.file_size or file_size)
+        finally:
+            await chunks.aclose()
+
+    # ============== УДАЛЕНИЕ ==============
+
+    async def delete(self, sha256: str) -> bool:
+        """Удалить файл (вызывающий проверяет, что на него больше нет ссылок)"""
+        path = self.path(sha256)
+        async with self._lock:
+            try:
+                size = await asyncio.to_thread(os.path.getsize, path)
+                await asyncio.to_thread(os.remove, path)
+            except FileNotFoundError:
+                return False
+            if self._used is not None:
+                self._used -= size
+        return True
+
+
+file_store = FileStore(
+    os.path.join(settings.uploads_dir, 'store'),
+    max_file_size=settings.upload_max_file_size,
+    quota=settings.upload_quota,
+    chunk_size=settings.upload_chunk_size,
+)
@@ -0,0 +1,239 @@
+"""
+Метрики в формате Prometheus и HTTP-эндпоинт /metrics
+"""
+import logging
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограмм задержки, секунд
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, метки"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues, extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Строки текстового формата Prometheus"""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    """Монотонный счетчик"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Увеличить счетчик"""
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(labels)} {value}" for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и убывать"""
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Уменьшить значение"""
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        """Установить значение"""
+        self.values[labels] = value
+
+
+class _HistogramSeries:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Гистограмма: наблюдение — один bisect и три сложения"""
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self.series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учесть наблюдение"""
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = _HistogramSeries(len(self.bounds) + 1)
+        series.buckets[bisect_left(self.bounds, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds, series.buckets):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._labels(labels, le)} {series.count}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {series.sum}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор метрик, отдаваемых на /metrics"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Добавить метрику в выдачу"""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+updates_total = registry.register(Counter(
+    'bot_updates_total', 'Полученные апдейты по типу', ['type']
+))
+update_errors_total = registry.register(Counter(
+    'bot_update_errors_total', 'Апдейты, завершившиеся исключением', ['type']
+))
+update_duration = registry.register(Histogram(
+    'bot_update_duration_seconds', 'Полное время обработки апдейта', ['type']
+))
+handlers_in_flight = registry.register(Gauge(
+    'bot_handlers_in_flight', 'Апдейты в обработке'
+))
+handler_duration = registry.register(Histogram(
+    'bot_handler_duration_seconds', 'Время обработчика', ['router', 'handler']
+))
+handler_errors_total = registry.register(Counter(
+    'bot_handler_errors_total', 'Исключения в обработчиках', ['router', 'handler']
+))
+db_pool_checkouts_total = registry.register(Counter(
+    'bot_db_pool_checkouts_total', 'Выдачи соединений из пула БД'
+))
+db_pool_checked_out = registry.register(Gauge(
+    'bot_db_pool_checked_out', 'Соединения БД, выданные из пула'
+))
+db_queries_per_update = registry.register(Histogram(
+    'bot_db_queries_per_update', 'Число SQL-запросов на апдейт', ['handler'],
+    buckets=(1, 2, 5, 10, 20, 50, 100)
+))
+db_time = registry.register(Histogram(
+    'bot_db_time_seconds', 'Время в БД на апдейт', ['handler']
+))
+db_n_plus_one_total = registry.register(Counter(
+    'bot_db_n_plus_one_total', 'Апдейты с повторяющимися запросами (N+1)', ['handler']
+))
+telegram_api_duration = registry.register(Histogram(
+    'bot_telegram_api_duration_seconds', 'Время запросов к Telegram Bot API', ['method']
+))
+telegram_api_errors_total = registry.register(Counter(
+    'bot_telegram_api_errors_total', 'Ошибки запросов к Telegram Bot API', ['method']
+))
+callback_ack_duration = registry.register(Histogram(
+    'bot_callback_ack_seconds', 'Время от callback до answerCallbackQuery', ['handler', 'answered_by']
+))
+
+
+def observe_pool(db_engine: AsyncEngine) -> None:
+    """Считать выдачи соединений пула движка"""
+    pool = db_engine.sync_engine.pool
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts_total.inc()
+        db_pool_checked_out.inc()
+
+    def on_checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.dec()
+
+    event.listen(pool, 'checkout', on_checkout)
+    event.listen(pool, 'checkin', on_checkin)
+
+
+def observe_callback_acks(stats) -> None:
+    """Экспортировать время ответа на callback'и (AckStats из EarlyAnswerMiddleware)"""
+    def on_record(route: str, elapsed: float, early: bool) -> None:
+        callback_ack_duration.observe(elapsed, route, 'middleware' if early else 'handler')
+
+    stats.on_record(on_record)
+
+
+async def start_metrics_server(
+    host: str,
+    port: int,
+    metrics_registry: Optional[MetricsRegistry] = None
+) -> web.AppRunner:
+    """Запустить HTTP-сервер с /metrics; остановка — await runner.cleanup()"""
+    metrics_registry = metrics_registry or registry
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics_registry.render(),
+            content_type='text/plain',
+            charset='utf-8',
+            headers={'X-Content-Type-Options': 'nosniff'}
+        )
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Метрики доступны на http://%s:%d/metrics", host, port)
+    return runner
@@ -0,0 +1,97 @@
+"""
+Файлы индивидуальных заказов: вложения клиента и результаты работы
+
+Файл описывается словарем с полями таблицы attachments: media_type
+(document, photo, video), file_id, name, size, mime, а после сохранения
+в хранилище — sha256 и path.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import ClientError
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message
+
+from bot.database.models import Attachment
+from bot.services.file_store import FileStoreError, FileTooLarge, file_store
+
+logger = logging.getLogger(__name__)
+
+OrderFile = Dict[str, Any]
+
+
+def message_file(message: Message) -> Optional[OrderFile]:
+    """Описание файла из сообщения (документ, фото или видео)"""
+    if message.document:
+        media_type, media = 'document', message.document
+        name, mime = media.file_name, media.mime_type
+    elif message.photo:
+        media_type, media = 'photo', message.photo[-1]
+        name, mime = None, 'image/jpeg'
+    elif message.video:
+        media_type, media = 'video', message.video
+        name, mime = media.file_name, media.mime_type
+    else:
+        return None
+    return {
+        'media_type': media_type,
+        'file_id': media.file_id,
+        'name': name or f"{media.file_unique_id}.{'jpg' if media_type == 'photo' else 'bin'}",
+        'size': media.file_size,
+        'mime': mime,
+        'sha256': None,
+        'path': None,
+    }
+
+
+def attachment_file(attachment: Attachment) -> OrderFile:
+    """Словарь файла из строки attachments (id — чтобы записать новый file_id)"""
+    return {
+        'id': attachment.id,
+        'media_type': attachment.media_type,
+        'file_id': attachment.file_id,
+        'name': attachment.name,
+        'size': attachment.size,
+        'mime': attachment.mime,
+        'sha256': attachment.sha256,
+        'path': attachment.path,
+    }
+
+
+async def _store(bot: Bot, file: OrderFile) -> Optional[str]:
+    try:
+        stored = await file_store.save_telegram_file(bot, file['file_id'], file['size'])
+    except FileTooLarge as e:
+        return f"{file['name']}: больше {e.limit // (1024 * 1024)} МБ"
+    except FileStoreError:
+        return f"{file['name']}: не хватает места, попробуйте позже"
+    except (TelegramAPIError, ClientError) as e:
+        # Файл остается доступен по file_id, локальной копии просто не будет
+        logger.warning("Файл заказа %s не скачан: %s", file['file_id'], e)
+        return None
+    file.update(sha256=stored.sha256, path=stored.path, size=stored.size)
+    return None
+
+
+async def accept_files(
+    bot: Bot, messages: Sequence[Message], current_count: int, limit: int
+) -> Tuple[List[OrderFile], List[str]]:
+    """
+    Принять файлы из сообщений (альбом — одним вызовом): скачать в хранилище
+    параллельно. Возвращает (принятые файлы, ошибки для пользователя).
+    """
+    new_files = [file for file in map(message_file, messages) if file]
+    free = max(limit - current_count, 0)
+    rejected = [f"{file['name']}: больше {limit} файлов в заказе" for file in new_files[free:]]
+    new_files = new_files[:free]
+
+    accepted = []
+    errors = await asyncio.gather(*(_store(bot, file) for file in new_files))
+    for file, error in zip(new_files, errors):
+        if error:
+            rejected.append(error)
+        else:
+            accepted.append(file)
+    return accepted, rejected
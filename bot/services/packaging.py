@@ -0,0 +1,247 @@
+"""
+Упаковка нескольких файлов в один ZIP на лету
+
+Архив не собирается ни в памяти, ни на диске: ZipFile пишет его в рабочем
+потоке в канал, а куски по chunk_size сразу уходят в тело multipart-запроса
+sendDocument. В канале не больше depth кусков — поток ждет, пока сеть
+заберет данные, и event loop не блокируется ни чтением файлов, ни сжатием.
+Уже сжатые форматы (архивы, картинки, видео) кладутся без сжатия
+(ZIP_STORED), остальное — deflate.
+
+file_id загруженного архива сохраняется в таблице archives по хешу набора
+файлов (имена в архиве + SHA-256 содержимого): один и тот же набор
+собирается и загружается один раз, дальше отправляется по file_id.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import zipfile
+from typing import AsyncGenerator, List, Optional, Sequence, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InputFile, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database import crud
+from bot.services.file_store import file_store
+from bot.services.order_files import OrderFile
+from bot.utils.uploads import KeyedLocks, is_stale_file_id
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Форматы, которые deflate почти не уменьшает: сжимать их — зря тратить CPU
+STORED_EXTENSIONS = frozenset({
+    '.zip', '.rar', '.7z', '.gz', '.bz2', '.xz', '.jar', '.apk',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.mp4', '.mov', '.avi', '.mkv',
+    '.docx', '.xlsx', '.pptx', '.pdf',
+})
+
+# Одна сборка на набор файлов: параллельные отправки ждут первую и берут ее file_id
+_archive_locks: KeyedLocks[str] = KeyedLocks()
+
+
+class PackagingError(Exception):
+    """Архив собрать нельзя: файла нет в хранилище или архив слишком большой"""
+
+
+class ArchiveEntry:
+    """Файл архива: имя внутри ZIP и файл хранилища"""
+    __slots__ = ('name', 'sha256', 'path', 'size')
+
+    def __init__(self, name: str, sha256: str, path: str, size: int):
+        self.name = name
+        self.sha256 = sha256
+        self.path = path
+        self.size = size
+
+    @property
+    def compress_type(self) -> int:
+        return zipfile.ZIP_STORED if os.path.splitext(self.name)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def _unique_name(name: str, used: Set[str]) -> str:
+    """Имя в архиве без повторов: отчет.pdf, отчет (2).pdf, ..."""
+    base, ext = os.path.splitext(os.path.basename(name.replace('\\', '/')) or 'file')
+    candidate, number = base + ext, 1
+    while candidate.lower() in used:
+        number += 1
+        candidate = f"{base} ({number}){ext}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def archive_entries(files: Sequence[OrderFile], max_size: Optional[int] = None) -> List[ArchiveEntry]:
+    """
+    Файлы архива из файлов заказа (нужна копия в хранилище), в порядке имен.
+    Обращается к диску — вызывать через asyncio.to_thread.
+    """
+    entries = []
+    used: Set[str] = set()
+    for file in sorted(files, key=lambda item: (item.get('name') or '', item.get('sha256') or '')):
+        sha256 = file.get('sha256')
+        path = file_store.path(sha256) if sha256 else None
+        if not path or not os.path.exists(path):
+            raise PackagingError(f"{file.get('name')}: нет копии в хранилище")
+        entries.append(ArchiveEntry(_unique_name(file.get('name') or sha256, used), sha256, path, os.path.getsize(path)))
+
+    total = sum(entry.size for entry in entries)
+    if max_size and total > max_size:
+        raise PackagingError(f"архив {total} байт больше лимита {max_size} байт")
+    return entries
+
+
+def content_hash(entries: Sequence[ArchiveEntry]) -> str:
+    """Ключ кеша архива: одинаковые имена и содержимое — один архив"""
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(f"{entry.name}\0{entry.sha256}\n".encode())
+    return digest.hexdigest()
+
+
+class _Cancelled(Exception):
+    """Читатель архива остановился — рабочему потоку пора выходить"""
+
+
+class _Channel:
+    """
+    Файловый объект для ZipFile в рабочем потоке: копит записи в куски по
+    chunk_size и передает их в asyncio.Queue. Семафор ограничивает число
+    непрочитанных кусков. Без tell/seek — ZipFile пишет потоково
+    (data descriptor после каждого файла).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, chunk_size: int, depth: int):
+        self._loop = loop
+        self._queue = queue
+        self._chunk_size = chunk_size
+        self._slots = threading.Semaphore(depth)
+        self._buffer = bytearray()
+        self.cancelled = False
+
+    def _put(self, chunk: bytes) -> None:
+        if not self.cancelled:
+            self._slots.acquire()
+        if self.cancelled:
+            raise _Cancelled()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, chunk)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer[:self._chunk_size]))
+            del self._buffer[:self._chunk_size]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Последний кусок и конец потока (None) или ошибка сборки"""
+        if error is None and self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, error)
+
+    def taken(self) -> None:
+        """Читатель забрал кусок"""
+        self._slots.release()
+
+    def cancel(self) -> None:
+        """Читатель больше не читает: разбудить поток, если он ждет места"""
+        self.cancelled = True
+        self._slots.release()
+
+
+class ZipInputFile(InputFile):
+    """ZIP из файлов хранилища, который собирается по ходу загрузки"""
+
+    def __init__(self, entries: Sequence[ArchiveEntry], filename: str,
+                 chunk_size: int = settings.upload_chunk_size, depth: int = 4):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.entries = list(entries)
+        self.depth = depth
+        # Размер архива после последней загрузки
+        self.size = 0
+
+    def _build(self, channel: _Channel) -> None:
+        try:
+            with zipfile.ZipFile(channel, 'w', allowZip64=True) as archive:
+                for entry in self.entries:
+                    info = zipfile.ZipInfo.from_file(entry.path, entry.name)
+                    info.compress_type = entry.compress_type
+                    with open(entry.path, 'rb') as source, archive.open(info, 'w') as target:
+                        shutil.copyfileobj(source, target, self.chunk_size)
+        except _Cancelled:
+            return
+        except Exception as e:
+            channel.finish(e)
+            return
+        channel.finish()
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        # Каждый вызов собирает архив заново: после 429 запрос повторяется с новым телом
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        channel = _Channel(loop, queue, self.chunk_size, self.depth)
+        worker = loop.run_in_executor(None, self._build, channel)
+        self.size = 0
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                channel.taken()
+                self.size += len(chunk)
+                yield chunk
+        finally:
+            channel.cancel()
+            await worker
+
+
+async def _send_cached(bot: Bot, session: AsyncSession, chat_id: int, key: str,
+                       caption: Optional[str]) -> Optional[Message]:
+    file_id = await crud.get_archive_file_id(session, key)
+    if not file_id:
+        return None
+    try:
+        return await bot.send_document(chat_id, document=file_id, caption=caption)
+    except TelegramBadRequest as e:
+        # Чат не найден, бот заблокирован, ошибка в подписи — архив в Telegram цел
+        if not is_stale_file_id(e):
+            raise
+        logger.warning("file_id архива %s не принят Telegram: %s", key[:12], e)
+        await crud.delete_archive(session, key)
+        return None
+
+
+async def send_archive(bot: Bot, session: AsyncSession, chat_id: int, files: Sequence[OrderFile],
+                       filename: str, caption: Optional[str] = None) -> Message:
+    """
+    Отправить файлы одним ZIP. Набор, который уже загружался, уходит по
+    file_id; новый собирается на лету. PackagingError — собрать нельзя.
+    """
+    entries = await asyncio.to_thread(archive_entries, files, settings.archive_max_size)
+    key = content_hash(entries)
+    message = await _send_cached(bot, session, chat_id, key, caption)
+    if message:
+        return message
+
+    async with _archive_locks.hold(key):
+        # Пока ждали, этот же набор мог загрузить другой обработчик
+        message = await _send_cached(bot, session, chat_id, key, caption)
+        if message:
+            return message
+
+        document = ZipInputFile(entries, filename)
+        message = await bot.send_document(chat_id, document=document, caption=caption)
+        if message.document:
+            await crud.save_archive(session, key, message.document.file_id, filename, document.size)
+            logger.info("Архив %s (%d файлов, %d байт) загружен в Telegram", filename, len(entries), document.size)
+        return message
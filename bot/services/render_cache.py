@@ -0,0 +1,128 @@
+"""
+Кеш отрисованных карточек проектов и страниц каталога
+
+Каталог меняется редко (админка и покупки), а читается постоянно. Карточка
+хранится по project_id, страница — по (тип проекта, номер страницы); при
+попадании обработчик не делает запросов за проектом и не собирает текст
+заново. Поверх общего текста накладывается только свое для пользователя
+(куплен ли проект, кнопки корзины) и счетчики.
+
+Записи сбрасываются точечно: crud.create_project/update_project/
+delete_project и покупки сообщают id проекта, удаление категории —
+сбрасывает все. Страницы строятся из снимка каталога и сбрасываются еще
+и при его подмене. TTL — страховка для нескольких процессов бота, где
+изменение в одном процессе другой не видит.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from bot.database import crud
+from bot.database.models import ProjectType
+from bot.services.catalog_snapshot import catalog_store
+from config import settings
+
+PageKey = Tuple[Optional[ProjectType], int]
+
+
+class CardRender:
+    """Карточка проекта: общий текст и счетчики, которые меняются без сброса"""
+    __slots__ = ('text', 'views', 'purchases', 'expires')
+
+    def __init__(self, text: str, views: int, purchases: int, expires: float):
+        self.text = text
+        self.views = views
+        self.purchases = purchases
+        self.expires = expires
+
+
+class PageRender:
+    """Страница каталога (text None — проектов нет)"""
+    __slots__ = ('text', 'total_pages', 'expires')
+
+    def __init__(self, text: Optional[str], total_pages: int, expires: float):
+        self.text = text
+        self.total_pages = total_pages
+        self.expires = expires
+
+
+class RenderCache:
+    """Кеш отрисовки каталога с точечным сбросом по изменениям в crud"""
+
+    def __init__(self, ttl: float, max_cards: int = 10_000, max_pages: int = 2_000):
+        self.ttl = ttl
+        self.max_cards = max_cards
+        self.max_pages = max_pages
+        self.cards: Dict[int, CardRender] = {}
+        self.pages: Dict[PageKey, PageRender] = {}
+        # Растет при каждом сбросе: отрисованное до сброса в кеш не попадает
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, entry) -> bool:
+        if entry is not None and entry.expires > time.monotonic():
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    @staticmethod
+    def _make_room(entries: dict, limit: int) -> None:
+        # Словарь помнит порядок вставки: вытесняем самую старую запись
+        while len(entries) >= limit:
+            entries.pop(next(iter(entries)))
+
+    # ============== КАРТОЧКИ ==============
+
+    def get_card(self, project_id: int) -> Optional[CardRender]:
+        """Карточка из кеша или None"""
+        card = self.cards.get(project_id)
+        return card if self._fresh(card) else None
+
+    def put_card(self, project_id: int, text: str, views: int, purchases: int, generation: int) -> CardRender:
+        """Запомнить карточку, отрисованную из данных поколения generation"""
+        card = CardRender(text, views, purchases, time.monotonic() + self.ttl)
+        if self.ttl > 0 and generation == self.generation:
+            self.cards.pop(project_id, None)
+            self._make_room(self.cards, self.max_cards)
+            self.cards[project_id] = card
+        return card
+
+    # ============== СТРАНИЦЫ ==============
+
+    def get_page(self, project_type: Optional[ProjectType], page: int) -> Optional[PageRender]:
+        """Страница каталога из кеша или None"""
+        entry = self.pages.get((project_type, page))
+        return entry if self._fresh(entry) else None
+
+    def put_page(self, project_type: Optional[ProjectType], page: int,
+                 text: Optional[str], total_pages: int, generation: int) -> PageRender:
+        """Запомнить страницу, отрисованную из данных поколения generation"""
+        entry = PageRender(text, total_pages, time.monotonic() + self.ttl)
+        if self.ttl > 0 and generation == self.generation:
+            self.pages.pop((project_type, page), None)
+            self._make_room(self.pages, self.max_pages)
+            self.pages[(project_type, page)] = entry
+        return entry
+
+    # ============== СБРОС ==============
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        """Проект изменился (None — изменилось все): его карточка и все страницы"""
+        self.generation += 1
+        if project_id is None:
+            self.cards.clear()
+        else:
+            self.cards.pop(project_id, None)
+        # Проект мог появиться, исчезнуть или сдвинуться на любой странице
+        self.pages.clear()
+
+    def invalidate_pages(self) -> None:
+        """Сбросить страницы (подменен снимок каталога, из которого они строятся)"""
+        self.generation += 1
+        self.pages.clear()
+
+
+render_cache = RenderCache(settings.render_cache_ttl)
+crud.on_catalog_change(render_cache.invalidate)
+catalog_store.on_swap(lambda snapshot: render_cache.invalidate_pages())
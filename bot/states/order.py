@@ -23,6 +23,11 @@ class EditProfileStates(StatesGroup):
     waiting_for_email = State()
 
 
+class CatalogStates(StatesGroup):
+    """Состояния каталога"""
+    waiting_for_query = State()
+
+
 class SupportStates(StatesGroup):
     """Состояния для обращения в поддержку"""
     waiting_for_subject = State()
@@ -73,3 +78,10 @@ class AdminCategoryStates(StatesGroup):
     waiting_for_icon = State()
     confirm = State()
 
+
+# Состояния, обработчики которых принимают альбом целиком (data['album']):
+# только в них MediaGroupMiddleware собирает части альбома в одно событие
+ALBUM_STATES = frozenset({
+    OrderStates.waiting_for_files.state,
+    AdminOrderStates.waiting_for_files.state,
+})
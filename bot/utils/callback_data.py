@@ -0,0 +1,159 @@
+"""
+Компактные типизированные callback_data
+
+Поля фабрики упаковываются в байты (целые — zigzag-varint, перечисления —
+номер элемента, строки — длина + UTF-8, Optional — байт наличия) и
+кодируются base64url: "<префикс>:<данные>". Идентификатор до миллиона
+занимает 3 байта (4 символа), поэтому в 64 байта Telegram помещаются
+несколько идентификаторов и курсоров страниц.
+
+Перечисления кодируются номером элемента: новые элементы добавляйте в
+конец, иначе кнопки в уже отправленных сообщениях поменяют смысл.
+"""
+import base64
+import binascii
+from enum import Enum
+from typing import Any, ClassVar, List, Tuple, Type, Union, get_args, get_origin
+
+from aiogram.filters.callback_data import CallbackData, MAX_CALLBACK_LENGTH
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("callback_data обрезаны")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("слишком длинное число в callback_data")
+
+
+class _FieldCodec:
+    """Упаковка одного поля фабрики"""
+    __slots__ = ('name', 'kind', 'optional', 'members')
+
+    def __init__(self, name: str, annotation: Any):
+        self.name = name
+        self.optional = False
+        if get_origin(annotation) is Union:
+            args = [arg for arg in get_args(annotation) if arg is not type(None)]
+            if len(args) != 1:
+                raise TypeError(f"поле {name}: поддерживается только Optional[X]")
+            annotation, self.optional = args[0], True
+
+        self.members: List[Enum] = []
+        if annotation is bool:
+            self.kind = 'bool'
+        elif annotation is int:
+            self.kind = 'int'
+        elif annotation is str:
+            self.kind = 'str'
+        elif isinstance(annotation, type) and issubclass(annotation, Enum):
+            self.kind = 'enum'
+            self.members = list(annotation)
+        else:
+            raise TypeError(f"поле {name}: тип {annotation!r} не упаковывается в callback_data")
+
+    def write(self, out: bytearray, value: Any) -> None:
+        if self.optional:
+            out.append(value is not None)
+            if value is None:
+                return
+        if self.kind == 'int':
+            # zigzag: небольшие отрицательные числа тоже занимают один байт
+            _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif self.kind == 'bool':
+            out.append(bool(value))
+        elif self.kind == 'enum':
+            _write_varint(out, self.members.index(value))
+        else:
+            raw = value.encode()
+            _write_varint(out, len(raw))
+            out += raw
+
+    def read(self, data: bytes, pos: int) -> Tuple[Any, int]:
+        if self.optional:
+            if pos >= len(data):
+                raise ValueError("callback_data обрезаны")
+            pos += 1
+            if not data[pos - 1]:
+                return None, pos
+        value, pos = _read_varint(data, pos)
+        if self.kind == 'int':
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+        if self.kind == 'bool':
+            return bool(value), pos
+        if self.kind == 'enum':
+            if value >= len(self.members):
+                raise ValueError(f"поле {self.name}: нет элемента с номером {value}")
+            return self.members[value], pos
+        end = pos + value
+        if end > len(data):
+            raise ValueError("callback_data обрезаны")
+        return data[pos:end].decode(), end
+
+
+class CompactCallbackData(CallbackData, prefix=''):
+    """
+    Базовый класс фабрик callback_data с компактной упаковкой.
+
+        class ProjectCard(CompactCallbackData, prefix='prj'):
+            project_id: int
+
+        ProjectCard(project_id=42).pack()          # 'prj:VA'
+        @router.callback_query(ProjectCard.filter())
+        async def handler(callback, callback_data: ProjectCard): ...
+    """
+
+    __codecs__: ClassVar[Tuple[_FieldCodec, ...]] = ()
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls.__codecs__ = tuple(_FieldCodec(name, field.annotation) for name, field in cls.model_fields.items())
+
+    @classmethod
+    def route_prefix(cls) -> str:
+        """Начало всех callback_data этой фабрики"""
+        return cls.__prefix__ + cls.__separator__
+
+    def pack(self) -> str:
+        payload = bytearray()
+        for codec in self.__codecs__:
+            codec.write(payload, getattr(self, codec.name))
+        callback_data = self.route_prefix() + base64.urlsafe_b64encode(payload).rstrip(b'=').decode()
+        if len(callback_data.encode()) > MAX_CALLBACK_LENGTH:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_LENGTH} байт: {callback_data!r}")
+        return callback_data
+
+    @classmethod
+    def unpack(cls: Type["CompactCallbackData"], value: str) -> "CompactCallbackData":
+        prefix, separator, encoded = value.partition(cls.__separator__)
+        if prefix != cls.__prefix__:
+            raise ValueError(f"Bad prefix ({prefix!r} != {cls.__prefix__!r})")
+        if not separator:
+            raise ValueError(f"нет данных после префикса: {value!r}")
+        try:
+            payload = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"callback_data не в base64: {value!r}") from e
+
+        values = {}
+        pos = 0
+        for codec in cls.__codecs__:
+            values[codec.name], pos = codec.read(payload, pos)
+        if pos != len(payload):
+            raise ValueError(f"лишние байты в callback_data: {value!r}")
+        return cls(**values)
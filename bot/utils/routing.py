@@ -0,0 +1,150 @@
+"""
+Маршрутизация callback-запросов по префиксному дереву
+
+aiogram проверяет фильтры всех обработчиков роутера по очереди. CallbackRouter
+строит по фильтрам обработчиков дерево ключей callback_data (F.data == "...",
+F.data.startswith("..."), Фабрика.filter()) и проверяет только те
+обработчики, чей ключ совпал, — за один проход по строке callback_data.
+Порядок регистрации и остальные фильтры (состояния, правила фабрик)
+сохраняются; обработчики без распознанного ключа проверяются всегда.
+"""
+import operator
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters.callback_data import CallbackQueryFilter
+from aiogram.types import TelegramObject
+from magic_filter import MagicFilter
+from magic_filter.operations import CallOperation, ComparatorOperation, GetAttributeOperation
+
+T = TypeVar('T')
+
+
+class _Node(Generic[T]):
+    __slots__ = ('children', 'exact', 'prefix')
+
+    def __init__(self):
+        self.children: Dict[str, "_Node[T]"] = {}
+        self.exact: List[T] = []
+        self.prefix: List[T] = []
+
+
+class PrefixTrie(Generic[T]):
+    """Дерево строковых ключей: точные значения и префиксы"""
+
+    def __init__(self):
+        self._root: _Node[T] = _Node()
+
+    def add(self, key: str, value: T, exact: bool = False) -> None:
+        """Добавить ключ: exact — только полное совпадение, иначе любой текст с этим началом"""
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        (node.exact if exact else node.prefix).append(value)
+
+    def match(self, text: str) -> List[T]:
+        """Значения всех ключей, совпавших с text (от коротких префиксов к длинным)"""
+        node = self._root
+        found = list(node.prefix)
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                return found
+            found.extend(node.prefix)
+        found.extend(node.exact)
+        return found
+
+
+def _magic_route(magic: MagicFilter) -> Optional[Tuple[str, bool]]:
+    """Ключ из F.data == "..." или F.data.startswith("...")"""
+    operations = magic._operations
+    if not operations or not isinstance(operations[0], GetAttributeOperation) or operations[0].name != 'data':
+        return None
+    if len(operations) == 2:
+        comparison = operations[1]
+        if (isinstance(comparison, ComparatorOperation) and comparison.comparator is operator.eq
+                and isinstance(comparison.right, str)):
+            return comparison.right, True
+    if len(operations) == 3:
+        method, call = operations[1], operations[2]
+        if (isinstance(method, GetAttributeOperation) and method.name == 'startswith'
+                and isinstance(call, CallOperation) and not call.kwargs
+                and len(call.args) == 1 and isinstance(call.args[0], str)):
+            return call.args[0], False
+    return None
+
+
+def callback_route(handler: HandlerObject) -> Optional[Tuple[str, bool]]:
+    """(ключ, точное совпадение) из фильтров обработчика; None — ключа нет"""
+    for filter_object in handler.filters or ():
+        if isinstance(filter_object.callback, CallbackQueryFilter):
+            factory = filter_object.callback.callback_data
+            return factory.__prefix__ + factory.__separator__, False
+        if filter_object.magic is not None:
+            route = _magic_route(filter_object.magic)
+            if route:
+                return route
+    return None
+
+
+class CallbackRouteObserver(TelegramEventObserver):
+    """Наблюдатель callback_query, выбирающий обработчики по дереву ключей"""
+
+    def __init__(self, router: Router, event_name: str = 'callback_query'):
+        super().__init__(router=router, event_name=event_name)
+        self._trie: Optional[PrefixTrie[int]] = None
+        self._unrouted: List[int] = []
+
+    def register(self, callback: Any, *filters: Any, flags: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        self._trie = None
+        return super().register(callback, *filters, flags=flags, **kwargs)
+
+    def _build(self) -> PrefixTrie[int]:
+        trie: PrefixTrie[int] = PrefixTrie()
+        self._unrouted = []
+        for index, handler in enumerate(self.handlers):
+            route = callback_route(handler)
+            if route is None:
+                self._unrouted.append(index)
+            else:
+                trie.add(route[0], index, exact=route[1])
+        self._trie = trie
+        return trie
+
+    def candidates(self, data: Optional[str]) -> List[HandlerObject]:
+        """Обработчики, которые могут подойти для callback_data, в порядке регистрации"""
+        trie = self._trie or self._build()
+        indexes = trie.match(data) if data else []
+        if self._unrouted:
+            indexes.extend(self._unrouted)
+        indexes.sort()
+        return [self.handlers[index] for index in indexes]
+
+    async def trigger(self, event: TelegramObject, **kwargs: Any) -> Any:
+        # Как TelegramEventObserver.trigger, но только по кандидатам
+        for handler in self.candidates(getattr(event, 'data', None)):
+            kwargs["handler"] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+
+class CallbackRouter(Router):
+    """Router, в котором callback_query маршрутизируются через CallbackRouteObserver"""
+
+    def __init__(self, *, name: Optional[str] = None):
+        super().__init__(name=name)
+        self.callback_query = self.observers['callback_query'] = CallbackRouteObserver(router=self)
@@ -0,0 +1,56 @@
+"""
+Общее для загрузок в Telegram: протухшие file_id и замки «одна загрузка на ключ»
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Generic, Hashable, TypeVar
+
+from aiogram.exceptions import TelegramBadRequest
+
+K = TypeVar('K', bound=Hashable)
+
+# Ошибки Telegram, после которых file_id больше не годится (остальные — не про файл)
+STALE_FILE_ID_ERRORS = ('wrong file identifier', 'wrong remote file identifier', 'file reference')
+
+
+def is_stale_file_id(error: TelegramBadRequest) -> bool:
+    """Отклонен ли запрос из-за самого file_id (а не чата, блокировки или подписи)"""
+    message = error.message.lower()
+    return any(marker in message for marker in STALE_FILE_ID_ERRORS)
+
+
+class _Slot:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # Держит замок или ждет его
+        self.users = 0
+
+
+class KeyedLocks(Generic[K]):
+    """
+    Замки по ключу. Запись удаляется, когда замок никто не держит и не ждет:
+    по lock.locked() этого не понять — сразу после release ожидающие еще не
+    проснулись, и новый вызов создал бы второй замок на тот же ключ.
+    """
+
+    def __init__(self):
+        self._slots: Dict[K, _Slot] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @asynccontextmanager
+    async def hold(self, key: K) -> AsyncIterator[None]:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        slot.users += 1
+        try:
+            async with slot.lock:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                del self._slots[key]
@@ -2,7 +2,7 @@
 Конфигурация приложения
 """
 import os
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     
     # Telegram Bot
     bot_token: str = Field(..., env='BOT_TOKEN')
+    # Свой сервер Bot API (локальный telegram-bot-api или фейковый из benchmarks.fake_bot_api)
+    telegram_api_url: Optional[str] = Field(default=None, env='TELEGRAM_API_URL')
     
     # Database
     database_url: str = Field(
@@ -19,6 +21,25 @@ class Settings(BaseSettings):
         env='DATABASE_URL'
     )
     
+    # Пул соединений PostgreSQL (для SQLite не используется)
+    db_pool_size: int = Field(default=10, env='DB_POOL_SIZE')
+    db_max_overflow: int = Field(default=20, env='DB_MAX_OVERFLOW')
+    db_pool_timeout: float = Field(default=30.0, env='DB_POOL_TIMEOUT')
+    db_pool_recycle: int = Field(default=1800, env='DB_POOL_RECYCLE')
+    db_pool_pre_ping: bool = Field(default=True, env='DB_POOL_PRE_PING')
+    db_statement_cache_size: int = Field(default=500, env='DB_STATEMENT_CACHE_SIZE')
+    
+    # Профиль SQLite (busy_timeout в мс, cache_size < 0 — в КиБ, mmap_size в байтах)
+    sqlite_busy_timeout: int = Field(default=5000, env='SQLITE_BUSY_TIMEOUT')
+    sqlite_cache_size: int = Field(default=-20000, env='SQLITE_CACHE_SIZE')
+    sqlite_mmap_size: int = Field(default=268435456, env='SQLITE_MMAP_SIZE')
+    sqlite_write_batch: int = Field(default=64, env='SQLITE_WRITE_BATCH')
+    
+    # Инструментирование SQL (DB_ECHO — вывод всех запросов в лог)
+    db_echo: bool = Field(default=False, env='DB_ECHO')
+    sql_slow_query_ms: float = Field(default=100.0, env='SQL_SLOW_QUERY_MS')
+    sql_n_plus_one_threshold: int = Field(default=5, env='SQL_N_PLUS_ONE_THRESHOLD')
+    
     # Admins
     admin_ids: str = Field(default='', env='ADMIN_IDS')
     
@@ -26,11 +47,61 @@ class Settings(BaseSettings):
     debug: bool = Field(default=True, env='DEBUG')
     timezone: str = Field(default='Europe/Moscow', env='TIMEZONE')
     
+    # Очередь апдейтов (максимум необработанных апдейтов одного чата)
+    scheduler_max_pending: int = Field(default=32, env='SCHEDULER_MAX_PENDING')
+    
+    # Окно подавления повторных нажатий одной кнопки, секунд
+    callback_dedup_window: float = Field(default=2.0, env='CALLBACK_DEDUP_WINDOW')
+    
+    # Сборка альбомов: пауза между частями и максимальное ожидание, секунд
+    media_group_latency: float = Field(default=0.5, env='MEDIA_GROUP_LATENCY')
+    media_group_max_wait: float = Field(default=3.0, env='MEDIA_GROUP_MAX_WAIT')
+    
+    # Кеш отрисованных карточек и страниц каталога: время жизни записи, секунд (0 — без кеша)
+    render_cache_ttl: float = Field(default=600.0, env='RENDER_CACHE_TTL')
+    
+    # Реестр категорий в памяти: время жизни, секунд (сбрасывается и при изменении категорий)
+    category_cache_ttl: float = Field(default=600.0, env='CATEGORY_CACHE_TTL')
+    
+    # Через сколько секунд отвечать на callback, если обработчик еще не ответил (0 — сразу)
+    callback_answer_budget: float = Field(default=0.3, env='CALLBACK_ANSWER_BUDGET')
+    
+    # Flood control (токенов в секунду, размер корзины, число корзин в памяти)
+    throttle_rate: float = Field(default=2.0, env='THROTTLE_RATE')
+    throttle_burst: float = Field(default=10.0, env='THROTTLE_BURST')
+    throttle_max_buckets: int = Field(default=100_000, env='THROTTLE_MAX_BUCKETS')
+    
+    # Лимиты исходящих сообщений (в секунду; для групп — в минуту) и повторы после 429
+    outbound_rate_limit: bool = Field(default=True, env='OUTBOUND_RATE_LIMIT')
+    outbound_global_rate: float = Field(default=30.0, env='OUTBOUND_GLOBAL_RATE')
+    outbound_chat_rate: float = Field(default=1.0, env='OUTBOUND_CHAT_RATE')
+    outbound_chat_burst: float = Field(default=3.0, env='OUTBOUND_CHAT_BURST')
+    outbound_group_rate_per_minute: float = Field(default=20.0, env='OUTBOUND_GROUP_RATE_PER_MINUTE')
+    outbound_max_retries: int = Field(default=3, env='OUTBOUND_MAX_RETRIES')
+    
+    # Redis (опционально, общие лимиты для нескольких реплик)
+    redis_url: Optional[str] = Field(default=None, env='REDIS_URL')
+    
+    # Метрики Prometheus (http://<host>:<port>/metrics)
+    metrics_enabled: bool = Field(default=False, env='METRICS_ENABLED')
+    metrics_host: str = Field(default='0.0.0.0', env='METRICS_HOST')
+    metrics_port: int = Field(default=9100, env='METRICS_PORT')
+    
     # Paths
     uploads_dir: str = 'uploads'
     projects_dir: str = 'uploads/projects'
     orders_dir: str = 'uploads/orders'
     
+    # Хранилище загрузок (байт; квота 0 — без ограничения). Bot API отдает через getFile до 20 МБ
+    upload_max_file_size: int = Field(default=20 * 1024 * 1024, env='UPLOAD_MAX_FILE_SIZE')
+    upload_quota: int = Field(default=5 * 1024 ** 3, env='UPLOAD_QUOTA')
+    upload_chunk_size: int = Field(default=64 * 1024, env='UPLOAD_CHUNK_SIZE')
+    order_max_files: int = Field(default=20, env='ORDER_MAX_FILES')
+    
+    # ZIP-архивы результатов: с какого числа файлов (0 — никогда) и до какого размера (Bot API принимает до 50 МБ)
+    order_archive_min_files: int = Field(default=11, env='ORDER_ARCHIVE_MIN_FILES')
+    archive_max_size: int = Field(default=50 * 1024 * 1024, env='ARCHIVE_MAX_SIZE')
+    
     class Config:
         env_file = '.env'
         env_file_encoding = 'utf-8'
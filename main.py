@@ -3,17 +3,34 @@
 """
 import asyncio
 import logging
+from typing import Optional, Tuple
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from config import settings
 from bot.database import engine, init_db
-from bot.database.engine import async_session_maker
+from bot.database.engine import engine as db_engine, async_session_maker, warm_up_pool, is_sqlite
+from bot.database.writer import write_queue
 from bot.middlewares.database import DatabaseMiddleware
+from bot.middlewares.sql_stats import SQLStatsMiddleware
+from bot.middlewares.metrics import MetricsMiddleware, HandlerMetricsMiddleware, TelegramAPIMetricsMiddleware
+from bot.services.catalog_snapshot import catalog_store
+from bot.services.metrics import observe_callback_acks, observe_pool, start_metrics_server
+from bot.middlewares.coalescing import CallbackCoalescingMiddleware
+from bot.middlewares.callback_answer import EarlyAnswerMiddleware, CallbackAnswerRequestMiddleware
+from bot.middlewares.media_group import MediaGroupMiddleware
+from bot.states.order import ALBUM_STATES
+from bot.middlewares.outbound import OutboundRateLimiter
+from bot.middlewares.scheduler import UpdateSchedulerMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware, MemoryBucketStore, RedisBucketStore
 
 # Импорт handlers
-from bot.handlers import user, catalog, cart, orders, profile, support, admin
+from bot.handlers import user, catalog, cart, orders, profile, support, admin, legacy
 
 # Настройка логирования
 logging.basicConfig(
@@ -23,20 +40,68 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    """Главная функция запуска бота"""
-    
-    # Инициализация бота
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Создать бота с request-middleware сессии (session — для бенчмарков без сети)"""
+    if session is None and settings.telegram_api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_url))
     bot = Bot(
         token=settings.bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
+    bot.session.middleware(CallbackAnswerRequestMiddleware())
+    if settings.outbound_rate_limit:
+        bot.session.middleware(OutboundRateLimiter(
+            global_rate=settings.outbound_global_rate,
+            chat_rate=settings.outbound_chat_rate,
+            chat_burst=settings.outbound_chat_burst,
+            group_rate=settings.outbound_group_rate_per_minute / 60,
+            max_retries=settings.outbound_max_retries
+        ))
+    if settings.metrics_enabled:
+        bot.session.middleware(TelegramAPIMetricsMiddleware())
+    return bot
+
+
+def create_dispatcher(
+    session_pool: async_sessionmaker = async_session_maker
+) -> Tuple[Dispatcher, DatabaseMiddleware, SQLStatsMiddleware, EarlyAnswerMiddleware]:
+    """
+    Создать диспетчер со всеми middleware и роутерами.
     
-    # Создание диспетчера
+    Роутеры — модульные объекты, поэтому в одном процессе диспетчер создается один раз.
+    """
     dp = Dispatcher()
     
     # Регистрация middleware
-    dp.update.middleware(DatabaseMiddleware(async_session_maker))
+    if settings.redis_url:
+        throttle_store = RedisBucketStore.from_url(settings.redis_url)
+    else:
+        throttle_store = MemoryBucketStore(settings.throttle_max_buckets)
+    if settings.metrics_enabled:
+        dp.update.outer_middleware(MetricsMiddleware())
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.callback_query.middleware(HandlerMetricsMiddleware())
+    dp.update.outer_middleware(CallbackCoalescingMiddleware(settings.callback_dedup_window))
+    dp.update.outer_middleware(MediaGroupMiddleware(
+        ALBUM_STATES, settings.media_group_latency, settings.media_group_max_wait
+    ))
+    dp.update.outer_middleware(ThrottlingMiddleware(
+        throttle_store,
+        rate=settings.throttle_rate,
+        capacity=settings.throttle_burst
+    ))
+    dp.update.outer_middleware(UpdateSchedulerMiddleware(settings.scheduler_max_pending))
+    sql_stats_middleware = SQLStatsMiddleware(settings.sql_n_plus_one_threshold)
+    dp.message.middleware(sql_stats_middleware)
+    dp.callback_query.middleware(sql_stats_middleware)
+    database_middleware = DatabaseMiddleware(session_pool)
+    dp.message.middleware(database_middleware)
+    dp.callback_query.middleware(database_middleware)
+    early_answer_middleware = EarlyAnswerMiddleware(settings.callback_answer_budget)
+    dp.callback_query.middleware(early_answer_middleware)
+    if settings.metrics_enabled:
+        observe_callback_acks(early_answer_middleware.stats)
     
     # Регистрация handlers
     dp.include_router(user.router)
@@ -46,18 +111,62 @@ async def main():
     dp.include_router(profile.router)
     dp.include_router(support.router)
     dp.include_router(admin.router)
+    # Последним: старые callback_data и callback'и без обработчика
+    dp.include_router(legacy.router)
+    
+    return dp, database_middleware, sql_stats_middleware, early_answer_middleware
+
+
+async def main():
+    """Главная функция запуска бота"""
+    
+    # Инициализация бота и диспетчера
+    bot = create_bot()
+    dp, database_middleware, sql_stats_middleware, early_answer_middleware = create_dispatcher()
+    if settings.metrics_enabled:
+        observe_pool(db_engine)
     
     # Инициализация базы данных
     logger.info("Инициализация базы данных...")
     await init_db()
+    await warm_up_pool()
+    if is_sqlite(settings.database_url):
+        # SQLite: все записи идут через одного писателя
+        write_queue.start()
     logger.info("База данных инициализирована")
+    snapshot = await catalog_store.rebuild()
+    logger.info("Снимок каталога: %d проектов", len(snapshot.projects))
+    
+    metrics_runner = None
+    if settings.metrics_enabled:
+        metrics_runner = await start_metrics_server(settings.metrics_host, settings.metrics_port)
     
     # Запуск бота
     logger.info("Бот запущен!")
     try:
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        await catalog_store.stop()
+        await write_queue.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         await bot.session.close()
+        for route, usage in database_middleware.stats.snapshot().items():
+            logger.info(
+                "Пул БД [%s]: апдейтов %d, сессий %d, удержание avg %.3f с / max %.3f с",
+                route, usage['updates'], usage['sessions'], usage['hold_avg'], usage['hold_max']
+            )
+        for route, queries in sql_stats_middleware.stats.snapshot().items():
+            logger.info(
+                "SQL [%s]: апдейтов %d, запросов/апдейт %.1f, время в БД avg %.3f с / max %.3f с, N+1 %d",
+                route, queries['updates'], queries['queries_avg'],
+                queries['db_time_avg'], queries['db_time_max'], queries['n_plus_one']
+            )
+        for route, ack in early_answer_middleware.stats.snapshot().items():
+            logger.info(
+                "Ответ на callback [%s]: %d, avg %.3f с / max %.3f с, ранних ответов %d",
+                route, ack['count'], ack['avg'], ack['max'], ack['early']
+            )
         logger.info("Бот остановлен")
 
 
@@ -0,0 +1,77 @@
+"""
+Окружение Alembic: URL берется из настроек бота (DATABASE_URL)
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import settings
+from bot.database.engine import Base, normalize_database_url
+from bot.database import models  # noqa: F401  (регистрация моделей в metadata)
+
+config = context.config
+
+# Логи настраиваем только при запуске из CLI, а не из init_db
+if config.config_file_name is not None and 'connection' not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    """URL базы: из -x url=..., иначе из настроек"""
+    return context.get_x_argument(as_dictionary=True).get('url') or normalize_database_url(settings.database_url)
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite не умеет ALTER большинства конструкций — batch-режим пересоздает таблицу
+        render_as_batch=True,
+        compare_type=True,
+        **kwargs
+    )
+
+
+def run_migrations_offline() -> None:
+    """Сгенерировать SQL без подключения к базе (alembic upgrade --sql)"""
+    _configure(url=get_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    _configure(connection=connection)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Запуск из CLI: отдельный движок без пула"""
+    connectable = create_async_engine(get_url(), poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    # init_db передает уже открытое соединение бота
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
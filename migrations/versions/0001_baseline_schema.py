@@ -0,0 +1,179 @@
+"""Базовая схема (таблицы, созданные Base.metadata.create_all до миграций)
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 15:41:22.843558
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('admins',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+    sa.Column('role', sa.Enum('USER', 'ADMIN', 'MANAGER', 'CONTENT_MANAGER', name='userrole'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('admins', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_admins_telegram_id'), ['telegram_id'], unique=True)
+
+    op.create_table('broadcasts',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('admin_id', sa.BigInteger(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('target_audience', sa.String(length=100), nullable=False),
+    sa.Column('total_sent', sa.Integer(), nullable=False),
+    sa.Column('successful', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('icon', sa.String(length=10), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=True),
+    sa.Column('first_name', sa.String(length=255), nullable=True),
+    sa.Column('last_name', sa.String(length=255), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('is_blocked', sa.Boolean(), nullable=False),
+    sa.Column('referral_code', sa.String(length=50), nullable=True),
+    sa.Column('referred_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['referred_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('referral_code')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_telegram_id'), ['telegram_id'], unique=True)
+
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('project_type', sa.Enum('DIPLOMA', 'COURSEWORK', 'PRESENTATION', 'PROJECT', name='projecttype'), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('technologies', sa.Text(), nullable=False),
+    sa.Column('deadline', sa.String(length=255), nullable=True),
+    sa.Column('budget', sa.String(length=255), nullable=True),
+    sa.Column('contact_info', sa.String(length=255), nullable=True),
+    sa.Column('files_path', sa.Text(), nullable=True),
+    sa.Column('result_files_path', sa.Text(), nullable=True),
+    sa.Column('status', sa.Enum('NEW', 'UNDER_REVIEW', 'ACCEPTED', 'IN_PROGRESS', 'READY_FOR_CHECK', 'COMPLETED', 'REJECTED', name='orderstatus'), nullable=False),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('is_paid', sa.Boolean(), nullable=False),
+    sa.Column('admin_comment', sa.Text(), nullable=True),
+    sa.Column('rejection_reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('projects',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('project_type', sa.Enum('DIPLOMA', 'COURSEWORK', 'PRESENTATION', 'PROJECT', name='projecttype'), nullable=False),
+    sa.Column('level', sa.Enum('BASIC', 'INTERMEDIATE', 'ADVANCED', name='projectlevel'), nullable=False),
+    sa.Column('technologies', sa.Text(), nullable=False),
+    sa.Column('programming_languages', sa.String(length=255), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('discount_price', sa.Float(), nullable=True),
+    sa.Column('file_path', sa.String(length=500), nullable=True),
+    sa.Column('image_path', sa.String(length=500), nullable=True),
+    sa.Column('demo_url', sa.String(length=500), nullable=True),
+    sa.Column('views_count', sa.Integer(), nullable=False),
+    sa.Column('purchases_count', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('support_tickets',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('OPEN', 'IN_PROGRESS', 'CLOSED', name='ticketstatus'), nullable=False),
+    sa.Column('admin_response', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('cart',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('added_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('purchases',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('payment_method', sa.String(length=100), nullable=True),
+    sa.Column('transaction_id', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reviews',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reviews')
+    op.drop_table('purchases')
+    op.drop_table('cart')
+    op.drop_table('support_tickets')
+    op.drop_table('projects')
+    op.drop_table('orders')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_telegram_id'))
+
+    op.drop_table('users')
+    op.drop_table('categories')
+    op.drop_table('broadcasts')
+    with op.batch_alter_table('admins', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_admins_telegram_id'))
+
+    op.drop_table('admins')
@@ -0,0 +1,49 @@
+"""Индексы горячих запросов crud: заказы, покупки, корзина, тикеты, каталог
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 15:41:41.826919
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, таблица, колонки) — ведущая колонка совпадает с фильтром запроса,
+# вторая — с сортировкой или вторым условием, чтобы обойтись без TEMP B-TREE
+INDEXES = [
+    # get_user_orders: WHERE user_id ORDER BY created_at DESC
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at']),
+    # get_orders_by_status: WHERE status ORDER BY created_at DESC
+    ('ix_orders_status_created_at', 'orders', ['status', 'created_at']),
+    # get_user_purchases: WHERE user_id ORDER BY created_at DESC
+    ('ix_purchases_user_id_created_at', 'purchases', ['user_id', 'created_at']),
+    # has_user_purchased_project: WHERE user_id AND project_id
+    ('ix_purchases_user_id_project_id', 'purchases', ['user_id', 'project_id']),
+    # get_user_cart / add_to_cart / remove_from_cart / clear_cart
+    ('ix_cart_user_id_project_id', 'cart', ['user_id', 'project_id']),
+    # get_user_tickets: WHERE user_id ORDER BY created_at DESC
+    ('ix_support_tickets_user_id_created_at', 'support_tickets', ['user_id', 'created_at']),
+    # get_all_projects / get_projects_count с фильтром по типу (и категории)
+    ('ix_projects_active_type_category', 'projects', ['is_active', 'project_type', 'category_id']),
+    # то же с фильтром только по категории
+    ('ix_projects_active_category', 'projects', ['is_active', 'category_id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
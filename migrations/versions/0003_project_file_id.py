@@ -0,0 +1,30 @@
+"""file_id файла проекта в Telegram
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 18:02:11.402317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('file_id', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('file_name', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('file_name')
+        batch_op.drop_column('file_id')
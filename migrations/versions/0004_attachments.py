@@ -0,0 +1,121 @@
+"""Таблица attachments вместо JSON-колонок files_path/result_files_path
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 19:20:37.118402
+
+"""
+import json
+import os
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Колонка заказа -> назначение файла
+COLUMNS = {'files_path': 'CLIENT', 'result_files_path': 'RESULT'}
+
+orders = sa.table(
+    'orders',
+    sa.column('id', sa.Integer),
+    sa.column('files_path', sa.Text),
+    sa.column('result_files_path', sa.Text),
+)
+
+
+def _attachments_table() -> sa.Table:
+    return op.create_table(
+        'attachments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.Enum('CLIENT', 'RESULT', name='attachmentkind'), nullable=False),
+        sa.Column('media_type', sa.String(length=16), nullable=False),
+        sa.Column('file_id', sa.String(length=255), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('mime', sa.String(length=127), nullable=True),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('path', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def _row(order_id: int, kind: str, item) -> dict:
+    """Строка attachments из элемента JSON: словарь файла или просто путь"""
+    if isinstance(item, str):
+        item = {'path': item}
+    path = item.get('path')
+    return {
+        'order_id': order_id,
+        'kind': kind,
+        'media_type': item.get('media_type') or item.get('kind') or 'document',
+        'file_id': item.get('file_id'),
+        'name': item.get('name') or (os.path.basename(path) if path else 'file'),
+        'size': item.get('size'),
+        'mime': item.get('mime'),
+        'sha256': item.get('sha256'),
+        'path': path,
+        'created_at': datetime.utcnow(),
+    }
+
+
+def upgrade() -> None:
+    attachments = _attachments_table()
+    op.create_index('ix_attachments_order_id_kind', 'attachments', ['order_id', 'kind'])
+    op.create_index('ix_attachments_sha256', 'attachments', ['sha256'])
+
+    connection = op.get_bind()
+    rows = []
+    result = connection.execute(
+        sa.select(orders).where(sa.or_(orders.c.files_path.isnot(None), orders.c.result_files_path.isnot(None)))
+    )
+    for order in result.mappings():
+        for column, kind in COLUMNS.items():
+            if order[column]:
+                rows.extend(_row(order['id'], kind, item) for item in json.loads(order[column]))
+    if rows:
+        op.bulk_insert(attachments, rows)
+
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('result_files_path')
+        batch_op.drop_column('files_path')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.add_column(sa.Column('files_path', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('result_files_path', sa.Text(), nullable=True))
+
+    connection = op.get_bind()
+    attachments = sa.table(
+        'attachments', *(sa.column(name) for name in (
+            'id', 'order_id', 'kind', 'media_type', 'file_id', 'name', 'size', 'mime', 'sha256', 'path'
+        ))
+    )
+    collected = {}
+    for row in connection.execute(sa.select(attachments).order_by(attachments.c.id)).mappings():
+        # Прежний формат словаря: тип медиа в ключе kind
+        file = {'kind': row['media_type'], **{key: row[key] for key in ('file_id', 'name', 'size', 'mime', 'sha256', 'path')}}
+        column = 'files_path' if row['kind'] == 'CLIENT' else 'result_files_path'
+        collected.setdefault((row['order_id'], column), []).append(file)
+    for (order_id, column), files in collected.items():
+        connection.execute(
+            orders.update().where(orders.c.id == order_id).values({column: json.dumps(files, ensure_ascii=False)})
+        )
+
+    op.drop_index('ix_attachments_sha256', table_name='attachments')
+    op.drop_index('ix_attachments_order_id_kind', table_name='attachments')
+    op.drop_table('attachments')
+    if connection.dialect.name == 'postgresql':
+        sa.Enum(name='attachmentkind').drop(connection, checkfirst=True)
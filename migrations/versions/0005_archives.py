@@ -0,0 +1,34 @@
+"""Кеш file_id собранных ZIP-архивов
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 21:04:52.630118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archives',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('file_id', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archives')